@@ -0,0 +1,428 @@
+"""
+Acquisition Pipeline - Bounded Queue and Worker Pool for Evidence Acquisition
+New files are first held by a CompletionDetector until they are completely
+written, then put on a bounded queue; a pool of worker threads prepares,
+hashes and commits each file. In "process" mode the hashing runs in a process
+pool so large files use every core while the threads wait.
+When acquisition falls behind, a file that finds the queue full goes straight
+to a bounded overflow list that workers move back onto the queue as it drains,
+so the observer and timer threads are never stalled; once that list is full
+too, files are turned away and reported. Queue depth and per-stage latency are tracked.
+"""
+
+import heapq
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+class StageTimer:
+    """Count, mean and maximum latency of one pipeline stage"""
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+    
+    def summary(self):
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 1)
+        }
+
+
+class CompletionDetector:
+    """
+    Decides when a new file has been completely written
+    With close_events (the observer reports close-after-write), a file is only
+    complete when it is closed; polling is a fallback that gives up waiting for
+    the close after close_timeout quiet seconds. Without close events, the file
+    is polled until its size and mtime have not changed for a quiet period of
+    `settle` seconds, growing with the poll interval, which backs off while the
+    file keeps growing. All watched files share one timer thread.
+    """
+    
+    def __init__(self, on_complete, settle=1.0, initial_interval=0.25, max_interval=30.0, backoff=2.0,
+                 close_events=True, close_timeout=300.0):
+        """on_complete(path) is called once per file, from the event or timer thread"""
+        self.on_complete = on_complete
+        self.settle = settle
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.close_events = close_events
+        self.close_timeout = close_timeout
+        self._watches = {}
+        # Files completed by the polling fallback while close events were expected: path -> signature handed on
+        self._fallback = {}
+        self._due = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._timer = StageTimer()
+        self.completed_on_close = 0
+        self.completed_stable = 0
+        self.reacquired_on_close = 0
+        self.vanished = 0
+    
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+    
+    def _schedule(self, path, state, due):
+        state["due"] = due
+        heapq.heappush(self._due, (due, next(self._sequence), path))
+        self._condition.notify()
+    
+    def watch(self, path):
+        """Start watching a new file; False if it is already watched"""
+        now = time.monotonic()
+        with self._condition:
+            if path in self._watches:
+                return False
+            state = {"signature": self._signature(path), "changed_at": now, "since": now, "interval": self.initial_interval}
+            self._watches[path] = state
+            self._schedule(path, state, now + self.initial_interval)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="WriteCompletion", daemon=True)
+                self._thread.start()
+        return True
+    
+    def touch(self, path):
+        """A write was reported for the file; its quiet period starts over"""
+        with self._condition:
+            state = self._watches.get(path)
+            if state is not None:
+                state["changed_at"] = time.monotonic()
+    
+    def closed(self, path):
+        """
+        A writer closed the file; it is complete. A file the polling fallback
+        already handed on is handed on again if it changed after that.
+        """
+        if not self.close_events:
+            return
+        with self._condition:
+            state = self._watches.pop(path, None)
+            if state is None:
+                if path not in self._fallback or self._fallback.pop(path) == self._signature(path):
+                    return
+                self.reacquired_on_close += 1
+            else:
+                self.completed_on_close += 1
+                self._timer.add(time.monotonic() - state["since"])
+        self.on_complete(path)
+    
+    def forget(self, path):
+        with self._condition:
+            self._watches.pop(path, None)
+            self._fallback.pop(path, None)
+    
+    def _quiet_period(self, state):
+        """How long a file must stay unchanged before polling declares it complete"""
+        base = self.close_timeout if self.close_events else self.settle
+        # A file that kept growing for a long time has earned a longer wait
+        return max(base, state["interval"])
+    
+    def _check(self, path, state, now):
+        """Poll one file; returns True once it is complete"""
+        signature = self._signature(path)
+        if signature is None:
+            del self._watches[path]
+            self.vanished += 1
+        elif signature != state["signature"]:
+            # Still being written: look again later, less often the longer it grows
+            state["signature"] = signature
+            state["changed_at"] = now
+            state["interval"] = min(state["interval"] * self.backoff, self.max_interval)
+            self._schedule(path, state, now + state["interval"])
+        elif now - state["changed_at"] >= self._quiet_period(state):
+            del self._watches[path]
+            self.completed_stable += 1
+            self._timer.add(now - state["since"])
+            if self.close_events:
+                print(f"[MONITOR] No close event for {os.path.basename(path)} after {self.close_timeout:.0f}s quiet; acquiring it")
+                self._fallback[path] = signature
+            return True
+        else:
+            self._schedule(path, state, state["changed_at"] + self._quiet_period(state))
+        return False
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped and (not self._due or self._due[0][0] > time.monotonic()):
+                    self._condition.wait(self._due[0][0] - time.monotonic() if self._due else None)
+                if self._stopped:
+                    return
+                due, _, path = heapq.heappop(self._due)
+                state = self._watches.get(path)
+                # Entries for files that completed or were rescheduled since are left in the heap
+                if state is None or state["due"] != due or not self._check(path, state, time.monotonic()):
+                    continue
+            # Outside the lock, so watch() and closed() are not held up while the file is handed on
+            self.on_complete(path)
+    
+    def stop(self):
+        """
+        Stop polling. Files still being written are not handed on, since their
+        content is not final; they are returned so the caller can record them.
+        """
+        with self._condition:
+            self._stopped = True
+            unfinished = sorted(self._watches)
+            self._watches.clear()
+            self._due.clear()
+            self._fallback.clear()
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for path in unfinished:
+            print(f"[MONITOR] Not acquired, still being written: {path}")
+        return unfinished
+    
+    def stats(self):
+        with self._condition:
+            return {
+                "watching": len(self._watches),
+                "completed_on_close": self.completed_on_close,
+                "completed_stable": self.completed_stable,
+                "reacquired_on_close": self.reacquired_on_close,
+                "vanished": self.vanished,
+                "settle_latency": self._timer.summary()
+            }
+
+
+class AcquisitionPipeline:
+    """
+    Worker pool that acquires queued files off the event thread
+    Stages: queue (waiting for a worker), prepare, hash, commit, and total
+    """
+    
+    STAGES = ("queue", "prepare", "hash", "commit", "total")
+    _STOP = object()
+    
+    def __init__(self, hash_file, commit, prepare=None, workers=4, queue_size=1000, pool="thread", submit_timeout=0.5,
+                 overflow_size=10000, on_overflow=None):
+        """
+        prepare(path) returns False to skip a file; hash_file(path) must be picklable
+        in "process" mode; commit(path, hashed) records the result in the evidence log.
+        submit_timeout bounds how long submit(wait=True) waits for room on a full queue.
+        At most overflow_size files are deferred; on_overflow(path) is called, on the
+        submitting thread, for each file turned away once the overflow list is full.
+        """
+        if pool not in ("thread", "process"):
+            raise ValueError(f"Unknown acquisition pool: {pool}")
+        self.hash_file = hash_file
+        self.commit = commit
+        self.prepare = prepare
+        self.workers = max(1, workers)
+        self.pool = pool
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self.submit_timeout = submit_timeout
+        # Files deferred while the queue was full, oldest first
+        self._overflow = deque()
+        self.overflow_size = max(1, overflow_size)
+        self.on_overflow = on_overflow
+        self._lock = threading.Lock()
+        # Signalled whenever deferred files move onto the queue or a file is finished
+        self._changed = threading.Condition(self._lock)
+        # Queued, deferred or in progress; _running only the last, and
+        # _rerun those changed again while they were being acquired
+        self._pending = set()
+        self._running = set()
+        self._rerun = set()
+        self._threads = []
+        self._executor = None
+        self._timers = {stage: StageTimer() for stage in self.STAGES}
+        self.processed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.deferred = 0
+        self.requeued = 0
+        self.dropped = 0
+    
+    def start(self):
+        if self.pool == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"EvidenceAcquisition-{number + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def submit(self, file_path, wait=False):
+        """
+        Queue a file for acquisition; False if it is already queued, or turned away
+        because the overflow list is full. A file resubmitted while it is being
+        acquired is queued again once that finishes, since its content changed.
+        A full queue defers the file to the overflow list at once, so event and
+        timer threads never block; wait=True first waits up to submit_timeout for room.
+        """
+        with self._lock:
+            if file_path in self._pending:
+                if file_path not in self._running or file_path in self._rerun:
+                    return False
+                self._rerun.add(file_path)
+                self.requeued += 1
+                return True
+            self._pending.add(file_path)
+        return self._enqueue(file_path, wait)
+    
+    def _enqueue(self, file_path, wait=False):
+        item = (file_path, time.perf_counter())
+        with self._lock:
+            # Files already deferred go first, so a newer one cannot overtake them
+            deferring = bool(self._overflow)
+            if not deferring:
+                try:
+                    self._queue.put_nowait(item)
+                    return True
+                except queue.Full:
+                    pass
+        if wait and not deferring:
+            try:
+                self._queue.put(item, timeout=self.submit_timeout)
+                return True
+            except queue.Full:
+                pass
+        with self._lock:
+            if len(self._overflow) >= self.overflow_size:
+                self._pending.discard(file_path)
+                self.dropped += 1
+                self._changed.notify_all()
+                full = True
+            else:
+                self._overflow.append(item)
+                self.deferred += 1
+                waiting = len(self._overflow)
+                full = False
+        if full:
+            print(f"[MONITOR] Acquisition backlog full ({self.overflow_size} files deferred); not queued: {file_path}")
+            if self.on_overflow is not None:
+                self.on_overflow(file_path)
+            return False
+        print(f"[MONITOR] Acquisition queue full ({self._queue.maxsize} files); deferred {file_path} ({waiting} waiting)")
+        self._refill()
+        return True
+    
+    def _refill(self):
+        """Move deferred files onto the queue while it has room"""
+        with self._lock:
+            self._refill_locked()
+    
+    def _refill_locked(self):
+        moved = False
+        while self._overflow:
+            try:
+                self._queue.put_nowait(self._overflow[0])
+            except queue.Full:
+                break
+            self._overflow.popleft()
+            moved = True
+        if moved:
+            self._changed.notify_all()
+    
+    def stop(self):
+        """Finish every queued, deferred and re-queued file, then stop the workers"""
+        with self._changed:
+            while True:
+                self._refill_locked()
+                if not self._pending:
+                    break
+                # Woken as the workers drain the queue and finish files
+                self._changed.wait()
+        for _ in self._threads:
+            self._queue.put(self._STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def _time(self, stage, started):
+        now = time.perf_counter()
+        with self._lock:
+            self._timers[stage].add(now - started)
+        return now
+    
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            file_path, queued_at = item
+            with self._lock:
+                self._running.add(file_path)
+                # The slot just taken makes room for a deferred file
+                self._refill_locked()
+            try:
+                started = self._time("queue", queued_at)
+                if self.prepare is not None and not self.prepare(file_path):
+                    with self._lock:
+                        self.skipped += 1
+                    continue
+                mark = self._time("prepare", started)
+                if self._executor is not None:
+                    hashed = self._executor.submit(self.hash_file, file_path).result()
+                else:
+                    hashed = self.hash_file(file_path)
+                mark = self._time("hash", mark)
+                self.commit(file_path, hashed)
+                self._time("commit", mark)
+                self._time("total", queued_at)
+                with self._lock:
+                    self.processed += 1
+            except Exception as e:
+                print(f"[ERROR] Failed to process file: {e}")
+                with self._lock:
+                    self.failed += 1
+            finally:
+                with self._lock:
+                    self._running.discard(file_path)
+                    rerun = file_path in self._rerun
+                    if rerun:
+                        self._rerun.discard(file_path)
+                    else:
+                        self._pending.discard(file_path)
+                        self._changed.notify_all()
+                if rerun:
+                    # Still pending, so stop() keeps waiting for it
+                    self._enqueue(file_path)
+    
+    def stats(self):
+        """Queue depth, counters and per-stage latency"""
+        with self._lock:
+            return {
+                "pool": self.pool,
+                "workers": self.workers,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "deferred_waiting": len(self._overflow),
+                "deferred_capacity": self.overflow_size,
+                "in_progress": len(self._running),
+                "processed": self.processed,
+                "failed": self.failed,
+                "skipped": self.skipped,
+                "deferred": self.deferred,
+                "requeued": self.requeued,
+                "dropped": self.dropped,
+                "latency": {stage: timer.summary() for stage, timer in self._timers.items()}
+            }
@@ -22,6 +22,7 @@ class AlertType(Enum):
     HASH_CHAIN_BROKEN = "Hash Chain Broken"
     UNAUTHORIZED_ACCESS = "Unauthorized Access"
     SYSTEM_ERROR = "System Error"
+    ACQUISITION_INCOMPLETE = "Acquisition Incomplete"
 
 
 class Alert:
@@ -0,0 +1,113 @@
+"""
+Anchor Chain - Global Commitments for Per-Camera Hash Chains
+In per-camera chain mode each camera's entries form an independent chain.
+At intervals the head hash and length of every camera chain are committed
+into this global anchor chain, so camera histories can be appended and
+verified independently while still being tied to one tamper-evident record.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from core.LogStorage import JsonLinesFile, LogStorage
+
+
+class AnchorChain:
+    """
+    Append-only chain of anchors, each hashing the previous anchor and the
+    current {camera_id: {"hash", "count"}} heads of the per-camera chains
+    """
+    
+    ANCHOR_FILE = "anchor_chain.jsonl"
+    
+    _lock = threading.RLock()
+    
+    @staticmethod
+    def anchor_hash(previous_hash, timestamp, heads):
+        payload = json.dumps(
+            {"previous_hash": previous_hash, "timestamp": timestamp, "heads": heads},
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    @classmethod
+    def anchors(cls):
+        return list(JsonLinesFile(cls.ANCHOR_FILE).iter_records())
+    
+    @classmethod
+    def last_anchor(cls):
+        for anchor in JsonLinesFile(cls.ANCHOR_FILE).iter_records_reversed():
+            return anchor
+        return None
+    
+    @classmethod
+    def commit(cls, storage):
+        """
+        Anchor the current heads of all camera chains.
+        Nothing is written if no chain moved since the last anchor; returns the new anchor or None.
+        """
+        with cls._lock:
+            heads = storage.chain_heads()
+            last = cls.last_anchor()
+            if not heads or (last is not None and last["heads"] == heads):
+                return None
+            
+            previous_hash = last["hash"] if last else ""
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+            anchor = {
+                "position": last["position"] + 1 if last else 1,
+                "timestamp": timestamp,
+                "heads": heads,
+                "previous_hash": previous_hash,
+                "hash": cls.anchor_hash(previous_hash, timestamp, heads)
+            }
+            JsonLinesFile(cls.ANCHOR_FILE).append_records([anchor])
+            LogStorage.fsync_path(cls.ANCHOR_FILE)
+            print(f"[CHAIN] Anchor #{anchor['position']} committed for {len(heads)} camera chain(s)")
+            return anchor
+    
+    @classmethod
+    def verify(cls, storage, chain_ids=None):
+        """
+        Check the anchor chain links and that each anchored head is still the entry
+        at that position of its camera chain. chain_ids limits the head checks to
+        some cameras, so one camera can be audited without reading the others.
+        Returns (valid, message, problems).
+        """
+        problems = []
+        chains = {}
+        previous_hash = ""
+        anchors = cls.anchors()
+        for anchor in anchors:
+            expected = cls.anchor_hash(anchor["previous_hash"], anchor["timestamp"], anchor["heads"])
+            if anchor["previous_hash"] != previous_hash or anchor["hash"] != expected:
+                problems.append({"anchor": anchor["position"], "chain_id": None, "problem": "Anchor link or hash does not match"})
+            previous_hash = anchor["hash"]
+            
+            for chain_id, head in anchor["heads"].items():
+                if chain_ids is not None and chain_id not in chain_ids:
+                    continue
+                if chain_id not in chains:
+                    chains[chain_id] = storage.chain_entries(chain_id)
+                entries = chains[chain_id]
+                if len(entries) < head["count"] or entries[head["count"] - 1].get("hash") != head["hash"]:
+                    problems.append({
+                        "anchor": anchor["position"],
+                        "chain_id": chain_id,
+                        "problem": f"Camera chain no longer matches the anchored head at entry {head['count']}"
+                    })
+        
+        if problems:
+            return False, f"Anchor chain check failed: {len(problems)} problem(s)", problems
+        if not anchors:
+            return True, "No anchors recorded", []
+        return True, f"Anchor chain intact ({len(anchors)} anchors)", []
+    
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            if os.path.exists(cls.ANCHOR_FILE):
+                os.remove(cls.ANCHOR_FILE)
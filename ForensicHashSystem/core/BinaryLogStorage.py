@@ -0,0 +1,486 @@
+"""
+Binary Evidence Log Storage
+Optional EvidenceLog storage engine using a compact record format: hashes
+are stored as fixed-width 32-byte fields and common text fields as
+length-prefixed UTF-8 strings. A companion offset index lets the memory-mapped
+log jump straight to record N or walk backwards from the tail without
+parsing anything else. EvidenceLog.export_log_json writes the log back out
+as a JSON array for interoperability.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from core.EvidenceEntry import EvidenceEntry
+from core.LogStorage import CustodyLog, LogStorage, TimeIndex
+
+
+class LogMapping:
+    """
+    Read-only memory maps of the log and its offset index at one point in time
+    Records appended after the index was last written are located by scanning
+    the data file, so the view is complete even if a writer died between files.
+    Lazy readers hold the mapping with acquire()/release(); a retired mapping
+    is closed once the last of them has finished.
+    """
+    
+    def __init__(self, path, index_path):
+        self.data = self._map(path)
+        self.index = self._map(index_path)
+        self._readers = 0
+        self._retired = False
+        self._reader_lock = threading.Lock()
+        self.generation = b""
+        self.indexed = 0
+        self.tail = []
+        self.end = 0
+        if self.data is None or len(self.data) < BinaryStorage.FILE_HEADER.size:
+            return
+        
+        magic, self.generation = BinaryStorage.FILE_HEADER.unpack_from(self.data, 0)
+        if magic != BinaryStorage.MAGIC:
+            raise ValueError(f"{path} is not a binary evidence log")
+        self.end = BinaryStorage.FILE_HEADER.size
+        
+        # An index left over from a previous log of the same name is ignored
+        if self.index is not None and self.index[:len(self.generation)] == self.generation:
+            self.indexed = (len(self.index) - len(self.generation)) // BinaryStorage.OFFSET.size
+        if self.indexed:
+            last = self._indexed_offset(self.indexed - 1)
+            if last + BinaryStorage.LENGTH.size <= len(self.data):
+                self.end = last + BinaryStorage.LENGTH.size + BinaryStorage.LENGTH.unpack_from(self.data, last)[0]
+            if self.end <= BinaryStorage.FILE_HEADER.size or self.end > len(self.data):
+                # The index reached disk ahead of the records it points to; rescan instead
+                self.indexed = 0
+                self.end = BinaryStorage.FILE_HEADER.size
+        
+        while self.end + BinaryStorage.LENGTH.size <= len(self.data):
+            length = BinaryStorage.LENGTH.unpack_from(self.data, self.end)[0]
+            if self.end + BinaryStorage.LENGTH.size + length > len(self.data):
+                # Torn tail of an interrupted append
+                break
+            self.tail.append(self.end)
+            self.end += BinaryStorage.LENGTH.size + length
+    
+    @staticmethod
+    def _map(path):
+        try:
+            with open(path, "rb") as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError: empty files cannot be mapped
+            return None
+    
+    def close(self):
+        for mapped in (self.data, self.index):
+            if mapped is not None:
+                mapped.close()
+    
+    def acquire(self):
+        with self._reader_lock:
+            self._readers += 1
+    
+    def release(self):
+        with self._reader_lock:
+            self._readers -= 1
+            if self._retired and not self._readers:
+                self.close()
+    
+    def retire(self):
+        """The storage has moved on to a newer mapping; close this one when no reader needs it"""
+        with self._reader_lock:
+            self._retired = True
+            if not self._readers:
+                self.close()
+    
+    def __len__(self):
+        return self.indexed + len(self.tail)
+    
+    def _indexed_offset(self, position):
+        return BinaryStorage.OFFSET.unpack_from(self.index, len(self.generation) + position * BinaryStorage.OFFSET.size)[0]
+    
+    def offset(self, position):
+        """Byte offset of record `position` (0-based)"""
+        if position < self.indexed:
+            return self._indexed_offset(position)
+        return self.tail[position - self.indexed]
+    
+    def record(self, position):
+        return BinaryStorage.decode(self.data, self.offset(position))[0]
+    
+    def records(self, start=0):
+        """Decode records from `start` to the end, in chain order"""
+        if start >= len(self):
+            return []
+        return BinaryStorage.decode_range(self.data, self.offset(start), self.end)
+
+
+class PositionIndex:
+    """
+    Chain positions of the entries the lookups return, built from one pass over the log
+    Holds positions rather than entries; the entry itself is decoded from the
+    mapping when asked for.
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.first_by_uuid = {}
+        self.latest_by_file = {}
+        self.latest_by_file_camera = {}
+        self.original_by_file = {}
+        self.latest_by_chain = {}
+        self.by_chain = {}
+        self.by_time = TimeIndex()
+    
+    def add(self, position, entry):
+        self.by_time.add(position, entry)
+        file_name = entry.get("file_name")
+        chain_id = entry.get("chain_id")
+        self.latest_by_chain[chain_id] = position
+        if chain_id is not None:
+            self.by_chain.setdefault(chain_id, array("Q")).append(position)
+        if entry.get("evidence_uuid") is not None:
+            self.first_by_uuid.setdefault(EvidenceEntry.compact("evidence_uuid", entry["evidence_uuid"]), position)
+        self.latest_by_file[file_name] = position
+        self.latest_by_file_camera[(file_name, entry.get("camera_id"))] = position
+        if entry.get("event_type") == "CREATE":
+            self.original_by_file.setdefault(file_name, position)
+        self.count = position + 1
+
+
+class BinaryStorage(LogStorage):
+    """
+    Evidence log stored as length-prefixed binary records with an offset index
+    Fields that do not fit the fixed layout are kept in a compact JSON trailer,
+    so every entry round-trips exactly.
+    """
+    
+    MAGIC = b"CCTVLOG1"
+    # Magic plus a random generation that the offset index must carry too
+    FILE_HEADER = struct.Struct("<8s8s")
+    # hash, previous_hash, file_size, flags
+    RECORD_HEADER = struct.Struct("<32s32sqB")
+    LENGTH = struct.Struct("<I")
+    OFFSET = struct.Struct("<Q")
+    
+    MISSING = 0xFFFFFFFF
+    HAS_HASH = 1
+    HAS_PREVIOUS_HASH = 2
+    HAS_FILE_SIZE = 4
+    
+    STRING_FIELDS = (
+        "evidence_uuid", "file_name", "camera_id", "event_type", "timestamp",
+        "chain_id", "fingerprint", "original_location", "current_location"
+    )
+    
+    def __init__(self, path, custody_path):
+        super().__init__(path)
+        self.index_path = path + ".idx"
+        self.custody_log = CustodyLog(custody_path)
+        self._lock = threading.RLock()
+        self._mapping = None
+        self._signature = None
+        # Position index built on the first lookup and extended as the log grows
+        self._positions = PositionIndex()
+        self._positions_generation = None
+    
+    @staticmethod
+    def _fixed_hash(value):
+        """32 raw bytes for a lowercase hex SHA-256 digest, None for anything else"""
+        if not isinstance(value, str) or len(value) != 64:
+            return None
+        try:
+            raw = bytes.fromhex(value)
+        except ValueError:
+            return None
+        return raw if raw.hex() == value else None
+    
+    @classmethod
+    def encode(cls, entry):
+        """Encode one entry as a length-prefixed record"""
+        extra = dict(entry)
+        flags = 0
+        digest = cls._fixed_hash(extra.get("hash"))
+        if digest is not None:
+            flags |= cls.HAS_HASH
+            del extra["hash"]
+        previous_hash = cls._fixed_hash(extra.get("previous_hash"))
+        if previous_hash is not None:
+            flags |= cls.HAS_PREVIOUS_HASH
+            del extra["previous_hash"]
+        file_size = extra.get("file_size")
+        if type(file_size) is int and -2 ** 63 <= file_size < 2 ** 63:
+            flags |= cls.HAS_FILE_SIZE
+            del extra["file_size"]
+        
+        parts = [cls.RECORD_HEADER.pack(
+            digest or bytes(32), previous_hash or bytes(32), file_size if flags & cls.HAS_FILE_SIZE else 0, flags
+        )]
+        for name in cls.STRING_FIELDS:
+            value = extra.get(name)
+            if isinstance(value, str):
+                del extra[name]
+                raw = value.encode("utf-8")
+                parts += [cls.LENGTH.pack(len(raw)), raw]
+            else:
+                parts.append(cls.LENGTH.pack(cls.MISSING))
+        raw = json.dumps(extra, separators=(",", ":"), ensure_ascii=False).encode("utf-8") if extra else b""
+        parts += [cls.LENGTH.pack(len(raw)), raw]
+        
+        payload = b"".join(parts)
+        return cls.LENGTH.pack(len(payload)) + payload
+    
+    @classmethod
+    def decode(cls, buffer, offset):
+        """Decode the record at offset; returns (entry, offset of the next record)"""
+        length = cls.LENGTH.unpack_from(buffer, offset)[0]
+        position = offset + cls.LENGTH.size
+        digest, previous_hash, file_size, flags = cls.RECORD_HEADER.unpack_from(buffer, position)
+        position += cls.RECORD_HEADER.size
+        
+        entry = {}
+        for name in cls.STRING_FIELDS:
+            size = cls.LENGTH.unpack_from(buffer, position)[0]
+            position += cls.LENGTH.size
+            if size != cls.MISSING:
+                entry[name] = buffer[position:position + size].decode("utf-8")
+                position += size
+        size = cls.LENGTH.unpack_from(buffer, position)[0]
+        position += cls.LENGTH.size
+        if size:
+            entry.update(json.loads(buffer[position:position + size]))
+        
+        if flags & cls.HAS_HASH:
+            entry["hash"] = digest.hex()
+        if flags & cls.HAS_PREVIOUS_HASH:
+            entry["previous_hash"] = previous_hash.hex()
+        if flags & cls.HAS_FILE_SIZE:
+            entry["file_size"] = file_size
+        return entry, offset + cls.LENGTH.size + length
+    
+    @classmethod
+    def decode_range(cls, buffer, start, end):
+        entries = []
+        while start < end:
+            entry, start = cls.decode(buffer, start)
+            entries.append(entry)
+        return entries
+    
+    @classmethod
+    def read_range(cls, path, start, end):
+        """Decode the records in bytes [start, end) of a log file (record-aligned)"""
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return cls.decode_range(data, start, end)
+    
+    def _file_signature(self):
+        signature = []
+        for path in (self.path, self.index_path):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def _view(self):
+        """Current LogMapping, re-mapped only when either file changed"""
+        with self._lock:
+            signature = self._file_signature()
+            if self._mapping is None or signature != self._signature:
+                self._unmap()
+                self._mapping = LogMapping(self.path, self.index_path)
+                self._signature = signature
+            return self._mapping
+    
+    def _unmap(self):
+        # Lazy readers may still be walking the old mapping; it stays open until they finish
+        if self._mapping is not None:
+            self._mapping.retire()
+        self._mapping = None
+    
+    def exists(self):
+        return os.path.exists(self.path)
+    
+    def count(self):
+        with self._lock:
+            return len(self._view())
+    
+    def record(self, position):
+        """Entry at a 0-based chain position, decoding nothing else"""
+        with self._lock:
+            view = self._view()
+            if position < 0:
+                position += len(view)
+            if not 0 <= position < len(view):
+                raise IndexError(f"log position out of range: {position}")
+            return view.record(position)
+    
+    def iter_entries(self, reverse=False):
+        """Yield entries in chain order (newest first with reverse=True), decoding each only when it is reached"""
+        with self._lock:
+            view = self._view()
+            view.acquire()
+        try:
+            positions = range(len(view) - 1, -1, -1) if reverse else range(len(view))
+            for position in positions:
+                yield view.record(position)
+        finally:
+            view.release()
+    
+    def load(self):
+        return self.entries_since(0)
+    
+    def entries_since(self, position):
+        with self._lock:
+            return self._view().records(position)
+    
+    def chain_ranges(self, count):
+        with self._lock:
+            view = self._view()
+            total = len(view)
+            if not total:
+                return []
+            step = -(-total // count)
+            return [
+                (BinaryStorage.read_range, (
+                    self.path,
+                    view.offset(start),
+                    view.offset(start + step) if start + step < total else view.end
+                ))
+                for start in range(0, total, step)
+            ]
+    
+    def segments(self):
+        with self._lock:
+            view = self._view()
+            first = view.record(0) if len(view) else {}
+            last = view.record(len(view) - 1) if len(view) else {}
+            return [{
+                "name": os.path.basename(self.path),
+                "entry_count": len(view),
+                "first_previous_hash": first.get("previous_hash", ""),
+                "last_hash": last.get("hash", ""),
+                "sealed": False
+            }]
+    
+    def append(self, entries):
+        records = [self.encode(entry) for entry in entries]
+        with self._lock:
+            view = self._view()
+            generation, indexed, offsets, end = view.generation, view.indexed, list(view.tail), view.end
+            self._unmap()
+            
+            with open(self.path, "ab") as data:
+                if not end:
+                    generation = os.urandom(8)
+                    data.truncate(0)
+                    data.write(self.FILE_HEADER.pack(self.MAGIC, generation))
+                    end = self.FILE_HEADER.size
+                elif data.tell() != end:
+                    # Drop the torn tail of an interrupted append
+                    data.truncate(end)
+                for record in records:
+                    data.write(record)
+                    offsets.append(end)
+                    end += len(record)
+            
+            # The data is written first, so every indexed offset points at a complete record
+            with open(self.index_path, "ab") as index:
+                if not indexed:
+                    index.truncate(0)
+                    index.write(generation)
+                else:
+                    index.truncate(len(generation) + indexed * self.OFFSET.size)
+                index.write(b"".join(self.OFFSET.pack(offset) for offset in offsets))
+    
+    def import_entries(self, entries):
+        with self._lock:
+            self._unmap()
+            for path in (self.path, self.index_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.append(entries)
+    
+    def clear(self):
+        with self._lock:
+            self._unmap()
+            for path in (self.path, self.index_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.custody_log.clear()
+    
+    def paths(self):
+        return [self.path, self.index_path, self.custody_log.path]
+    
+    def _position_index(self, view):
+        if self._positions_generation != view.generation or self._positions.count > len(view):
+            self._positions = PositionIndex()
+            self._positions_generation = view.generation
+        for position in range(self._positions.count, len(view)):
+            self._positions.add(position, view.record(position))
+        return self._positions
+    
+    def _lookup(self, table, key):
+        """Decode the entry at the position a PositionIndex table holds for key, or None"""
+        with self._lock:
+            view = self._view()
+            position = getattr(self._position_index(view), table).get(key)
+            return None if position is None else view.record(position)
+    
+    def chain_head(self, chain_id=None):
+        entry = self._lookup("latest_by_chain", chain_id)
+        return entry.get("hash", "") if entry else ""
+    
+    def chain_entries(self, chain_id):
+        with self._lock:
+            view = self._view()
+            return [view.record(position) for position in self._position_index(view).by_chain.get(chain_id, ())]
+    
+    def chain_heads(self):
+        with self._lock:
+            view = self._view()
+            index = self._position_index(view)
+            return {
+                chain_id: {"hash": view.record(positions[-1]).get("hash", ""), "count": len(positions)}
+                for chain_id, positions in index.by_chain.items()
+            }
+    
+    def find_entry(self, file_name, camera_id):
+        return self._lookup("latest_by_file_camera", (file_name, camera_id))
+    
+    def find_entry_by_filename(self, file_name):
+        return self._lookup("latest_by_file", file_name)
+    
+    def find_entry_by_uuid(self, evidence_uuid):
+        return self._lookup("first_by_uuid", EvidenceEntry.compact("evidence_uuid", evidence_uuid))
+    
+    def find_original_entry(self, file_name):
+        return self._lookup("original_by_file", file_name)
+    
+    def query(self, camera_id=None, event_type=None, start=None, end=None):
+        with self._lock:
+            view = self._view()
+            positions = self._position_index(view).by_time.positions(camera_id, start, end)
+            view.acquire()
+        try:
+            for position in positions:
+                entry = view.record(position)
+                if event_type is None or entry.get("event_type") == event_type:
+                    yield entry
+        finally:
+            view.release()
+    
+    def append_custody(self, events):
+        self.custody_log.append(events)
+    
+    def custody(self, evidence_uuid):
+        return self.custody_log.events_for(evidence_uuid)
+    
+    def all_custody(self):
+        return self.custody_log.all_events()
+    
+    def import_custody(self, events):
+        self.custody_log.replace(events)
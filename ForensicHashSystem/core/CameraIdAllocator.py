@@ -0,0 +1,118 @@
+"""
+Camera ID Allocator - Block Reservation of Camera IDs
+Reserves camera IDs from the shared counter file in blocks, under an
+exclusive file lock, so concurrent threads and processes never hand out the
+same ID. The counter is persisted atomically (temp file, fsync, rename) and
+records the end of the last reserved block, so a crash can only leave gaps.
+Allocations inside a reserved block are in-memory increments. Resets bump a
+generation number kept beside the counter, which fences off blocks reserved
+before the reset.
+"""
+
+import json
+import os
+import threading
+from core.LogStorage import FileLock, LogStorage
+
+
+class CameraIdAllocator:
+    """
+    Hands out sequential camera numbers from blocks reserved in the counter file
+    """
+    
+    def __init__(self, path, block_size=16, start=1000):
+        self.path = path
+        self.block_size = max(1, block_size)
+        self.start = start
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._generation = 0
+        self._signature = None
+    
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _read_state(self):
+        """(counter, generation): last number handed out or reserved by any process, and resets so far"""
+        if not os.path.exists(self.path):
+            return self.start, 0
+        with open(self.path, "r") as f:
+            state = json.load(f)
+        return state.get("counter", self.start), state.get("generation", 0)
+    
+    def _write_state(self, counter, generation):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"counter": counter, "generation": generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        LogStorage.fsync_path(self.path)
+    
+    def _reserve(self):
+        with FileLock(self.path):
+            counter, generation = self._read_state()
+            self._write_state(counter + self.block_size, generation)
+            self._signature = self._file_signature()
+        self._next = counter + 1
+        self._end = counter + self.block_size
+        self._generation = generation
+    
+    def _block_is_current(self):
+        """
+        Whether the held block predates no reset. The counter file is only re-read
+        when it changed since this process last looked, so most checks are one stat
+        """
+        signature = self._file_signature()
+        if signature != self._signature:
+            self._signature = signature
+            try:
+                generation = self._read_state()[1]
+            except (OSError, ValueError):
+                # Caught mid-replace by another process; assume a reset to be safe
+                generation = None
+            if generation != self._generation:
+                return False
+        return True
+    
+    def allocate(self):
+        """Return the next camera number, reserving a new block when the current one is used up or fenced off by a reset"""
+        with self._lock:
+            if self._next == 0 or self._next > self._end or not self._block_is_current():
+                self._reserve()
+            number = self._next
+            self._next += 1
+            return number
+    
+    def release(self):
+        """
+        Give back the unused rest of the current block, if no other process
+        reserved a block after it and numbering was not reset since, so a clean
+        shutdown leaves no gap
+        """
+        with self._lock:
+            if self._next == 0 or self._next > self._end:
+                return
+            with FileLock(self.path):
+                if self._read_state() == (self._end, self._generation):
+                    self._write_state(self._next - 1, self._generation)
+            self._next = self._end = 0
+    
+    def reset(self):
+        """
+        Start numbering over. The counter file keeps a generation number that
+        the reset bumps, so blocks other processes still hold are dropped the
+        next time they allocate instead of handing out numbers from the old run
+        """
+        with self._lock:
+            with FileLock(self.path):
+                generation = self._read_state()[1] + 1
+                self._write_state(self.start, generation)
+                self._signature = self._file_signature()
+            self._next = self._end = 0
+            self._generation = generation
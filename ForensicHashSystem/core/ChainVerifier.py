@@ -0,0 +1,228 @@
+"""
+Chain Verifier - Evidence Log Hash Chain Verification
+Checks that every entry's previous_hash matches the hash of the entry before it
+in its chain: the global chain, or its camera's chain when per-camera chains are on.
+Progress is persisted as a verified-up-to checkpoint (position + hash) with
+running statistics, so routine checks only examine links added since the last
+run. A full re-verification from the first entry is available on demand.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+class ChainVerifier:
+    """
+    Incremental, checkpointed hash chain verification for EvidenceLog storage
+    """
+    
+    CHECKPOINT_FILE = "chain_checkpoint.json"
+    
+    _lock = threading.RLock()
+    
+    @staticmethod
+    def _empty_state(log_format):
+        return {
+            "log_format": log_format,
+            "position": 0,
+            "last_hash": "",
+            "heads": {},
+            "create_events": 0,
+            "modify_events": 0,
+            "delete_events": 0,
+            "first_entry": None,
+            "last_entry": None,
+            "broken_links": [],
+            "verified_at": None,
+            "verified_by": None
+        }
+    
+    @classmethod
+    def load_checkpoint(cls, log_format):
+        """Return the stored checkpoint for this log format, or a fresh state"""
+        if os.path.exists(cls.CHECKPOINT_FILE):
+            try:
+                with open(cls.CHECKPOINT_FILE, "r") as f:
+                    state = json.load(f)
+                if state.get("log_format") == log_format and "heads" in state:
+                    return state
+            except Exception as e:
+                print(f"Error loading chain checkpoint: {e}")
+        return cls._empty_state(log_format)
+    
+    @classmethod
+    def save_checkpoint(cls, state):
+        temp_path = cls.CHECKPOINT_FILE + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(state, f, indent=4)
+        os.replace(temp_path, cls.CHECKPOINT_FILE)
+    
+    @classmethod
+    def clear_checkpoint(cls):
+        with cls._lock:
+            if os.path.exists(cls.CHECKPOINT_FILE):
+                os.remove(cls.CHECKPOINT_FILE)
+    
+    @staticmethod
+    def broken_link(position, entry, expected):
+        """Describe a link whose previous_hash does not match the preceding entry (1-based position)"""
+        return {
+            "position": position,
+            "evidence_uuid": entry.get("evidence_uuid", "N/A"),
+            "file_name": entry.get("file_name", "N/A"),
+            "timestamp": entry.get("timestamp", "N/A"),
+            "expected_previous_hash": expected,
+            "previous_hash": entry.get("previous_hash") or ""
+        }
+    
+    @staticmethod
+    def chain_key(entry):
+        """Chain an entry belongs to; the global chain is keyed by an empty string"""
+        return entry.get("chain_id") or ""
+    
+    @classmethod
+    def check_links(cls, entries, start_position, heads, first_links=None):
+        """
+        Check each entry against the head of its chain, numbering the entries from
+        start_position + 1. heads maps chain keys to their last hash and is updated
+        in place. When first_links is given, the first entry of a chain missing from
+        heads is recorded there instead of checked, for the caller to reconcile.
+        Returns the broken links.
+        """
+        broken_links = []
+        for position, entry in enumerate(entries, start_position + 1):
+            key = cls.chain_key(entry)
+            if first_links is not None and key not in heads:
+                first_links[key] = cls.broken_link(position, entry, None)
+            elif (entry.get("previous_hash") or "") != heads.get(key, ""):
+                broken_links.append(cls.broken_link(position, entry, heads.get(key, "")))
+            heads[key] = entry.get("hash") or ""
+        return broken_links
+    
+    @staticmethod
+    def _count_events(state, entries):
+        for entry in entries:
+            event_type = entry.get("event_type")
+            if event_type == "CREATE":
+                state["create_events"] += 1
+            elif event_type == "MODIFY":
+                state["modify_events"] += 1
+            elif event_type == "DELETE":
+                state["delete_events"] += 1
+            if state["first_entry"] is None:
+                state["first_entry"] = entry.get("timestamp")
+            state["last_entry"] = entry.get("timestamp")
+    
+    @classmethod
+    def _check_source(cls, reader, args):
+        """Worker: read one range of the log and check the links inside it"""
+        entries = reader(*args)
+        summary = cls._empty_state(None)
+        if entries:
+            # The link into the range of each chain is left for the parent to reconcile
+            summary["first_links"] = {}
+            summary["broken_links"] = cls.check_links(entries, 0, summary["heads"], summary["first_links"])
+            summary["last_hash"] = entries[-1].get("hash") or ""
+            summary["position"] = len(entries)
+            cls._count_events(summary, entries)
+        return summary
+    
+    @classmethod
+    def verify_ranges(cls, sources, log_format, workers=None):
+        """
+        Full verification with each range of the log read and checked by a worker process.
+        sources are (reader, args) pairs from LogStorage.chain_ranges, in chain order.
+        Range boundaries are reconciled here, so the result matches a serial pass.
+        """
+        state = cls._empty_state(log_format)
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            summaries = pool.map(cls._check_source, [reader for reader, _ in sources], [args for _, args in sources])
+            for summary in summaries:
+                if not summary["position"]:
+                    continue
+                broken_links = summary["broken_links"]
+                for key, link in summary["first_links"].items():
+                    expected = state["heads"].get(key, "")
+                    if link["previous_hash"] != expected:
+                        broken_links.append({**link, "expected_previous_hash": expected})
+                broken_links.sort(key=lambda link: link["position"])
+                state["broken_links"].extend(
+                    {**link, "position": state["position"] + link["position"]} for link in broken_links
+                )
+                state["heads"].update(summary["heads"])
+                for key in ("create_events", "modify_events", "delete_events"):
+                    state[key] += summary[key]
+                if state["first_entry"] is None:
+                    state["first_entry"] = summary["first_entry"]
+                state["last_entry"] = summary["last_entry"]
+                state["position"] += summary["position"]
+                state["last_hash"] = summary["last_hash"]
+        return state
+    
+    @classmethod
+    def verify(cls, storage, log_format, full=False, parallel=False, workers=None):
+        """
+        Bring the checkpoint up to date and return it.
+        Only links after the checkpoint are checked unless full=True, or the
+        checkpointed entry is no longer where it was (log replaced or truncated).
+        parallel=True reads and checks ranges of the log on a process pool whenever
+        the whole chain has to be walked and the storage engine can be split.
+        state["verified_by"] records how the last walk from the first entry was made.
+        """
+        with cls._lock:
+            state = cls._empty_state(log_format) if full else cls.load_checkpoint(log_format)
+            
+            if parallel and state["position"] == 0:
+                workers = workers or os.cpu_count() or 1
+                sources = storage.chain_ranges(workers * 4)
+                if sources is not None:
+                    state = cls.verify_ranges(sources, log_format, workers)
+                    state["verified_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+                    state["verified_by"] = f"parallel ({workers} workers, {len(sources)} ranges)"
+                    cls.save_checkpoint(state)
+                    return state
+            
+            if state["position"] > 0:
+                # Re-read the checkpointed entry to make sure the history it covers is still in place
+                entries = storage.entries_since(state["position"] - 1)
+                if not entries or (entries[0].get("hash") or "") != state["last_hash"]:
+                    print("[CHAIN] Checkpoint no longer matches the log; re-verifying from the start")
+                    state = cls._empty_state(log_format)
+                    entries = storage.entries_since(0)
+                else:
+                    entries = entries[1:]
+            else:
+                entries = storage.entries_since(0)
+            
+            if entries or state["verified_at"] is None:
+                if state["position"] == 0:
+                    state["verified_by"] = "serial" if not parallel else "serial (storage engine cannot be split)"
+                state["broken_links"].extend(cls.check_links(entries, state["position"], state["heads"]))
+                cls._count_events(state, entries)
+                state["position"] += len(entries)
+                if entries:
+                    state["last_hash"] = entries[-1].get("hash") or ""
+                state["verified_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+                cls.save_checkpoint(state)
+            return state
+    
+    @classmethod
+    def verify_chain(cls, entries):
+        """
+        Check a single per-camera chain on its own, given only its entries.
+        Positions in the returned broken links count entries within that chain.
+        """
+        return cls.check_links(entries, 0, {})
+    
+    @staticmethod
+    def result(state):
+        """Turn a checkpoint into (valid, message, broken_links)"""
+        broken_links = state["broken_links"]
+        if not state["position"]:
+            return True, "Evidence log is empty", []
+        if broken_links:
+            return False, f"Hash chain broken at {len(broken_links)} link(s); first break at entry {broken_links[0]['position']}", broken_links
+        return True, f"Hash chain intact ({state['position']} entries verified)", []
@@ -1,8 +1,11 @@
 """
 System Configuration Manager
 Manages CCTV-DF Layer settings and monitored directories
+The parsed file is cached and only re-read when its modification time or
+size changes, so hot paths can call Config.get freely.
 """
 
+import copy
 import json
 import os
 
@@ -18,29 +21,84 @@ class Config:
         "alert_enabled": True,
         "file_extensions": [".mp4", ".avi", ".mkv", ".mov", ".jpg", ".jpeg", ".png"],
         "max_alerts": 1000,
+        "evidence_log_format": "json",
+        "merkle_threshold": 1024 * 1024 * 1024,
+        "merkle_chunk_size": 64 * 1024 * 1024,
+        "merkle_whole_file_sha256": False,
+        "hash_cache_enabled": True,
+        "hash_cache_max_entries": 50000,
+        "hash_cache_flush_seconds": 5.0,
+        "secondary_hash_algorithms": [],
+        "quick_verify_samples": 16,
+        "quick_verify_range_size": 1024 * 1024,
+        "group_commit_enabled": True,
+        "group_commit_window_ms": 5,
+        "group_commit_max_batch": 1000,
+        "segment_max_entries": 10000,
+        "segment_max_bytes": 64 * 1024 * 1024,
+        "segment_max_open": 8,
+        "archive_keep_segments": 2,
+        "archive_codec": "lzma",
+        "archive_block_entries": 256,
+        "chain_mode": "global",
+        "anchor_interval": 100,
+        "camera_id_block_size": 16,
+        "acquisition_workers": 4,
+        "acquisition_queue_size": 1000,
+        "acquisition_pool": "thread",
+        "acquisition_submit_timeout_seconds": 0.5,
+        "acquisition_overflow_size": 10000,
+        "completion_settle_seconds": 1.0,
+        "completion_max_poll_seconds": 30.0,
+        "completion_close_events": "auto",
+        "completion_close_timeout_seconds": 300.0,
+        "log_service": "in_process",
+        "log_service_socket": os.path.join("evidence_log_service", "evidence_log.sock"),
         "system_name": "CCTV-DF Layer v1.0",
         "framework": "NIST SP 800-86"
     }
     
+    # (absolute path, mtime_ns, size, parsed config) of the file last read
+    _cached = None
+    
+    @staticmethod
+    def _file_key(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+    
     @classmethod
-    def load_config(cls):
-        """Load configuration from file"""
-        if not os.path.exists(cls.CONFIG_FILE):
+    def _current(cls):
+        """The parsed configuration, re-read only when the file has changed since it was cached"""
+        key = cls._file_key(cls.CONFIG_FILE)
+        cached = cls._cached
+        if key is not None and cached is not None and cached[:3] == key:
+            return cached[3]
+        
+        if key is None:
             # Create default config
             cls.save_config(cls.DEFAULT_CONFIG)
-            return cls.DEFAULT_CONFIG.copy()
+            return copy.deepcopy(cls.DEFAULT_CONFIG)
         
         try:
             with open(cls.CONFIG_FILE, 'r') as f:
                 config = json.load(f)
                 # Merge with defaults to ensure all keys exist
-                for key, value in cls.DEFAULT_CONFIG.items():
-                    if key not in config:
-                        config[key] = value
-                return config
+                for key_name, value in cls.DEFAULT_CONFIG.items():
+                    if key_name not in config:
+                        config[key_name] = copy.deepcopy(value)
         except Exception as e:
             print(f"Error loading config: {e}")
-            return cls.DEFAULT_CONFIG.copy()
+            return copy.deepcopy(cls.DEFAULT_CONFIG)
+        cls._cached = (*key, config)
+        return config
+    
+    @classmethod
+    def load_config(cls):
+        """Load configuration from file"""
+        return dict(cls._current())
     
     @classmethod
     def save_config(cls, config):
@@ -48,16 +106,18 @@ class Config:
         try:
             with open(cls.CONFIG_FILE, 'w') as f:
                 json.dump(config, f, indent=4)
-            return True
         except Exception as e:
             print(f"Error saving config: {e}")
+            cls._cached = None
             return False
+        key = cls._file_key(cls.CONFIG_FILE)
+        cls._cached = (*key, {**copy.deepcopy(cls.DEFAULT_CONFIG), **config}) if key is not None else None
+        return True
     
     @classmethod
     def get(cls, key, default=None):
         """Get a specific configuration value"""
-        config = cls.load_config()
-        return config.get(key, default)
+        return cls._current().get(key, default)
     
     @classmethod
     def set(cls, key, value):
@@ -69,4 +129,4 @@ class Config:
     @classmethod
     def reset_to_defaults(cls):
         """Reset configuration to defaults"""
-        return cls.save_config(cls.DEFAULT_CONFIG.copy())
+        return cls.save_config(copy.deepcopy(cls.DEFAULT_CONFIG))
@@ -0,0 +1,166 @@
+"""
+Evidence Entry - Compact In-Memory Evidence Record
+Storage engines keep their indexed models of the log as EvidenceEntry objects
+instead of plain dicts: fixed slots instead of a per-entry hash table, SHA-256
+hex digests as 32 raw bytes, the evidence UUID as 16 bytes, timestamps as
+integer seconds and repeated strings (camera IDs, event types) interned.
+Hex strings nested in dicts (secondary digests, sample digests, packed Merkle
+leaves) are held as raw bytes too and hex-encoded again when read.
+Entries read like the dict they were built from and convert back to it exactly,
+so everything outside the storage engines still sees the dict schema.
+"""
+
+import sys
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+
+class PackedHex(bytes):
+    """A nested hex string held as raw bytes; the type marks it for hex-encoding on access"""
+    
+    __slots__ = ()
+
+
+class EvidenceEntry(Mapping):
+    """
+    Read-only, slot-based evidence log entry that round-trips to its dict form
+    """
+    
+    __slots__ = (
+        "_layout", "evidence_uuid", "file_name", "file_size", "camera_id", "event_type", "timestamp",
+        "hash", "previous_hash", "fingerprint", "chain_id", "original_location", "current_location", "extra"
+    )
+    
+    DIGEST_FIELDS = ("hash", "previous_hash", "fingerprint")
+    INTERNED_FIELDS = ("camera_id", "event_type", "chain_id")
+    FIELDS = frozenset(__slots__[1:-1])
+    EPOCH = datetime(1970, 1, 1)
+    
+    # Layouts seen so far, shared by every entry with the same keys:
+    # (key order, {other key: position in extra})
+    _layouts = {}
+    
+    def __init__(self, entry):
+        other_keys = []
+        extra = []
+        for key, value in entry.items():
+            if key in self.FIELDS and (isinstance(value, str) or key == "file_size"):
+                setattr(self, key, self._encode(key, value))
+            else:
+                other_keys.append(key)
+                extra.append(self._compact_value(value))
+        signature = (tuple(entry), tuple(other_keys))
+        layout = self._layouts.get(signature)
+        if layout is None:
+            layout = self._layouts[signature] = (signature[0], {key: i for i, key in enumerate(other_keys)})
+        self._layout = layout
+        self.extra = tuple(extra) if extra else None
+        if isinstance(entry.get("original_location"), str) and entry.get("current_location") == entry["original_location"]:
+            # Usually the file has not moved; keep one copy of the path
+            self.current_location = self.original_location
+    
+    @classmethod
+    def from_dict(cls, entry):
+        return entry if isinstance(entry, cls) else cls(entry)
+    
+    def to_dict(self):
+        """The entry as a new dict, keys in their original order; nested containers are shared unless they hold packed hex"""
+        return {key: self[key] for key in self._layout[0]}
+    
+    @classmethod
+    def _compact_value(cls, value):
+        """Nested dicts (digests, samples, Merkle manifests) repeat the same keys in every entry and hold long hex strings"""
+        if isinstance(value, dict):
+            return {sys.intern(key) if isinstance(key, str) else key: cls._pack_hex(item) for key, item in value.items()}
+        return value
+    
+    @staticmethod
+    def _pack_hex(value):
+        """Raw bytes of a lowercase hex string of at least one digest, or the value itself"""
+        if isinstance(value, str) and len(value) >= 32 and len(value) % 2 == 0 and value == value.lower():
+            try:
+                packed = bytes.fromhex(value)
+            except ValueError:
+                return value
+            # fromhex skips whitespace, so only keep forms that encode back exactly
+            if packed.hex() == value:
+                return PackedHex(packed)
+        return value
+    
+    @staticmethod
+    def _unpack_hex(value):
+        if isinstance(value, dict) and any(isinstance(item, PackedHex) for item in value.values()):
+            return {key: item.hex() if isinstance(item, PackedHex) else item for key, item in value.items()}
+        return value
+    
+    @classmethod
+    def compact(cls, key, value):
+        """A field value in the form it is stored in, e.g. to key an index by it"""
+        return cls._encode(key, value) if isinstance(value, str) else value
+    
+    @classmethod
+    def _encode(cls, key, value):
+        """Compact form of a string field, or the string itself when the compact form would not decode to it exactly"""
+        if key in cls.DIGEST_FIELDS:
+            if len(value) == 64 and value == value.lower():
+                try:
+                    return bytes.fromhex(value)
+                except ValueError:
+                    pass
+        elif key == "timestamp":
+            try:
+                moment = datetime.fromisoformat(value)
+            except ValueError:
+                return value
+            # Wall-clock seconds, independent of the local time zone
+            if moment.tzinfo is None and moment.microsecond == 0:
+                seconds = (moment - cls.EPOCH) // timedelta(seconds=1)
+                if cls._decode(key, seconds) == value:
+                    return seconds
+        elif key == "evidence_uuid":
+            if len(value) == 36 and value == value.lower():
+                try:
+                    compact = bytes.fromhex(value.replace("-", ""))
+                except ValueError:
+                    return value
+                if len(compact) == 16 and cls._decode(key, compact) == value:
+                    return compact
+        elif key in cls.INTERNED_FIELDS:
+            return sys.intern(value)
+        return value
+    
+    @classmethod
+    def _decode(cls, key, value):
+        if key in cls.DIGEST_FIELDS and isinstance(value, bytes):
+            return value.hex()
+        if key == "timestamp" and isinstance(value, int):
+            return (cls.EPOCH + timedelta(seconds=value)).isoformat(" ")
+        if key == "evidence_uuid" and isinstance(value, bytes):
+            digits = value.hex()
+            return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+        return cls._unpack_hex(value)
+    
+    def stored(self, key):
+        """A field as it is held, without decoding it; the same object every time"""
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                # Fields with unusual values are kept as they are, with the other keys
+                pass
+        position = self._layout[1].get(key)
+        if position is None:
+            raise KeyError(key)
+        return self.extra[position]
+    
+    def __getitem__(self, key):
+        return self._decode(key, self.stored(key))
+    
+    def __iter__(self):
+        return iter(self._layout[0])
+    
+    def __len__(self):
+        return len(self._layout[0])
+    
+    def __repr__(self):
+        return f"EvidenceEntry({self.to_dict()!r})"
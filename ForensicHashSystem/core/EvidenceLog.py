@@ -1,64 +1,543 @@
+import atexit
 import json
 import os
+import threading
 import uuid
 import time
+from collections import Counter
+from itertools import islice
+from core.AnchorChain import AnchorChain
+from core.BinaryLogStorage import BinaryStorage
+from core.CameraIdAllocator import CameraIdAllocator
+from core.ChainVerifier import ChainVerifier
+from core.Config import Config
+from core.EvidenceProof import EvidenceProof
+from core.GroupCommit import GroupCommitWriter
+from core.LogService import LogService, LogServiceClient
+from core.LogStorage import FileLock, JsonArrayStorage, JsonLinesFile, JsonLinesStorage
+from core.SegmentedLogStorage import SegmentedStorage
+from core.SqliteLogStorage import SqliteStorage
 
 class EvidenceLog:
     LOG_FILE = "evidence_log.json"
+    JSONL_LOG_FILE = "evidence_log.jsonl"
+    SQLITE_LOG_FILE = "evidence_log.db"
+    SEGMENT_DIR = "evidence_log_segments"
+    BINARY_LOG_FILE = "evidence_log.bin"
+    CUSTODY_LOG_FILE = "custody_log.jsonl"
     CAMERA_COUNTER_FILE = "camera_counter.json"
-
+    # Both halves of a custody migration, kept until they are written, for engines
+    # that cannot replace entries and custody events in one transaction
+    CUSTODY_MIGRATION_FILE = "custody_migration.jsonl"
+    
+    # Custody history is stored per evidence item outside the chained entries
+    # and merged into every entry of that item when it is read
+    CUSTODY_FIELDS = ("access_log", "hash_verification_log")
+    
+    _storages = {}
+    _writers = {}
+    _camera_ids = {}
+    _service = None
+    _unanchored = 0
+    # Guards creating the one storage object, writer and camera ID allocator per file,
+    # and the count of entries written since the last anchor
+    _lock = threading.RLock()
+    
+    @classmethod
+    def storage(cls):
+        """Return the storage engine selected by the evidence_log_format setting"""
+        log_format = Config.get("evidence_log_format", "json")
+        key = (log_format, cls.LOG_FILE, cls.JSONL_LOG_FILE, cls.SQLITE_LOG_FILE, cls.SEGMENT_DIR, cls.BINARY_LOG_FILE)
+        with cls._lock:
+            if key not in cls._storages:
+                if log_format == "json":
+                    storage = JsonArrayStorage(cls.LOG_FILE, cls.CUSTODY_LOG_FILE)
+                else:
+                    if log_format == "jsonl":
+                        storage = JsonLinesStorage(cls.JSONL_LOG_FILE, cls.CUSTODY_LOG_FILE)
+                    elif log_format == "sqlite":
+                        storage = SqliteStorage(cls.SQLITE_LOG_FILE)
+                    elif log_format == "segmented":
+                        storage = SegmentedStorage(
+                            cls.SEGMENT_DIR,
+                            cls.CUSTODY_LOG_FILE,
+                            max_entries=Config.get("segment_max_entries", 10000),
+                            max_bytes=Config.get("segment_max_bytes", 64 * 1024 * 1024),
+                            max_open_segments=Config.get("segment_max_open", 8)
+                        )
+                    elif log_format == "binary":
+                        storage = BinaryStorage(cls.BINARY_LOG_FILE, cls.CUSTODY_LOG_FILE)
+                    else:
+                        raise ValueError(f"Unknown evidence log format: {log_format}")
+                    # First use of a new storage engine carries over the existing history
+                    if not storage.exists() and os.path.exists(cls.LOG_FILE):
+                        cls.migrate_legacy_log(storage)
+                cls._finish_custody_migration(storage, log_format)
+                cls._storages[key] = storage
+        return cls._storages[key]
+    
+    @classmethod
+    def writer(cls):
+        """
+        Return the single writer for the active storage engine: a group-commit writer
+        over the storage, or, when another process serves the log, one that forwards to it
+        """
+        storage = cls.storage()
+        with cls._lock:
+            if id(storage) not in cls._writers:
+                service, client = None, None
+                if Config.get("log_service", "in_process") == "socket":
+                    service, client = cls._claim_log_service()
+                cls._writers[id(storage)] = GroupCommitWriter(
+                    client or storage,
+                    window=Config.get("group_commit_window_ms", 5) / 1000,
+                    max_batch=Config.get("group_commit_max_batch", 1000),
+                    link_chains=client is None,
+                    failover=(lambda entries: cls._take_over_log_service(storage, entries)) if client is not None else None
+                )
+                if service is not None:
+                    cls._start_log_service(service)
+        return cls._writers[id(storage)]
+    
+    @classmethod
+    def _start_log_service(cls, service):
+        cls._service = service
+        service.start()
+        atexit.register(service.stop)
+    
+    @classmethod
+    def _take_over_log_service(cls, storage, entries):
+        """
+        The process serving the log has gone: reconnect to whichever process claims
+        the socket next, serving it from this process if that is the first.
+        Returns (storage, link_chains, entries still to commit) for the writer to retry with.
+        """
+        writer = cls._writers.get(id(storage))
+        if writer is not None and isinstance(writer.storage, LogServiceClient):
+            writer.storage.close()
+        print("[EVIDENCE LOG] Evidence log service connection lost; reconnecting")
+        service, client = cls._claim_log_service()
+        if client is not None:
+            return client, False, cls._uncommitted(storage, entries)
+        if service is not None:
+            cls._start_log_service(service)
+        return storage, True, cls._uncommitted(storage, entries)
+    
+    @classmethod
+    def _uncommitted(cls, storage, entries):
+        """
+        Entries of a forwarded batch that are not in the log yet. The service may
+        have committed the batch before it went; those entries are updated to the
+        committed (relinked) version instead of being written twice.
+        """
+        def key(entry):
+            return entry.get("evidence_uuid"), entry.get("event_type"), entry.get("timestamp"), entry.get("hash")
+        
+        missing = {key(entry): entry for entry in entries}
+        # Only the dead service's last batch can hold them
+        window = len(entries) + Config.get("group_commit_max_batch", 1000)
+        for committed in islice(storage.iter_entries(reverse=True), window):
+            entry = missing.pop(key(committed), None)
+            if entry is not None:
+                entry.update(committed)
+            if not missing:
+                break
+        return [entry for entry in entries if key(entry) in missing]
+    
+    @classmethod
+    def _claim_log_service(cls):
+        """
+        Connect to the process serving the log socket, or bind it if none is.
+        Returns (service, client); exactly one of them is set.
+        """
+        socket_path = Config.get("log_service_socket", os.path.join("evidence_log_service", "evidence_log.sock"))
+        if not LogService.available():
+            print("[EVIDENCE LOG] Unix sockets are not available; writing the log in-process")
+            return None, None
+        LogService.prepare_directory(socket_path)
+        with FileLock(socket_path):
+            client = LogServiceClient.connect(socket_path)
+            if client is not None:
+                print(f"[EVIDENCE LOG] Forwarding evidence log writes to {socket_path}")
+                return None, client
+            service = LogService(socket_path, lambda entries, events: cls._commit(entries, events, wait=False))
+            service.bind()
+            return service, None
+    
+    @classmethod
+    def _commit(cls, entries=(), events=(), wait=True):
+        """
+        Write entries and custody events through the single writer, batched when group commit is enabled.
+        Returns a CommitAck; with wait=True it is already durable.
+        """
+        writer = cls.writer()
+        if Config.get("group_commit_enabled", True):
+            ack = writer.submit(entries, events)
+        else:
+            ack = writer.commit_now(entries, events)
+        if wait:
+            ack.wait()
+        
+        # Camera chain heads are committed to the anchor chain every anchor_interval entries,
+        # by the process that links the chains
+        if entries and writer.link_chains and Config.get("chain_mode", "global") == "per_camera":
+            interval = Config.get("anchor_interval", 100)
+            with cls._lock:
+                cls._unanchored += len(entries)
+                # Only the thread whose entries complete an interval anchors it
+                due = cls._unanchored >= interval
+                if due:
+                    cls._unanchored = 0
+            if due:
+                ack.wait()
+                cls._anchor_chains()
+        return ack
+    
+    @classmethod
+    def flush(cls):
+        """Wait until every write submitted so far is durable"""
+        if id(cls.storage()) in cls._writers:
+            cls.writer().flush()
+    
+    @classmethod
+    def migrate_legacy_log(cls, storage):
+        """
+        Copy the JSON array log into another storage engine.
+        The original file is left untouched; returns the number of entries migrated.
+        """
+        legacy = JsonArrayStorage(cls.LOG_FILE, cls.CUSTODY_LOG_FILE)
+        entries = legacy.load()
+        storage.import_entries(entries)
+        
+        # Engines with their own custody store take over the side log as well
+        if not storage.all_custody():
+            storage.import_custody(cls._flatten_custody(legacy.all_custody()))
+        return len(entries)
+    
+    @classmethod
+    def migrate_to_jsonl(cls):
+        """Copy the JSON array log into the append-only JSONL log"""
+        return cls.migrate_legacy_log(JsonLinesStorage(cls.JSONL_LOG_FILE, cls.CUSTODY_LOG_FILE))
+    
+    @staticmethod
+    def _flatten_custody(custody):
+        """Turn {uuid: {kind: [records]}} back into (uuid, kind, record) events"""
+        return [
+            (evidence_uuid, kind, record)
+            for evidence_uuid, kinds in custody.items()
+            for kind, records in kinds.items()
+            for record in records
+        ]
+    
+    @classmethod
+    def migrate_custody_logs(cls):
+        """
+        Move access and verification lists embedded in chained entries into the
+        custody side log, written once per evidence item, and strip them from
+        the entries. Lists that were copied into later MODIFY/DELETE entries are
+        de-duplicated. Hash chain fields are not touched.
+        Entries and custody events are replaced together: in one transaction
+        where the engine supports it, otherwise through a journal that is
+        replayed if the migration is interrupted. Running it again once done
+        changes nothing. Returns the number of custody events moved.
+        """
+        cls.flush()
+        storage = cls.storage()
+        return cls.writer().snapshot(lambda: cls._migrate_custody(storage))
+    
+    @classmethod
+    def _migrate_custody(cls, storage):
+        entries = storage.load()
+        if not any(field in entry for entry in entries for field in cls.CUSTODY_FIELDS):
+            return 0
+        migrated = {}
+        for entry in entries:
+            evidence_uuid = entry.get("evidence_uuid")
+            if evidence_uuid is None:
+                continue
+            for field in cls.CUSTODY_FIELDS:
+                merged = migrated.setdefault(evidence_uuid, {}).setdefault(field, [])
+                # Keep each record as often as the entry holding it most often
+                seen = Counter(json.dumps(record, sort_keys=True) for record in merged)
+                local = Counter()
+                for record in entry.pop(field, None) or []:
+                    key = json.dumps(record, sort_keys=True)
+                    local[key] += 1
+                    if local[key] > seen[key]:
+                        merged.append(record)
+                        seen[key] += 1
+        
+        for kinds in migrated.values():
+            for records in kinds.values():
+                records.sort(key=lambda record: record.get("timestamp", ""))
+        
+        moved = cls._flatten_custody(migrated)
+        events = moved + cls._flatten_custody(storage.all_custody())
+        if storage.ATOMIC_IMPORT:
+            storage.import_log(entries, events)
+        else:
+            journal = JsonLinesFile(cls.CUSTODY_MIGRATION_FILE)
+            journal.replace_records([
+                {"log_format": Config.get("evidence_log_format", "json")},
+                *({"entry": entry} for entry in entries),
+                *({"event": list(event)} for event in events)
+            ])
+            cls._finish_custody_migration(storage, Config.get("evidence_log_format", "json"))
+        return len(moved)
+    
+    @classmethod
+    def _finish_custody_migration(cls, storage, log_format):
+        """
+        Write out a journalled custody migration of this engine's log. Both
+        replacements are repeatable, so one interrupted part way is completed
+        from the journal the next time the log is opened.
+        """
+        if not os.path.exists(cls.CUSTODY_MIGRATION_FILE):
+            return
+        records = JsonLinesFile(cls.CUSTODY_MIGRATION_FILE).iter_records()
+        if next(records, {}).get("log_format") != log_format:
+            return
+        entries, events = [], []
+        for record in records:
+            if "entry" in record:
+                entries.append(record["entry"])
+            else:
+                events.append(tuple(record["event"]))
+        storage.import_log(entries, events)
+        os.remove(cls.CUSTODY_MIGRATION_FILE)
+    
+    @classmethod
+    def _merge_custody(cls, entry, events):
+        """Merge an item's custody events into one of its entries"""
+        if entry is None:
+            return None
+        for field in cls.CUSTODY_FIELDS:
+            entry[field] = entry.get(field, []) + events.get(field, [])
+        locations = events.get("current_location")
+        if locations:
+            entry["current_location"] = locations[-1]["location"]
+        return entry
+    
+    @classmethod
+    def _with_custody(cls, entry):
+        if entry is None or entry.get("evidence_uuid") is None:
+            return cls._merge_custody(entry, {})
+        return cls._merge_custody(entry, cls.storage().custody(entry["evidence_uuid"]))
+    
     @classmethod
     def load_log(cls):
-        if not os.path.exists(cls.LOG_FILE):
-            return []
-        with open(cls.LOG_FILE, "r") as f:
-            return json.load(f)
-
+        storage = cls.storage()
+        custody, log = cls.writer().snapshot(lambda: (storage.all_custody(), storage.load()))
+        return [cls._merge_custody(entry, custody.get(entry.get("evidence_uuid"), {})) for entry in log]
+    
     @classmethod
-    def save_entry(cls, context, hash_value):
-        log = cls.load_log()
+    def iter_entries(cls, reverse=False):
+        """
+        Yield every entry with its custody merged in, oldest first or with
+        reverse=True newest first, reading the log a record at a time
+        """
+        cls.flush()
+        for entry in cls.storage().iter_entries(reverse=reverse):
+            yield cls._with_custody(entry)
+    
+    @classmethod
+    def export_log_json(cls, output_path):
+        """
+        Write the whole log, custody history included, as a JSON array in the
+        original evidence_log.json layout, whatever storage engine is active.
+        Entries are streamed to the file one at a time.
+        Returns the number of entries written.
+        """
+        count = 0
+        with open(output_path, "w") as f:
+            f.write("[")
+            for entry in cls.iter_entries():
+                # Same layout as json.dump(log, f, indent=4)
+                f.write(",\n    " if count else "\n    ")
+                f.write(json.dumps(entry, indent=4).replace("\n", "\n    "))
+                count += 1
+            f.write("\n]" if count else "]")
+        return count
+    
+    @classmethod
+    def list_segments(cls):
+        """
+        Segments of the log in chain order, each with its entry count and chain hashes.
+        Only the segmented engine has more than one; the last is the active segment.
+        """
+        return cls.storage().segments()
+    
+    @classmethod
+    def load_segment(cls, index):
+        """Load a single segment (index into list_segments, negative counts from the newest)"""
+        storage = cls.storage()
+        custody, entries = cls.writer().snapshot(lambda: (storage.all_custody(), storage.load_segment(index)))
+        return [cls._merge_custody(entry, custody.get(entry.get("evidence_uuid"), {})) for entry in entries]
+    
+    @classmethod
+    def compact_log(cls):
+        """Merge small sealed segments; returns how many segments were eliminated"""
+        cls.flush()
+        return cls.storage().compact()
+    
+    @classmethod
+    def archive_log(cls, keep=None):
+        """
+        Compress sealed segments older than the newest `keep` (archive_keep_segments
+        by default) into archives; returns how many segments were archived
+        """
+        cls.flush()
+        return cls.storage().archive(
+            keep=Config.get("archive_keep_segments", 2) if keep is None else keep,
+            codec=Config.get("archive_codec", "lzma"),
+            block_entries=Config.get("archive_block_entries", 256)
+        )
+    
+    @classmethod
+    def export_evidence_proof(cls, output_path, camera_id=None, evidence_uuids=None):
+        """
+        Export the selected entries with Merkle inclusion proofs against their segment roots.
+        Returns (entries_exported, segments_referenced).
+        """
+        cls.flush()
+        return EvidenceProof.export(cls.storage(), output_path, camera_id=camera_id, evidence_uuids=evidence_uuids)
+    
+    @classmethod
+    def save_entry(cls, context, hash_value, wait=True):
         entry = {**context, "hash": hash_value}
-        log.append(entry)
-
-        with open(cls.LOG_FILE, "w") as f:
-            json.dump(log, f, indent=4)
-
+        return cls._commit(entries=[entry], wait=wait)
+    
     @classmethod
-    def get_last_hash(cls):
-        log = cls.load_log()
-        return log[-1]["hash"] if log else ""
-
+    def save_entries(cls, entries, wait=True):
+        """Append several (context, hash_value) pairs in order with a single write"""
+        return cls._commit(entries=[{**context, "hash": hash_value} for context, hash_value in entries], wait=wait)
+    
     @classmethod
-    def find_entry(cls, file_name, camera_id):
-        log = cls.load_log()
-        for entry in reversed(log):
-            if entry["file_name"] == file_name and entry["camera_id"] == camera_id:
-                return entry
+    def clear_log(cls):
+        """Delete the stored evidence log, including a legacy JSON log that would otherwise be migrated back"""
+        cls.flush()
+        cls.storage().clear()
+        for path in (cls.LOG_FILE, cls.CUSTODY_MIGRATION_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+        ChainVerifier.clear_checkpoint()
+        AnchorChain.clear()
+        if os.path.exists(EvidenceProof.ROOTS_FILE):
+            os.remove(EvidenceProof.ROOTS_FILE)
+    
+    @classmethod
+    def chain_id(cls, camera_id):
+        """Chain a new entry for this camera joins: its own in per_camera mode, otherwise the global chain (None)"""
+        if camera_id and Config.get("chain_mode", "global") == "per_camera":
+            return camera_id
         return None
     
+    @classmethod
+    def get_last_hash(cls, camera_id=None):
+        """Hash the next entry should link to; pass camera_id to get its chain in per_camera mode"""
+        return cls.storage().chain_head(cls.chain_id(camera_id))
+    
+    @classmethod
+    def anchor_chains(cls):
+        """Commit the current head of every camera chain to the anchor chain"""
+        with cls._lock:
+            cls._unanchored = 0
+        return cls._anchor_chains()
+    
+    @classmethod
+    def _anchor_chains(cls):
+        cls.flush()
+        return AnchorChain.commit(cls.storage())
+    
+    @classmethod
+    def verify_camera_chain(cls, camera_id):
+        """
+        Verify one camera's chain and its anchored heads without reading other cameras' entries.
+        Returns (valid, message, broken_links) with positions counted within the camera chain.
+        """
+        cls.flush()
+        storage = cls.storage()
+        entries = storage.chain_entries(camera_id)
+        broken_links = ChainVerifier.verify_chain(entries)
+        anchors_valid, anchor_message, problems = AnchorChain.verify(storage, [camera_id])
+        if broken_links:
+            return False, f"{camera_id} chain broken at {len(broken_links)} link(s)", broken_links
+        if not anchors_valid:
+            return False, f"{camera_id}: {anchor_message}", []
+        return True, f"{camera_id} chain intact ({len(entries)} entries verified)", []
+    
+    @classmethod
+    def verify_anchor_chain(cls):
+        """Verify the anchor chain and every anchored camera chain head"""
+        cls.flush()
+        return AnchorChain.verify(cls.storage())
+    
+    @classmethod
+    def verify_hash_chain(cls, full=False, parallel=False, workers=None):
+        """
+        Verify that each entry's previous_hash matches the hash of the entry before it.
+        Only links added since the last checkpoint are checked unless full=True;
+        parallel=True checks ranges of the log on a process pool.
+        Returns (valid, message, broken_links).
+        """
+        cls.flush()
+        state = ChainVerifier.verify(
+            cls.storage(), Config.get("evidence_log_format", "json"), full=full, parallel=parallel, workers=workers
+        )
+        return ChainVerifier.result(state)
+    
+    @classmethod
+    def get_chain_statistics(cls):
+        """Event counts, first/last entry timestamps and chain status, updated incrementally"""
+        cls.flush()
+        state = ChainVerifier.verify(cls.storage(), Config.get("evidence_log_format", "json"))
+        valid, message, _ = ChainVerifier.result(state)
+        return {
+            "total_entries": state["position"],
+            "create_events": state["create_events"],
+            "modify_events": state["modify_events"],
+            "delete_events": state["delete_events"],
+            "first_entry": state["first_entry"] or "N/A",
+            "last_entry": state["last_entry"] or "N/A",
+            "chain_valid": valid,
+            "chain_message": message,
+            "verified_by": state.get("verified_by") or "N/A"
+        }
+    
+    @classmethod
+    def find_entry(cls, file_name, camera_id):
+        return cls._with_custody(cls.storage().find_entry(file_name, camera_id))
+    
     @classmethod
     def find_entry_by_filename(cls, file_name):
         """Find the most recent entry for a given filename (regardless of camera_id)"""
-        log = cls.load_log()
-        for entry in reversed(log):
-            if entry["file_name"] == file_name:
-                return entry
-        return None
+        return cls._with_custody(cls.storage().find_entry_by_filename(file_name))
+    
+    @classmethod
+    def find_original_entry(cls, file_name):
+        """Find the first CREATE entry for a given filename"""
+        return cls._with_custody(cls.storage().find_original_entry(file_name))
+    
+    @classmethod
+    def camera_id_allocator(cls):
+        """Return the process-wide allocator for the camera counter file"""
+        with cls._lock:
+            if cls.CAMERA_COUNTER_FILE not in cls._camera_ids:
+                allocator = CameraIdAllocator(cls.CAMERA_COUNTER_FILE, block_size=Config.get("camera_id_block_size", 16))
+                # Unused IDs of the last block are returned on a clean exit
+                atexit.register(allocator.release)
+                cls._camera_ids[cls.CAMERA_COUNTER_FILE] = allocator
+        return cls._camera_ids[cls.CAMERA_COUNTER_FILE]
+    
+    @classmethod
+    def reset_camera_ids(cls):
+        """Restart camera numbering, as after clearing the evidence log"""
+        cls.camera_id_allocator().reset()
     
     @classmethod
     def generate_camera_id(cls):
         """Generate auto-incremented camera ID in format CAM-XXXX"""
-        if not os.path.exists(cls.CAMERA_COUNTER_FILE):
-            counter = 1000
-        else:
-            with open(cls.CAMERA_COUNTER_FILE, "r") as f:
-                counter = json.load(f).get("counter", 1000)
-        
-        counter += 1
-        with open(cls.CAMERA_COUNTER_FILE, "w") as f:
-            json.dump({"counter": counter}, f)
-        
-        return f"CAM-{counter:04d}"
+        return f"CAM-{cls.camera_id_allocator().allocate():04d}"
     
     @classmethod
     def generate_evidence_uuid(cls):
@@ -68,56 +547,52 @@ class EvidenceLog:
     @classmethod
     def find_entry_by_uuid(cls, evidence_uuid):
         """Find entry by evidence UUID"""
-        log = cls.load_log()
-        for entry in log:
-            if entry.get("evidence_uuid") == evidence_uuid:
-                return entry
-        return None
+        return cls._with_custody(cls.storage().find_entry_by_uuid(evidence_uuid))
+    
+    @classmethod
+    def query(cls, camera_id=None, event_type=None, start=None, end=None, limit=None, offset=0):
+        """
+        Yield the entries matching every given filter, in timestamp order, with custody merged in.
+        start is inclusive and end exclusive; both take datetimes or "YYYY-MM-DD HH:MM[:SS]" strings.
+        Served from the storage engine's sorted timestamp and per-camera indexes.
+        """
+        start, end = (
+            value.strftime("%Y-%m-%d %H:%M:%S") if hasattr(value, "strftime") else value
+            for value in (start, end)
+        )
+        matches = cls.storage().query(camera_id=camera_id, event_type=event_type, start=start, end=end)
+        stop = offset + limit if limit is not None else None
+        for entry in islice(matches, offset, stop):
+            yield cls._with_custody(entry)
     
     @classmethod
-    def add_access_log_entry(cls, evidence_uuid, user, action):
+    def add_access_log_entry(cls, evidence_uuid, user, action, wait=True):
         """Add an access log entry for an evidence item"""
-        log = cls.load_log()
-        for entry in log:
-            if entry.get("evidence_uuid") == evidence_uuid:
-                if "access_log" not in entry:
-                    entry["access_log"] = []
-                entry["access_log"].append({
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "user": user,
-                    "action": action
-                })
-                break
-        
-        with open(cls.LOG_FILE, "w") as f:
-            json.dump(log, f, indent=4)
-    
-    @classmethod
-    def add_verification_log_entry(cls, evidence_uuid, result, message):
-        """Add a hash verification log entry"""
-        log = cls.load_log()
-        for entry in log:
-            if entry.get("evidence_uuid") == evidence_uuid:
-                if "hash_verification_log" not in entry:
-                    entry["hash_verification_log"] = []
-                entry["hash_verification_log"].append({
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    "result": result,
-                    "message": message
-                })
-                break
-        
-        with open(cls.LOG_FILE, "w") as f:
-            json.dump(log, f, indent=4)
+        return cls.add_access_log_entries([evidence_uuid], user, action, wait=wait)
     
     @classmethod
-    def update_storage_location(cls, evidence_uuid, new_location):
+    def add_access_log_entries(cls, evidence_uuids, user, action, wait=True):
+        """Add the same access log entry to several evidence items with one write"""
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        return cls._commit(events=[
+            (evidence_uuid, "access_log", {"timestamp": timestamp, "user": user, "action": action})
+            for evidence_uuid in evidence_uuids
+        ], wait=wait)
+    
+    @classmethod
+    def add_verification_log_entry(cls, evidence_uuid, result, message, mode="FULL", wait=True):
+        """Add a hash verification log entry, recording the verification mode"""
+        return cls._commit(events=[(evidence_uuid, "hash_verification_log", {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "result": result,
+            "mode": mode,
+            "message": message
+        })], wait=wait)
+    
+    @classmethod
+    def update_storage_location(cls, evidence_uuid, new_location, wait=True):
         """Update current storage location"""
-        log = cls.load_log()
-        for entry in log:
-            if entry.get("evidence_uuid") == evidence_uuid:
-                entry["current_location"] = new_location
-                break
-        
-        with open(cls.LOG_FILE, "w") as f:
-            json.dump(log, f, indent=4)
+        return cls._commit(events=[(evidence_uuid, "current_location", {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "location": new_location
+        })], wait=wait)
@@ -1,10 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from core.EvidenceLog import EvidenceLog
+from core.ForensicHasher import ForensicHasher
 import json
 import os
 
 class EvidenceLogViewer:
+    # Filtered results are fetched from EvidenceLog.query this many at a time
+    PAGE_SIZE = 500
+
     def __init__(self, parent):
         self.window = tk.Toplevel(parent)
         self.window.title("Evidence Log Viewer - Chain of Custody")
@@ -21,6 +25,7 @@ class EvidenceLogViewer:
             font=("Segoe UI", 10, "bold")
         )
 
+        self.filters = {}
         self.build_table()
         self.load_data()
 
@@ -36,6 +41,43 @@ class EvidenceLogViewer:
             style="Danger.TButton"
         ).pack(side="right")
         
+        # Sealed segments are only opened when asked for
+        self.older_button = ttk.Button(
+            button_frame,
+            text="Load Older Entries",
+            command=self.load_more
+        )
+        self.older_button.pack(side="left")
+        
+        # Query filters; empty fields match everything
+        filter_frame = ttk.Frame(self.window)
+        filter_frame.pack(fill="x", padx=10, pady=5)
+        
+        ttk.Label(filter_frame, text="Camera ID:").pack(side="left")
+        self.camera_filter = ttk.Entry(filter_frame, width=12)
+        self.camera_filter.pack(side="left", padx=(2, 10))
+        
+        ttk.Label(filter_frame, text="Event:").pack(side="left")
+        self.event_filter = ttk.Combobox(
+            filter_frame,
+            values=("ALL", "CREATE", "MODIFY", "DELETE"),
+            state="readonly",
+            width=9
+        )
+        self.event_filter.set("ALL")
+        self.event_filter.pack(side="left", padx=(2, 10))
+        
+        ttk.Label(filter_frame, text="From (YYYY-MM-DD HH:MM):").pack(side="left")
+        self.start_filter = ttk.Entry(filter_frame, width=18)
+        self.start_filter.pack(side="left", padx=(2, 10))
+        
+        ttk.Label(filter_frame, text="To:").pack(side="left")
+        self.end_filter = ttk.Entry(filter_frame, width=18)
+        self.end_filter.pack(side="left", padx=(2, 10))
+        
+        ttk.Button(filter_frame, text="Apply Filter", command=self.apply_filter).pack(side="left")
+        ttk.Button(filter_frame, text="Reset", command=self.reset_filter).pack(side="left", padx=5)
+        
         # Main container with scrollbars
         container = ttk.Frame(self.window)
         container.pack(fill="both", expand=True, padx=10, pady=5)
@@ -67,7 +109,7 @@ class EvidenceLogViewer:
         self.tree.heading("event_type", text="Event")
         self.tree.heading("timestamp", text="Timestamp")
         self.tree.heading("file_size", text="Size (bytes)")
-        self.tree.heading("hash", text="SHA-256 Hash")
+        self.tree.heading("hash", text="Evidence Hash")
         self.tree.heading("original_location", text="Original Location")
         self.tree.heading("current_location", text="Current Location")
         self.tree.heading("access_log", text="Access Log")
@@ -110,35 +152,95 @@ class EvidenceLogViewer:
         info_label.pack(pady=(0, 5))
 
     def load_data(self):
-        log_entries = EvidenceLog.load_log()
+        # Start with the newest segment; older ones are loaded on demand
+        self.next_segment = len(EvidenceLog.list_segments()) - 1
+        self.load_older_segment()
+        # A freshly rotated active segment is empty; show the last sealed one instead
+        while not self.tree.get_children() and self.next_segment >= 0:
+            self.load_older_segment()
+
+    def load_more(self):
+        if self.filters:
+            self.load_next_page()
+        else:
+            self.load_older_segment()
+
+    def load_older_segment(self):
+        """Insert the next older log segment above the entries already shown"""
+        if self.next_segment < 0:
+            return
+        log_entries = EvidenceLog.load_segment(self.next_segment)
+        self.next_segment -= 1
+        if self.next_segment < 0:
+            self.older_button.config(state="disabled")
+
+        for position, entry in enumerate(log_entries):
+            self.insert_entry(position, entry)
+
+    def current_filters(self):
+        filters = {
+            "camera_id": self.camera_filter.get().strip() or None,
+            "event_type": None if self.event_filter.get() == "ALL" else self.event_filter.get(),
+            "start": self.start_filter.get().strip() or None,
+            "end": self.end_filter.get().strip() or None
+        }
+        return {key: value for key, value in filters.items() if value is not None}
+
+    def apply_filter(self):
+        """Show only the entries matching the filter fields, in timestamp order"""
+        self.tree.delete(*self.tree.get_children())
+        self.filters = self.current_filters()
+        if not self.filters:
+            self.older_button.config(text="Load Older Entries", state="normal")
+            self.load_data()
+            return
+        self.query_offset = 0
+        self.older_button.config(text="Load More Results", state="normal")
+        self.load_next_page()
+
+    def reset_filter(self):
+        for field in (self.camera_filter, self.start_filter, self.end_filter):
+            field.delete(0, "end")
+        self.event_filter.set("ALL")
+        self.apply_filter()
+
+    def load_next_page(self):
+        """Append the next page of query results below the entries already shown"""
+        log_entries = list(EvidenceLog.query(**self.filters, limit=self.PAGE_SIZE, offset=self.query_offset))
+        self.query_offset += len(log_entries)
+        if len(log_entries) < self.PAGE_SIZE:
+            self.older_button.config(state="disabled")
 
         for entry in log_entries:
-            # Format access log count
-            access_log = entry.get("access_log", [])
-            access_log_text = f"{len(access_log)} entries" if access_log else "None"
-            
-            # Format verification log count
-            verification_log = entry.get("hash_verification_log", [])
-            verification_log_text = f"{len(verification_log)} checks" if verification_log else "None"
-            
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    entry.get("evidence_uuid", "N/A")[:8] + "...",  # Truncated UUID
-                    entry.get("file_name", "N/A"),
-                    entry.get("camera_id", "N/A"),
-                    entry.get("event_type", "N/A"),
-                    entry.get("timestamp", "N/A"),
-                    entry.get("file_size", "N/A"),
-                    entry.get("hash", "N/A")[:20] + "...",  # Truncated hash
-                    self.truncate_path(entry.get("original_location", "N/A")),
-                    self.truncate_path(entry.get("current_location", "N/A")),
-                    access_log_text,
-                    verification_log_text
-                ),
-                tags=(entry.get("evidence_uuid"),)  # Store UUID in tags for reference
-            )
+            self.insert_entry("end", entry)
+
+    def insert_entry(self, position, entry):
+        # Format access log count
+        access_log = entry.get("access_log", [])
+        access_log_text = f"{len(access_log)} entries" if access_log else "None"
+        
+        # Format verification log count
+        verification_log = entry.get("hash_verification_log", [])
+        verification_log_text = f"{len(verification_log)} checks" if verification_log else "None"
+        
+        self.tree.insert(
+            "",
+            position,
+            values=(
+                entry.get("evidence_uuid", "N/A")[:8] + "...",  # Truncated UUID
+                entry.get("file_name", "N/A"),
+                entry.get("camera_id", "N/A"),
+                entry.get("event_type", "N/A"),
+                entry.get("timestamp", "N/A"),
+                entry.get("file_size", "N/A"),
+                entry.get("hash", "N/A")[:20] + "...",  # Truncated hash
+                self.truncate_path(entry.get("original_location", "N/A")),
+                self.truncate_path(entry.get("current_location", "N/A")),
+                access_log_text,
+                verification_log_text
+            ),
+            tags=(entry.get("evidence_uuid"),)  # Store UUID in tags for reference
+        )
     
     def truncate_path(self, path, max_length=30):
         """Truncate long file paths for display"""
@@ -181,6 +283,17 @@ class EvidenceLogViewer:
         text_widget.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
+        # Large files are chained by the Merkle root of their chunks; their whole-file SHA-256 is recorded only when configured
+        merkle = entry.get('merkle')
+        merkle_root = (
+            f"{ForensicHasher.hash_label(entry)}: {entry.get('hash')} ({merkle['leaf_count']} chunks of {merkle['chunk_size']} bytes)\n"
+            if merkle else ""
+        )
+        # Secondary digests recorded alongside SHA-256 at acquisition
+        secondary_hashes = "".join(
+            f"{name.upper()} Hash: {digest}\n" for name, digest in entry.get('digests', {}).items() if name != 'sha256'
+        )
+        
         # Format and display entry details
         details = f"""EVIDENCE CHAIN OF CUSTODY DETAILS
 {'='*80}
@@ -199,8 +312,8 @@ Current Location: {entry.get('current_location', 'N/A')}
 
 HASH INFORMATION:
 {'-'*80}
-SHA-256 Hash: {entry.get('hash', 'N/A')}
-Previous Hash: {entry.get('previous_hash', 'N/A')}
+SHA-256 Hash: {ForensicHasher.file_sha256(entry) or 'N/A'}
+{merkle_root}{secondary_hashes}Previous Hash: {entry.get('previous_hash', 'N/A')}
 
 ACCESS LOG:
 {'-'*80}
@@ -219,7 +332,7 @@ ACCESS LOG:
         if verification_log:
             for idx, log in enumerate(verification_log, 1):
                 result_symbol = "✓" if log.get('result') == "PASSED" else "✗"
-                details += f"  {idx}. [{log.get('timestamp')}] {result_symbol} {log.get('result')} - {log.get('message')}\n"
+                details += f"  {idx}. [{log.get('timestamp')}] {result_symbol} {log.get('result')} ({log.get('mode', 'FULL')}) - {log.get('message')}\n"
         else:
             details += "  No verification log entries\n"
         
@@ -251,17 +364,17 @@ ACCESS LOG:
             return
         
         try:
-            # Delete evidence log file
-            if os.path.exists(EvidenceLog.LOG_FILE):
-                os.remove(EvidenceLog.LOG_FILE)
+            # Delete evidence log
+            EvidenceLog.clear_log()
             
-            # Delete camera counter file
-            if os.path.exists(EvidenceLog.CAMERA_COUNTER_FILE):
-                os.remove(EvidenceLog.CAMERA_COUNTER_FILE)
+            # Reset the camera counter
+            EvidenceLog.reset_camera_ids()
             
             # Clear the tree view
             for item in self.tree.get_children():
                 self.tree.delete(item)
+            self.next_segment = -1
+            self.older_button.config(state="disabled")
             
             messagebox.showinfo(
                 "Success",
@@ -0,0 +1,101 @@
+"""
+Evidence Proof Export - Merkle Inclusion Proofs for Evidence Subsets
+Builds a Merkle tree over the entries of each evidence log segment and exports
+a selection of entries together with their O(log n) inclusion proofs, so a
+recipient can check them against the segment roots without the full log.
+The exports are checked by the standalone verify_evidence_proof.py.
+"""
+
+import json
+import time
+from core.LogStorage import JsonLinesFile, LogStorage
+from core.MerkleTree import MerkleTree
+
+
+class EvidenceProof:
+    """
+    Exports selected evidence entries with inclusion proofs against per-segment Merkle roots
+    """
+    
+    FORMAT = "cctv-df-evidence-proof/1"
+    
+    # Roots computed for segments that are not sealed yet are published here
+    ROOTS_FILE = "merkle_roots.jsonl"
+    
+    @staticmethod
+    def segment_leaves(entries):
+        return [MerkleTree.entry_leaf(entry) for entry in entries]
+    
+    @classmethod
+    def segment_root(cls, entries):
+        return MerkleTree.root(cls.segment_leaves(entries))
+    
+    @classmethod
+    def record_root(cls, segment_name, entry_count, root):
+        """Append a segment root to the root log so later exports can be compared against it"""
+        roots = JsonLinesFile(cls.ROOTS_FILE)
+        for record in roots.iter_records_reversed():
+            if record["segment"] == segment_name:
+                if record["merkle_root"] == root:
+                    return
+                break
+        roots.append_records([{
+            "segment": segment_name,
+            "entry_count": entry_count,
+            "merkle_root": root,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }])
+        LogStorage.fsync_path(cls.ROOTS_FILE)
+    
+    @classmethod
+    def export(cls, storage, output_path, camera_id=None, evidence_uuids=None):
+        """
+        Write the entries of one camera and/or a set of evidence UUIDs with their
+        inclusion proofs. Sealed segments must still match the root recorded when
+        they were sealed. Returns (entries_exported, segments_referenced).
+        """
+        evidence_uuids = set(evidence_uuids) if evidence_uuids else None
+        
+        def selected(entry):
+            if camera_id is not None and entry.get("camera_id") != camera_id:
+                return False
+            return evidence_uuids is None or entry.get("evidence_uuid") in evidence_uuids
+        
+        segments = []
+        items = []
+        for index, segment in enumerate(storage.segments()):
+            entries = storage.load_segment(index)
+            positions = [position for position, entry in enumerate(entries) if selected(entry)]
+            if not positions:
+                continue
+            
+            leaves = cls.segment_leaves(entries)
+            root = MerkleTree.root(leaves)
+            if segment.get("merkle_root") and segment["merkle_root"] != root:
+                raise ValueError(f"{segment['name']} no longer matches the Merkle root recorded when it was sealed")
+            if not segment.get("merkle_root"):
+                cls.record_root(segment["name"], len(entries), root)
+            
+            segments.append({
+                "name": segment["name"],
+                "entry_count": len(entries),
+                "merkle_root": root,
+                "sealed": segment.get("sealed", False)
+            })
+            for position in positions:
+                items.append({
+                    "segment": segment["name"],
+                    "position": position,
+                    "entry": entries[position],
+                    "proof": MerkleTree.proof(leaves, position)
+                })
+        
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "format": cls.FORMAT,
+                "generated": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "camera_id": camera_id,
+                "segments": segments,
+                "entries": items
+            }, f, indent=4, ensure_ascii=False)
+        return len(items), len(segments)
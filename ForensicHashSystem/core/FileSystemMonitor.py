@@ -2,15 +2,27 @@
 File System Monitor - NIST SP 800-86 Collection Phase
 Continuously monitors CCTV storage directories for file creation, modification, and deletion events.
 Implements automated evidence acquisition and forensic logging.
+New files are acquired by an AcquisitionPipeline worker pool, off the event thread,
+once a CompletionDetector has seen them completely written. Modifications and
+deletions are recorded in the evidence log by a change recorder thread, in the
+order they were reported, so the observer thread never waits on the log.
 """
 
+import itertools
 import os
+import queue
 import time
 import threading
+from functools import partial
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from core.AcquisitionPipeline import AcquisitionPipeline, CompletionDetector
+from core.AlertSystem import AlertSeverity, AlertSystem, AlertType
+from core.Config import Config
 from core.EvidenceLog import EvidenceLog
 from core.ForensicHasher import ForensicHasher
+from core.ForensicVerifier import ForensicVerifier
+from core.HashCache import HashCache
 
 
 class CCTVFileHandler(FileSystemEventHandler):
@@ -19,10 +31,37 @@ class CCTVFileHandler(FileSystemEventHandler):
     Implements NIST Collection Phase requirements
     """
     
-    def __init__(self, auto_hash=True, file_extensions=None):
+    def __init__(self, auto_hash=True, file_extensions=None, close_events=True):
+        """close_events: whether the observer reports close-after-write (on_closed) events"""
         self.auto_hash = auto_hash
         self.file_extensions = file_extensions or ['.mp4', '.avi', '.mkv', '.mov', '.jpg', '.jpeg', '.png']
-        self.processing_files = set()
+        self.pipeline = AcquisitionPipeline(
+            partial(ForensicHasher.hash_for_pool, algorithms=ForensicHasher.secondary_algorithms()),
+            self.commit_acquisition,
+            prepare=self.prepare_acquisition,
+            workers=Config.get("acquisition_workers", 4),
+            queue_size=Config.get("acquisition_queue_size", 1000),
+            pool=Config.get("acquisition_pool", "thread"),
+            submit_timeout=Config.get("acquisition_submit_timeout_seconds", 0.5),
+            overflow_size=Config.get("acquisition_overflow_size", 10000),
+            on_overflow=self.acquisition_overflow
+        )
+        self.pipeline.start()
+        self.completion = CompletionDetector(
+            self.pipeline.submit,
+            settle=Config.get("completion_settle_seconds", 1.0),
+            max_interval=Config.get("completion_max_poll_seconds", 30.0),
+            close_events=close_events,
+            close_timeout=Config.get("completion_close_timeout_seconds", 300.0)
+        )
+        self._changes = queue.Queue()
+        # path -> (kind, sequence) of the newest change still queued for it; a
+        # repeat of the same kind is folded into it instead of queued again
+        self._latest_changes = {}
+        self._change_sequence = itertools.count()
+        self._changes_lock = threading.Lock()
+        self._change_thread = threading.Thread(target=self._record_changes, name="ChangeRecorder", daemon=True)
+        self._change_thread.start()
     
     def is_valid_file(self, file_path):
         """Check if file should be monitored based on extension"""
@@ -30,50 +69,118 @@ class CCTVFileHandler(FileSystemEventHandler):
         return ext in self.file_extensions
     
     def on_created(self, event):
-        """Handle file creation events - NIST Collection Phase"""
+        """Handle file creation events - NIST Collection Phase; the file is queued for acquisition"""
         if event.is_directory:
             return
         
         if not self.is_valid_file(event.src_path):
             return
         
-        # Wait for file to be completely written
-        time.sleep(1)
-        
-        if event.src_path in self.processing_files:
+        if self.auto_hash:
+            self.completion.watch(event.src_path)
+    
+    def on_closed(self, event):
+        """Handle close-after-write events, where the observer reports them: the file is complete"""
+        if event.is_directory:
             return
         
-        self.processing_files.add(event.src_path)
-        
-        try:
-            # Automatically acquire evidence
-            if self.auto_hash and os.path.exists(event.src_path):
-                print(f"[COLLECTION] New file detected: {os.path.basename(event.src_path)}")
-                hash_value, context, camera_id = ForensicHasher.generate_hash(event.src_path)
-                EvidenceLog.save_entry(context, hash_value)
-                print(f"[COLLECTION] Evidence acquired: {camera_id}")
-                
-                # Log access event
-                EvidenceLog.add_access_log_entry(
-                    context['evidence_uuid'],
-                    "System",
-                    "Automatic acquisition - File created"
-                )
-        except Exception as e:
-            print(f"[ERROR] Failed to process file: {e}")
-        finally:
-            self.processing_files.discard(event.src_path)
+        if self.is_valid_file(event.src_path):
+            self.completion.closed(event.src_path)
+    
+    def acquisition_overflow(self, file_path):
+        """The acquisition backlog is full and a completed file was turned away"""
+        AlertSystem.create_alert(
+            AlertType.ACQUISITION_INCOMPLETE,
+            AlertSeverity.CRITICAL,
+            f"Not acquired, acquisition backlog is full: {os.path.basename(file_path)}",
+            details={"path": file_path}
+        )
+    
+    def prepare_acquisition(self, file_path):
+        """Pipeline worker: skip files removed since they were completely written"""
+        if not os.path.exists(file_path):
+            return False
+        print(f"[COLLECTION] New file detected: {os.path.basename(file_path)}")
+        return True
+    
+    def commit_acquisition(self, file_path, hashed):
+        """Pipeline worker: log the evidence entry for a hashed file - NIST Collection Phase"""
+        stat_before, hash_value, merkle, digests, _ = hashed
+        if Config.get("hash_cache_enabled", True):
+            HashCache.store(file_path, stat_before, hash_value, merkle, digests)
+        hash_value, context, camera_id = ForensicHasher.generate_hash(file_path, hashed=hashed)
+        # Queued for the same group commit as the access event, which is awaited below
+        EvidenceLog.save_entry(context, hash_value, wait=False)
+        
+        # Log access event
+        EvidenceLog.add_access_log_entry(
+            context['evidence_uuid'],
+            "System",
+            "Automatic acquisition - File created"
+        )
+        print(f"[COLLECTION] Evidence acquired: {camera_id}")
     
     def on_modified(self, event):
-        """Handle file modification events"""
+        """Handle file modification events; recorded in the log by the change recorder"""
+        if event.is_directory:
+            return
+        
+        if not self.is_valid_file(event.src_path):
+            return
+        
+        self.completion.touch(event.src_path)
+        self.queue_change("modified", event.src_path)
+    
+    def on_deleted(self, event):
+        """Handle file deletion events; recorded in the log by the change recorder"""
         if event.is_directory:
             return
         
         if not self.is_valid_file(event.src_path):
             return
         
+        self.completion.forget(event.src_path)
+        self.queue_change("deleted", event.src_path)
+    
+    def queue_change(self, kind, file_path):
+        """Hand a modification or deletion to the change recorder thread"""
+        with self._changes_lock:
+            latest = self._latest_changes.get(file_path)
+            if latest is not None and latest[0] == kind:
+                return
+            sequence = next(self._change_sequence)
+            self._latest_changes[file_path] = (kind, sequence)
+        self._changes.put((kind, file_path, sequence))
+    
+    def _record_changes(self):
+        while True:
+            item = self._changes.get()
+            if item is None:
+                return
+            kind, file_path, sequence = item
+            with self._changes_lock:
+                if self._latest_changes.get(file_path, (None, None))[1] == sequence:
+                    del self._latest_changes[file_path]
+            try:
+                if kind == "modified":
+                    self.record_modification(file_path)
+                else:
+                    self.record_deletion(file_path)
+            except Exception as e:
+                print(f"[ERROR] Failed to record {kind} file {file_path}: {e}")
+    
+    def stop_recording_changes(self):
+        """Record the changes already reported, then stop the change recorder"""
+        self._changes.put(None)
+        self._change_thread.join()
+    
+    def record_modification(self, file_path):
+        """Change recorder: log a modification of a logged evidence file"""
+        # Any cached content hash for this file is now stale
+        HashCache.invalidate(file_path)
+        
         # Log modification detection
-        file_name = os.path.basename(event.src_path)
+        file_name = os.path.basename(file_path)
         existing = EvidenceLog.find_entry_by_filename(file_name)
         
         if existing:
@@ -85,15 +192,11 @@ class CCTVFileHandler(FileSystemEventHandler):
                 "File modification detected"
             )
     
-    def on_deleted(self, event):
-        """Handle file deletion events - Track deletion"""
-        if event.is_directory:
-            return
-        
-        if not self.is_valid_file(event.src_path):
-            return
+    def record_deletion(self, file_path):
+        """Change recorder: log the deletion of a logged evidence file - Track deletion"""
+        HashCache.invalidate(file_path)
         
-        file_name = os.path.basename(event.src_path)
+        file_name = os.path.basename(file_path)
         existing = EvidenceLog.find_entry_by_filename(file_name)
         
         if existing:
@@ -107,15 +210,17 @@ class CCTVFileHandler(FileSystemEventHandler):
                 "evidence_uuid": existing['evidence_uuid'],
                 "camera_id": existing['camera_id'],
                 "file_size": existing.get('file_size', 0),
-                "previous_hash": EvidenceLog.get_last_hash(),
+                "previous_hash": EvidenceLog.get_last_hash(existing['camera_id']),
+                "fingerprint": existing.get('fingerprint'),
                 "original_location": existing.get('original_location', ''),
-                "current_location": "DELETED",
-                "access_log": existing.get('access_log', []),
-                "hash_verification_log": existing.get('hash_verification_log', [])
+                "current_location": "DELETED"
             }
+            chain_id = EvidenceLog.chain_id(existing['camera_id'])
+            if chain_id is not None:
+                deletion_context["chain_id"] = chain_id
             
             # Save deletion event
-            EvidenceLog.save_entry(deletion_context, existing['hash'])
+            EvidenceLog.save_entry(deletion_context, existing['hash'], wait=False)
             
             # Log access
             EvidenceLog.add_access_log_entry(
@@ -123,6 +228,10 @@ class CCTVFileHandler(FileSystemEventHandler):
                 "System",
                 "File deletion detected"
             )
+    
+    def stats(self):
+        """Changes reported but not yet recorded"""
+        return {"changes_pending": self._changes.qsize()}
 
 
 class FileSystemMonitor:
@@ -137,6 +246,13 @@ class FileSystemMonitor:
         self.observer = None
         self.event_handler = None
         self.is_monitoring = False
+        # Files that were still being written when monitoring stopped
+        self.unacquired = []
+    
+    @staticmethod
+    def observer_reports_closes():
+        """watchdog's inotify observer (Linux) reports close-after-write; the other backends do not"""
+        return Observer.__name__ == "InotifyObserver"
     
     def start_monitoring(self, watch_directory=None):
         """Start monitoring the specified directory"""
@@ -146,7 +262,10 @@ class FileSystemMonitor:
         if not self.watch_directory or not os.path.exists(self.watch_directory):
             raise ValueError(f"Invalid watch directory: {self.watch_directory}")
         
-        self.event_handler = CCTVFileHandler(auto_hash=self.auto_hash)
+        close_events = Config.get("completion_close_events", "auto")
+        if close_events == "auto":
+            close_events = self.observer_reports_closes()
+        self.event_handler = CCTVFileHandler(auto_hash=self.auto_hash, close_events=close_events)
         self.observer = Observer()
         self.observer.schedule(self.event_handler, self.watch_directory, recursive=False)
         self.observer.start()
@@ -156,17 +275,52 @@ class FileSystemMonitor:
         print(f"[MONITOR] Auto-hash enabled: {self.auto_hash}")
     
     def stop_monitoring(self):
-        """Stop monitoring"""
+        """Stop monitoring, finishing the acquisition of files already queued"""
         if self.observer:
             self.observer.stop()
             self.observer.join()
+            self.event_handler.stop_recording_changes()
+            unfinished = self.event_handler.completion.stop()
+            self.event_handler.pipeline.stop()
+            self.unacquired.extend(unfinished)
+            for path in unfinished:
+                AlertSystem.create_alert(
+                    AlertType.ACQUISITION_INCOMPLETE,
+                    AlertSeverity.WARNING,
+                    f"Not acquired, file was still being written when monitoring stopped: {os.path.basename(path)}",
+                    details={"path": path}
+                )
             self.is_monitoring = False
             print("[MONITOR] Monitoring stopped")
     
+    def verify_directory(self, force=False):
+        """
+        Verify every logged evidence file in the watch directory.
+        As a bulk sweep, files whose metadata is unchanged since they were last
+        hashed are answered from the hash cache (logged as CACHED) unless force is set.
+        """
+        if not self.watch_directory or not os.path.exists(self.watch_directory):
+            raise ValueError(f"Invalid watch directory: {self.watch_directory}")
+        
+        results = []
+        for file_path in ForensicHasher.collect_files(self.watch_directory):
+            if EvidenceLog.find_entry_by_filename(os.path.basename(file_path)) is None:
+                continue
+            is_valid, message, evidence_uuid = ForensicVerifier.verify(file_path, force=force)
+            results.append((file_path, is_valid, message, evidence_uuid))
+        
+        failed = sum(1 for result in results if not result[1])
+        print(f"[MONITOR] Verified {len(results)} file(s), {failed} failed")
+        return results
+    
     def get_status(self):
         """Get monitoring status"""
         return {
             "is_monitoring": self.is_monitoring,
             "watch_directory": self.watch_directory,
-            "auto_hash": self.auto_hash
+            "auto_hash": self.auto_hash,
+            "acquisition": self.event_handler.pipeline.stats() if self.event_handler else None,
+            "write_completion": self.event_handler.completion.stats() if self.event_handler else None,
+            "change_recording": self.event_handler.stats() if self.event_handler else None,
+            "unacquired": list(self.unacquired)
         }
@@ -262,7 +262,8 @@ class ForensicDashboard:
     
     def verify_chain(self):
         """Verify hash chain integrity"""
-        valid, message, broken_links = EvidenceLog.verify_hash_chain()
+        valid, message, broken_links = EvidenceLog.verify_hash_chain(full=True)
+        message = f"{message}\nVerified: {EvidenceLog.get_chain_statistics()['verified_by']}"
         
         if valid:
             self.chain_result_label.config(text=f"✓ {message}", foreground="green")
@@ -321,7 +322,9 @@ class ForensicDashboard:
         
         # Monitoring status
         if self.monitor.is_monitoring:
-            self.monitoring_status_label.config(text="ON", foreground="green")
+            acquisition = self.monitor.get_status()['acquisition']
+            queued = acquisition['queue_depth'] + acquisition['in_progress']
+            self.monitoring_status_label.config(text=f"ON ({queued} pending)" if queued else "ON", foreground="green")
         else:
             self.monitoring_status_label.config(text="OFF", foreground="red")
         
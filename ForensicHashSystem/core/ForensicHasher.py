@@ -1,15 +1,282 @@
+import bisect
 import hashlib
 import json
+import random
+import secrets
+import threading
 import time
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from core.EvidenceLog import EvidenceLog
+from core.Config import Config
+from core.MerkleTree import MerkleTree
+from core.HashCache import HashCache
 
 class ForensicHasher:
 
+    # Content is streamed through the digest in fixed-size chunks read into a
+    # single reused buffer, so multi-GB recordings hash with constant memory
+    CHUNK_SIZE = 8 * 1024 * 1024
+
     @staticmethod
-    def generate_hash(file_path, camera_id=None):
-        file_name = os.path.basename(file_path)
+    def fingerprint(file_name, file_size):
+        """Cheap name+size fingerprint, used as a pre-check before reading content"""
+        return hashlib.sha256(f"{file_name}{file_size}".encode()).hexdigest()
+
+    @staticmethod
+    def hash_file(file_path, chunk_size=None):
+        """Compute the SHA-256 of the file content in a single streaming pass"""
+        return ForensicHasher.hash_file_digests(file_path, ["sha256"], chunk_size)["sha256"]
+
+    @staticmethod
+    def hash_file_digests(file_path, algorithms, chunk_size=None, sampler=None):
+        """
+        Compute several hashlib digests of the file content in one read pass.
+        Every hasher is fed from the same reused buffer; returns {name: hexdigest}.
+        A SampleRanges sampler is fed from the same reads.
+        """
+        chunk_size = chunk_size or ForensicHasher.CHUNK_SIZE
+        hashers = [(name, hashlib.new(name)) for name in algorithms]
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        position = 0
+
+        with open(file_path, "rb", buffering=0) as f:
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                data = view[:read]
+                for _, hasher in hashers:
+                    hasher.update(data)
+                if sampler is not None:
+                    sampler.feed(position, data)
+                position += read
+
+        return {name: hasher.hexdigest() for name, hasher in hashers}
+
+    @staticmethod
+    def secondary_algorithms():
+        """Return the configured secondary digest algorithms, normalised for hashlib"""
+        return [name.lower() for name in Config.get("secondary_hash_algorithms", [])]
+
+    @staticmethod
+    def _update_range(hasher, f, offset, length, buffer, sampler=None):
+        """Feed `length` bytes starting at `offset` of an open file into a hasher, and a sampler if given"""
+        view = memoryview(buffer)
+        f.seek(offset)
+        while length > 0:
+            read = f.readinto(view[:min(length, len(buffer))])
+            if not read:
+                break
+            hasher.update(view[:read])
+            if sampler is not None:
+                sampler.feed(offset, view[:read])
+            offset += read
+            length -= read
+
+    @staticmethod
+    def hash_chunk(file_path, index, chunk_size, sampler=None):
+        """Compute the Merkle leaf digest of one fixed-size chunk of a file"""
+        hasher = MerkleTree.leaf_hasher()
+        buffer = bytearray(min(chunk_size, ForensicHasher.CHUNK_SIZE))
+        with open(file_path, "rb", buffering=0) as f:
+            ForensicHasher._update_range(hasher, f, index * chunk_size, chunk_size, buffer, sampler)
+        return hasher.hexdigest()
+
+    @staticmethod
+    def hash_chunks(file_path, chunk_size, indexes, workers=None):
+        """
+        Hash the given chunk indexes in parallel, returning leaves in the same order.
+        hashlib and file reads release the GIL, so a thread pool keeps every
+        core busy without copying chunk data between processes.
+        """
+        indexes = list(indexes)
+        if len(indexes) <= 1:
+            return [ForensicHasher.hash_chunk(file_path, i, chunk_size) for i in indexes]
+
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda i: ForensicHasher.hash_chunk(file_path, i, chunk_size), indexes))
+
+    @staticmethod
+    def hash_file_merkle(file_path, chunk_size=None, workers=None, algorithms=(), sampler=None):
+        """
+        Split the file into fixed-size chunks and return (merkle_manifest, root, digests).
+        Chunks are hashed in parallel, feeding the sampler as they are read.
+        Whole-file digests cannot be split by chunk, so when they are requested
+        one more worker of the same pool streams the file through them while
+        the others hash the leaves; that is a second read of the whole file.
+        """
+        chunk_size = chunk_size or Config.get("merkle_chunk_size", 64 * 1024 * 1024)
         file_size = os.path.getsize(file_path)
+        leaf_count = max(1, -(-file_size // chunk_size))
+
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers + (1 if algorithms else 0)) as pool:
+            whole_file = pool.submit(ForensicHasher.hash_file_digests, file_path, algorithms) if algorithms else None
+            leaves = list(pool.map(lambda i: ForensicHasher.hash_chunk(file_path, i, chunk_size, sampler), range(leaf_count)))
+            digests = whole_file.result() if whole_file else {}
+
+        root = MerkleTree.root(leaves)
+        manifest = {
+            "chunk_size": chunk_size,
+            "leaf_count": leaf_count,
+            "leaves": MerkleTree.pack_leaves(leaves)
+        }
+        return manifest, root, digests
+
+    @staticmethod
+    def sample_offsets(file_size, seed, count, range_size):
+        """
+        Deterministically pick sample range offsets for a file of the given size.
+        The header and trailer are always included; `count` more ranges are
+        drawn from a PRNG seeded with `seed`, so the same ranges are re-checked.
+        """
+        if file_size <= range_size:
+            return [0]
+
+        last = file_size - range_size
+        offsets = {0, last}
+        rng = random.Random(seed)
+        for _ in range(count):
+            offsets.add(rng.randrange(0, last + 1))
+        return sorted(offsets)
+
+    @staticmethod
+    def hash_ranges(file_path, offsets, range_size):
+        """Return the SHA-256 of each `range_size` byte range starting at the given offsets"""
+        buffer = bytearray(min(range_size, ForensicHasher.CHUNK_SIZE))
+        digests = []
+        with open(file_path, "rb", buffering=0) as f:
+            for offset in offsets:
+                hasher = hashlib.sha256()
+                ForensicHasher._update_range(hasher, f, offset, range_size, buffer)
+                digests.append(hasher.hexdigest())
+        return digests
+
+    @staticmethod
+    def digest_algorithms(chunk_size, algorithms):
+        """
+        Whole-file digests to record for a file. A Merkle-hashed file's evidence
+        hash is the root over its chunks; its plain SHA-256 takes a second,
+        serial read of the file, so it is only added when merkle_whole_file_sha256 is set.
+        """
+        if chunk_size and Config.get("merkle_whole_file_sha256", False) and "sha256" not in algorithms:
+            return ["sha256", *algorithms]
+        return list(algorithms)
+
+    @staticmethod
+    def file_sha256(entry):
+        """Whole-file SHA-256 of a log entry; None for Merkle entries acquired without it"""
+        if entry.get("merkle"):
+            return entry.get("digests", {}).get("sha256")
+        return entry.get("hash")
+
+    @staticmethod
+    def hash_label(entry):
+        """Name of what an entry's chained evidence hash is"""
+        return "Merkle Root (SHA-256)" if entry.get("merkle") else "SHA-256 Hash"
+
+    @staticmethod
+    def resolve_chunk_size(file_path):
+        """Return the Merkle chunk size to use for a new acquisition, or 0 for a plain hash"""
+        threshold = Config.get("merkle_threshold", 1024 * 1024 * 1024)
+        if not threshold or os.path.getsize(file_path) < threshold:
+            return 0
+        return Config.get("merkle_chunk_size", 64 * 1024 * 1024)
+
+    @staticmethod
+    def cached_hash(file_path, chunk_size, algorithms=(), samples=False):
+        """
+        The cached (hash_value, merkle_manifest, digests) of a file whose metadata is
+        unchanged since it was hashed, or None. Metadata can be restored after
+        tampering, so a cached hash is only fit for bulk sweeps, not for a
+        conclusive verification. samples adds the cached sample manifest.
+        """
+        if not Config.get("hash_cache_enabled", True):
+            return None
+        return HashCache.lookup(file_path, chunk_size, algorithms, samples)
+
+    @staticmethod
+    def compute_hash(file_path, chunk_size=None, force=False, use_cache=True, algorithms=None):
+        """
+        Compute the evidence hash of a file and return (hash_value, merkle_manifest, digests).
+        chunk_size None picks by the configured threshold, 0 forces a plain
+        SHA-256 and a positive value re-hashes a file as a Merkle tree the way
+        it was acquired. `algorithms` lists secondary digests to compute in the
+        same pass (the configured set when None). Unchanged files are answered
+        from the hash cache unless force is set.
+        """
+        if chunk_size is None:
+            chunk_size = ForensicHasher.resolve_chunk_size(file_path)
+        if algorithms is None:
+            algorithms = ForensicHasher.digest_algorithms(chunk_size, ForensicHasher.secondary_algorithms())
+
+        use_cache = use_cache and Config.get("hash_cache_enabled", True)
+        if use_cache and not force:
+            cached = ForensicHasher.cached_hash(file_path, chunk_size, algorithms)
+            if cached:
+                return cached
+
+        stat_before = os.stat(file_path)
+        hashed = ForensicHasher._hash_content(file_path, chunk_size, algorithms)
+        if use_cache:
+            HashCache.store(file_path, stat_before, *hashed)
+        return hashed
+
+    @staticmethod
+    def _hash_content(file_path, chunk_size, algorithms, sampler=None):
+        """Read the file once for its evidence hash, the given whole-file digests and the sampler"""
+        if chunk_size:
+            merkle, hash_value, digests = ForensicHasher.hash_file_merkle(file_path, chunk_size, algorithms=algorithms, sampler=sampler)
+            return hash_value, merkle, digests
+
+        digests = ForensicHasher.hash_file_digests(file_path, ["sha256", *algorithms], sampler=sampler)
+        hash_value = digests.pop("sha256")
+        if "sha256" in algorithms:
+            digests["sha256"] = hash_value
+        return hash_value, None, digests
+
+    @staticmethod
+    def acquire_hash(file_path, algorithms=None, use_cache=True):
+        """
+        Hash a file for acquisition: returns (stat_before, hash_value, merkle_manifest, digests, samples).
+        The quick-verify sample ranges are hashed from the same read as the
+        content hash. `algorithms` lists secondary digests (the configured set
+        when None); the whole-file SHA-256 of a Merkle-hashed file is added when
+        configured. Unchanged files are answered from the hash cache, samples included.
+        """
+        stat_before = os.stat(file_path)
+        chunk_size = ForensicHasher.resolve_chunk_size(file_path)
+        if algorithms is None:
+            algorithms = ForensicHasher.secondary_algorithms()
+        algorithms = ForensicHasher.digest_algorithms(chunk_size, algorithms)
+
+        use_cache = use_cache and Config.get("hash_cache_enabled", True)
+        if use_cache:
+            cached = ForensicHasher.cached_hash(file_path, chunk_size, algorithms, samples=True)
+            if cached:
+                return (stat_before, *cached)
+
+        sampler = SampleRanges(stat_before.st_size)
+        hash_value, merkle, digests = ForensicHasher._hash_content(file_path, chunk_size, algorithms, sampler)
+        samples = sampler.manifest()
+        if use_cache:
+            HashCache.store(file_path, stat_before, hash_value, merkle, digests, samples=samples)
+        return stat_before, hash_value, merkle, digests, samples
+
+    @staticmethod
+    def generate_hash(file_path, camera_id=None, hashed=None):
+        """
+        Hash a file and build its evidence log context; returns (hash_value, context, camera_id).
+        hashed may carry a hash_for_pool result computed elsewhere, e.g. in a worker process.
+        """
+        file_name = os.path.basename(file_path)
+        if hashed is None:
+            hashed = ForensicHasher.acquire_hash(file_path)
+        stat_before, hash_value, merkle, digests, samples = hashed
+        file_size = stat_before.st_size
         
         # Check if file already exists in evidence log
         existing_entry = None
@@ -26,10 +293,24 @@ class ForensicHasher:
             # If camera_id provided, find entry with that specific ID
             existing_entry = EvidenceLog.find_entry(file_name, camera_id)
 
+        chain_id = EvidenceLog.chain_id(camera_id)
+        previous_hash = EvidenceLog.get_last_hash(camera_id)
+
+        context = ForensicHasher._build_context(file_path, file_size, camera_id, existing_entry, previous_hash, chain_id)
+        if merkle:
+            context["merkle"] = merkle
+        if digests:
+            context["digests"] = digests
+        context["samples"] = samples
+
+        return hash_value, context, camera_id
+
+    @staticmethod
+    def _build_context(file_path, file_size, camera_id, existing_entry, previous_hash, chain_id=None):
+        """Build the evidence log context for a file acquisition; chain_id marks a per-camera chain entry"""
+        file_name = os.path.basename(file_path)
         event_type = "CREATE" if existing_entry is None else "MODIFY"
 
-        previous_hash = EvidenceLog.get_last_hash()
-        
         # Generate evidence UUID for new entries
         evidence_uuid = existing_entry.get("evidence_uuid") if existing_entry else EvidenceLog.generate_evidence_uuid()
         
@@ -44,14 +325,172 @@ class ForensicHasher:
             "event_type": event_type,
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
             "previous_hash": previous_hash,
+            "fingerprint": ForensicHasher.fingerprint(file_name, file_size),
             "original_location": original_location,
-            "current_location": file_path,
-            "access_log": existing_entry.get("access_log", []) if existing_entry else [],
-            "hash_verification_log": existing_entry.get("hash_verification_log", []) if existing_entry else []
+            "current_location": file_path
         }
+        if chain_id is not None:
+            context["chain_id"] = chain_id
+        return context
 
-        # Hash is computed from ONLY filename and size
-        hash_data = f"{file_name}{file_size}".encode()
-        hash_value = hashlib.sha256(hash_data).hexdigest()
+    @staticmethod
+    def hash_for_pool(file_path, algorithms):
+        """Thread or process pool worker: returns (stat_before, hash_value, merkle_manifest, digests, samples) for one file"""
+        return ForensicHasher.acquire_hash(file_path, algorithms, use_cache=False)
 
-        return hash_value, context, camera_id
+    @staticmethod
+    def collect_files(directory, file_extensions=None):
+        """List evidence files directly inside a directory, in a stable order"""
+        file_extensions = file_extensions or Config.get("file_extensions", [])
+        paths = []
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and os.path.splitext(name)[1].lower() in file_extensions:
+                paths.append(path)
+        return paths
+
+    @staticmethod
+    def acquire_batch(paths, workers=None, user="System"):
+        """
+        Hash a directory or a list of files on a process pool and commit all
+        resulting entries to the evidence log in one ordered chain append.
+
+        Entries are chained in the order of `paths` (sorted by name for a
+        directory), independent of which worker finishes first.
+        Returns (results, stats) where results is a list of
+        (hash_value, context, camera_id) and stats reports throughput.
+        """
+        if isinstance(paths, str):
+            paths = ForensicHasher.collect_files(paths)
+        paths = list(paths)
+
+        start = time.perf_counter()
+        if not paths:
+            return [], {"files": 0, "bytes": 0, "seconds": 0.0, "files_per_sec": 0.0, "bytes_per_sec": 0.0}
+
+        # Files unchanged since they were last hashed are answered from the cache
+        use_cache = Config.get("hash_cache_enabled", True)
+        algorithms = ForensicHasher.secondary_algorithms()
+        hashed = {}
+        if use_cache:
+            for file_path in paths:
+                chunk_size = ForensicHasher.resolve_chunk_size(file_path)
+                cached = ForensicHasher.cached_hash(file_path, chunk_size, ForensicHasher.digest_algorithms(chunk_size, algorithms), samples=True)
+                if cached:
+                    hashed[file_path] = (os.path.getsize(file_path), *cached)
+        to_hash = [file_path for file_path in paths if file_path not in hashed]
+
+        if to_hash:
+            workers = workers or os.cpu_count() or 1
+            chunksize = max(1, len(to_hash) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # map() yields in submission order, which keeps the chain deterministic
+                outputs = pool.map(ForensicHasher.hash_for_pool, to_hash, [algorithms] * len(to_hash), chunksize=chunksize)
+                for file_path, (stat_before, hash_value, merkle, digests, samples) in zip(to_hash, outputs):
+                    hashed[file_path] = (stat_before.st_size, hash_value, merkle, digests, samples)
+                    if use_cache:
+                        HashCache.store(file_path, stat_before, hash_value, merkle, digests, samples=samples, persist=False)
+            if use_cache:
+                HashCache.save()
+
+        # One newest-first pass over the log finds the latest entry for every file in the batch,
+        # stopping once all are found; the batch itself is tracked in memory
+        names = {os.path.basename(file_path) for file_path in paths}
+        latest_by_name = {}
+        for entry in EvidenceLog.iter_entries(reverse=True):
+            if entry["file_name"] in names and entry["file_name"] not in latest_by_name:
+                latest_by_name[entry["file_name"]] = entry
+                if len(latest_by_name) == len(names):
+                    break
+        # Head of each chain the batch appends to, keyed by chain_id (None is the global chain)
+        heads = {}
+
+        results = []
+        pending = []
+        total_bytes = 0
+        for file_path in paths:
+            file_size, hash_value, merkle, digests, samples = hashed[file_path]
+            file_name = os.path.basename(file_path)
+            existing_entry = latest_by_name.get(file_name)
+            camera_id = existing_entry["camera_id"] if existing_entry else EvidenceLog.generate_camera_id()
+            chain_id = EvidenceLog.chain_id(camera_id)
+            if chain_id not in heads:
+                heads[chain_id] = EvidenceLog.get_last_hash(camera_id)
+
+            context = ForensicHasher._build_context(file_path, file_size, camera_id, existing_entry, heads[chain_id], chain_id)
+            if merkle:
+                context["merkle"] = merkle
+            if digests:
+                context["digests"] = digests
+            context["samples"] = samples
+
+            pending.append((context, hash_value))
+            results.append((hash_value, context, camera_id))
+            latest_by_name[file_name] = {**context, "hash": hash_value}
+            heads[chain_id] = hash_value
+            total_bytes += file_size
+
+        EvidenceLog.save_entries(pending, wait=False)
+        EvidenceLog.add_access_log_entries(
+            [context["evidence_uuid"] for context, _ in pending],
+            user,
+            "Batch acquisition"
+        )
+
+        elapsed = time.perf_counter() - start
+        stats = {
+            "files": len(results),
+            "bytes": total_bytes,
+            "seconds": elapsed,
+            "files_per_sec": len(results) / elapsed if elapsed else 0.0,
+            "bytes_per_sec": total_bytes / elapsed if elapsed else 0.0
+        }
+        return results, stats
+
+
+class SampleRanges:
+    """
+    The quick-verify sample ranges of one file, hashed from the reads of its
+    content hash instead of a separate pass. Reads may arrive out of order
+    from several chunk workers; a range split across reads is pieced together.
+    """
+
+    def __init__(self, file_size, seed=None):
+        self.file_size = file_size
+        self.range_size = Config.get("quick_verify_range_size", 1024 * 1024)
+        self.seed = secrets.randbits(64) if seed is None else seed
+        self.offsets = ForensicHasher.sample_offsets(file_size, self.seed, Config.get("quick_verify_samples", 16), self.range_size)
+        self._digests = [None] * len(self.offsets)
+        # Range index -> [(file position, bytes)] of ranges read in parts
+        self._pieces = {}
+        self._lock = threading.Lock()
+
+    def feed(self, position, data):
+        """Hash the parts of sample ranges within `data`, read from `position` of the file"""
+        end = position + len(data)
+        for i in range(bisect.bisect_right(self.offsets, position - self.range_size), len(self.offsets)):
+            start = self.offsets[i]
+            if start >= end:
+                break
+            stop = min(start + self.range_size, self.file_size)
+            low, high = max(start, position), min(stop, end)
+            if low >= high:
+                continue
+            piece = data[low - position:high - position]
+            if low == start and high == stop:
+                self._digests[i] = hashlib.sha256(piece).hexdigest()
+            else:
+                with self._lock:
+                    self._pieces.setdefault(i, []).append((low, bytes(piece)))
+
+    def manifest(self):
+        """The samples manifest stored with the entry, once every read has been fed"""
+        for i, pieces in self._pieces.items():
+            self._digests[i] = hashlib.sha256(b"".join(piece for _, piece in sorted(pieces))).hexdigest()
+        empty = hashlib.sha256().hexdigest()
+        return {
+            "seed": self.seed,
+            "range_size": self.range_size,
+            "offsets": self.offsets,
+            "digests": MerkleTree.pack_leaves([digest or empty for digest in self._digests])
+        }
@@ -7,6 +7,7 @@ import csv
 import json
 import time
 from core.EvidenceLog import EvidenceLog
+from core.ForensicHasher import ForensicHasher
 
 
 class ForensicReportGenerator:
@@ -16,19 +17,35 @@ class ForensicReportGenerator:
     """
     
     @staticmethod
-    def generate_csv_report(output_path="forensic_report.csv"):
-        """Generate CSV export of evidence log"""
-        log_entries = EvidenceLog.load_log()
-        
-        if not log_entries:
+    def iter_log_entries(**filters):
+        """
+        Yield every evidence entry, streamed from the log one at a time, or with
+        filters (camera_id, event_type, start, end) only the matching entries
+        """
+        if any(value is not None for value in filters.values()):
+            return EvidenceLog.query(**filters)
+        return EvidenceLog.iter_entries()
+    
+    @staticmethod
+    def generate_csv_report(output_path="forensic_report.csv", camera_id=None, start=None, end=None):
+        """Generate CSV export of evidence log, optionally limited to one camera and/or a time range"""
+        filters = {'camera_id': camera_id, 'start': start, 'end': end}
+        if next(ForensicReportGenerator.iter_log_entries(**filters), None) is None:
             return False, "No evidence entries to export"
         
+        # One column per secondary digest recorded at acquisition; the whole-file
+        # SHA-256 of Merkle-hashed files goes in the SHA-256 column
+        algorithms = sorted({
+            name for entry in ForensicReportGenerator.iter_log_entries(**filters) for name in entry.get('digests', {})
+        } - {'sha256'})
+        
         try:
             with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
                 # Define CSV columns
                 fieldnames = [
                     'Evidence UUID', 'File Name', 'Camera ID', 'Event Type',
-                    'Timestamp', 'File Size (bytes)', 'SHA-256 Hash',
+                    'Timestamp', 'File Size (bytes)', 'SHA-256 Hash', 'Merkle Root',
+                    *[f'{name.upper()} Hash' for name in algorithms],
                     'Previous Hash', 'Original Location', 'Current Location',
                     'Access Log Count', 'Verification Log Count'
                 ]
@@ -36,15 +53,18 @@ class ForensicReportGenerator:
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                 writer.writeheader()
                 
-                for entry in log_entries:
+                for entry in ForensicReportGenerator.iter_log_entries(**filters):
+                    digests = entry.get('digests', {})
                     writer.writerow({
+                        **{f'{name.upper()} Hash': digests.get(name, 'N/A') for name in algorithms},
                         'Evidence UUID': entry.get('evidence_uuid', 'N/A'),
                         'File Name': entry.get('file_name', 'N/A'),
                         'Camera ID': entry.get('camera_id', 'N/A'),
                         'Event Type': entry.get('event_type', 'N/A'),
                         'Timestamp': entry.get('timestamp', 'N/A'),
                         'File Size (bytes)': entry.get('file_size', 'N/A'),
-                        'SHA-256 Hash': entry.get('hash', 'N/A'),
+                        'SHA-256 Hash': ForensicHasher.file_sha256(entry) or 'N/A',
+                        'Merkle Root': entry.get('hash', 'N/A') if entry.get('merkle') else 'N/A',
                         'Previous Hash': entry.get('previous_hash', 'N/A')[:16] + '...' if entry.get('previous_hash') else 'None',
                         'Original Location': entry.get('original_location', 'N/A'),
                         'Current Location': entry.get('current_location', 'N/A'),
@@ -58,12 +78,12 @@ class ForensicReportGenerator:
             return False, f"Failed to generate CSV: {str(e)}"
     
     @staticmethod
-    def generate_text_report(output_path="forensic_report.txt"):
-        """Generate detailed text report"""
-        log_entries = EvidenceLog.load_log()
+    def generate_text_report(output_path="forensic_report.txt", camera_id=None, start=None, end=None):
+        """Generate detailed text report, optionally limited to one camera and/or a time range"""
         stats = EvidenceLog.get_chain_statistics()
+        filters = {'camera_id': camera_id, 'start': start, 'end': end}
         
-        if not log_entries:
+        if next(ForensicReportGenerator.iter_log_entries(**filters), None) is None:
             return False, "No evidence entries to export"
         
         try:
@@ -74,7 +94,10 @@ class ForensicReportGenerator:
                 f.write("="*80 + "\n")
                 f.write(f"Report Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
                 f.write(f"Report Type: Evidence Chain Analysis\n")
-                f.write(f"Framework: NIST SP 800-86\n\n")
+                f.write(f"Framework: NIST SP 800-86\n")
+                if camera_id or start or end:
+                    f.write(f"Scope: Camera {camera_id or 'ALL'}, {start or 'start of log'} to {end or 'end of log'}\n")
+                f.write("\n")
                 
                 # Chain Statistics
                 f.write("EVIDENCE CHAIN STATISTICS\n")
@@ -86,13 +109,14 @@ class ForensicReportGenerator:
                 f.write(f"First Entry: {stats.get('first_entry', 'N/A')}\n")
                 f.write(f"Last Entry: {stats.get('last_entry', 'N/A')}\n")
                 f.write(f"Hash Chain Status: {'VALID' if stats['chain_valid'] else 'BROKEN'}\n")
-                f.write(f"Chain Message: {stats['chain_message']}\n\n")
+                f.write(f"Chain Message: {stats['chain_message']}\n")
+                f.write(f"Last Full Verification: {stats['verified_by']}\n\n")
                 
                 # Evidence Entries
                 f.write("EVIDENCE ENTRIES\n")
                 f.write("="*80 + "\n\n")
                 
-                for idx, entry in enumerate(log_entries, 1):
+                for idx, entry in enumerate(ForensicReportGenerator.iter_log_entries(**filters), 1):
                     f.write(f"Entry #{idx}\n")
                     f.write("-"*80 + "\n")
                     f.write(f"Evidence UUID: {entry.get('evidence_uuid', 'N/A')}\n")
@@ -101,7 +125,12 @@ class ForensicReportGenerator:
                     f.write(f"Event Type: {entry.get('event_type', 'N/A')}\n")
                     f.write(f"Timestamp: {entry.get('timestamp', 'N/A')}\n")
                     f.write(f"File Size: {entry.get('file_size', 'N/A')} bytes\n")
-                    f.write(f"SHA-256 Hash: {entry.get('hash', 'N/A')}\n")
+                    f.write(f"SHA-256 Hash: {ForensicHasher.file_sha256(entry) or 'N/A'}\n")
+                    if entry.get('merkle'):
+                        f.write(f"{ForensicHasher.hash_label(entry)}: {entry.get('hash')} ({entry['merkle']['leaf_count']} chunks of {entry['merkle']['chunk_size']} bytes)\n")
+                    for name, digest in entry.get('digests', {}).items():
+                        if name != 'sha256':
+                            f.write(f"{name.upper()} Hash: {digest}\n")
                     f.write(f"Previous Hash: {entry.get('previous_hash', 'None')}\n")
                     f.write(f"Original Location: {entry.get('original_location', 'N/A')}\n")
                     f.write(f"Current Location: {entry.get('current_location', 'N/A')}\n")
@@ -121,7 +150,7 @@ class ForensicReportGenerator:
                     if verification_log:
                         for log in verification_log:
                             result = "✓" if log.get('result') == 'PASSED' else "✗"
-                            f.write(f"  {result} [{log.get('timestamp')}] {log.get('result')}: {log.get('message')}\n")
+                            f.write(f"  {result} [{log.get('timestamp')}] {log.get('result')} ({log.get('mode', 'FULL')}): {log.get('message')}\n")
                     else:
                         f.write("  No verification log entries\n")
                     
@@ -138,9 +167,23 @@ class ForensicReportGenerator:
             return False, f"Failed to generate text report: {str(e)}"
     
     @staticmethod
-    def generate_chain_verification_report(output_path="chain_verification.txt"):
-        """Generate hash chain verification report"""
-        valid, message, broken_links = EvidenceLog.verify_hash_chain()
+    def generate_evidence_export(output_path="evidence_export.json", camera_id=None, evidence_uuids=None):
+        """Export selected evidence entries with Merkle inclusion proofs (check with verify_evidence_proof.py)"""
+        try:
+            count, segments = EvidenceLog.export_evidence_proof(output_path, camera_id=camera_id, evidence_uuids=evidence_uuids)
+            if not count:
+                return False, "No matching evidence entries to export"
+            return True, f"Evidence export generated: {output_path} ({count} entries, {segments} segment root(s))"
+        
+        except Exception as e:
+            return False, f"Failed to generate evidence export: {str(e)}"
+    
+    @staticmethod
+    def generate_chain_verification_report(output_path="chain_verification.txt", parallel=True):
+        """Generate hash chain verification report from a full audit, spread over all cores by default"""
+        valid, message, broken_links = EvidenceLog.verify_hash_chain(full=True, parallel=parallel)
+        verified_by = EvidenceLog.get_chain_statistics()['verified_by']
+        anchors_valid, anchor_message, anchor_problems = EvidenceLog.verify_anchor_chain()
         
         try:
             with open(output_path, 'w', encoding='utf-8') as f:
@@ -149,7 +192,9 @@ class ForensicReportGenerator:
                 f.write("="*80 + "\n")
                 f.write(f"Verification Time: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
                 f.write(f"Status: {'VALID' if valid else 'BROKEN'}\n")
-                f.write(f"Message: {message}\n\n")
+                f.write(f"Message: {message}\n")
+                f.write(f"Verification Mode: {verified_by}\n")
+                f.write(f"Anchor Chain: {'VALID' if anchors_valid else 'BROKEN'} - {anchor_message}\n\n")
                 
                 if not valid and broken_links:
                     f.write("BROKEN CHAIN LINKS DETECTED\n")
@@ -160,6 +205,23 @@ class ForensicReportGenerator:
                         f.write(f"File Name: {link['file_name']}\n")
                         f.write(f"Timestamp: {link['timestamp']}\n\n")
                 
+                if anchor_problems:
+                    f.write("ANCHOR CHAIN PROBLEMS\n")
+                    f.write("-"*80 + "\n")
+                    for problem in anchor_problems:
+                        f.write(f"Anchor: #{problem['anchor']}\n")
+                        f.write(f"Camera Chain: {problem['chain_id'] or 'N/A'}\n")
+                        f.write(f"Problem: {problem['problem']}\n\n")
+                
+                sealed = [segment for segment in EvidenceLog.list_segments() if segment.get('merkle_root')]
+                if sealed:
+                    f.write("SEALED SEGMENT MERKLE ROOTS\n")
+                    f.write("-"*80 + "\n")
+                    for segment in sealed:
+                        archived = f", archived {segment['archived']['codec']}" if segment.get('archived') else ""
+                        f.write(f"{segment['name']} ({segment['entry_count']} entries{archived}): {segment['merkle_root']}\n")
+                    f.write("\n")
+                
                 f.write("="*80 + "\n")
             
             return True, f"Chain verification report: {output_path}"
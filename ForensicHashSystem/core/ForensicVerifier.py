@@ -1,43 +1,53 @@
-import hashlib
 import json
 import os
 from core.EvidenceLog import EvidenceLog
+from core.ForensicHasher import ForensicHasher
+from core.MerkleTree import MerkleTree
 
 class ForensicVerifier:
 
     @staticmethod
-    def verify(file_path, camera_id=None):
+    def verify(file_path, camera_id=None, force=True):
+        """
+        Full verification of a file against its latest log entry; returns (is_valid, message, evidence_uuid).
+        The content is always re-read unless force is False, which lets bulk
+        sweeps answer files with unchanged metadata from the hash cache; such
+        results are logged with mode "CACHED" rather than "FULL".
+        """
         file_name = os.path.basename(file_path)
         
-        # Load all log entries
-        log = EvidenceLog.load_log()
-        
-        # Try to find entry by camera_id, or search for file_name if camera_id not provided
-        if camera_id:
-            entry = EvidenceLog.find_entry(file_name, camera_id)
-        else:
-            # Search for the most recent entry with this file name
-            entry = None
-            for e in reversed(log):
-                if e.get("file_name") == file_name:
-                    entry = e
-                    break
+        # Try to find entry by camera_id, or the most recent entry with this file name
+        entry = ForensicVerifier._find_entry(file_path, camera_id)
 
         if entry is None:
             return False, "No matching log entry found.", None
 
         # Find the original CREATE entry for comparison
-        original_entry = None
-        for e in log:
-            if e.get("file_name") == file_name and e.get("event_type") == "CREATE":
-                original_entry = e
-                break
+        original_entry = EvidenceLog.find_original_entry(file_name)
 
         file_size = os.path.getsize(file_path)
+        mode = "FULL"
 
-        # Calculate current file hash
-        hash_data = f"{file_name}{file_size}".encode()
-        current_hash = hashlib.sha256(hash_data).hexdigest()
+        # Cheap pre-check: a name or size change is tampering without reading content
+        current_fingerprint = ForensicHasher.fingerprint(file_name, file_size)
+        stored_fingerprint = entry.get("fingerprint")
+
+        if stored_fingerprint is None:
+            # Entries acquired before content hashing stored the fingerprint as their hash
+            current_hash = current_fingerprint
+        elif stored_fingerprint != current_fingerprint:
+            current_hash = None
+        else:
+            # Calculate current file hash; large files are re-hashed chunk-parallel
+            # with the recorded chunk size. The Merkle root covers every byte, so
+            # a whole-file SHA-256 recorded alongside it is not re-computed
+            chunk_size = entry["merkle"]["chunk_size"] if entry.get("merkle") else 0
+            cached = None if force else ForensicHasher.cached_hash(file_path, chunk_size)
+            if cached:
+                current_hash, _, _ = cached
+                mode = "CACHED"
+            else:
+                current_hash, _, _ = ForensicHasher.compute_hash(file_path, chunk_size, force=True, algorithms=[])
         
         evidence_uuid = entry.get("evidence_uuid")
         event_type = entry.get("event_type")
@@ -58,13 +68,17 @@ class ForensicVerifier:
             else:
                 message = "✓ Integrity verified. File is ORIGINAL and unmodified."
                 result = "PASSED"
+            if mode == "CACHED":
+                message += " (Cached hash: file metadata unchanged since it was last hashed; run a full verification for a conclusive result.)"
             
             # Log successful verification
             if evidence_uuid:
                 EvidenceLog.add_verification_log_entry(
                     evidence_uuid,
                     result,
-                    message
+                    message,
+                    mode=mode,
+                    wait=False
                 )
                 EvidenceLog.add_access_log_entry(
                     evidence_uuid,
@@ -79,7 +93,9 @@ class ForensicVerifier:
                 EvidenceLog.add_verification_log_entry(
                     evidence_uuid,
                     "FAILED",
-                    message
+                    message,
+                    mode=mode,
+                    wait=False
                 )
                 EvidenceLog.add_access_log_entry(
                     evidence_uuid,
@@ -87,3 +103,100 @@ class ForensicVerifier:
                     "Failed verification attempt - tampering detected"
                 )
             return False, message, evidence_uuid
+
+    @staticmethod
+    def _find_entry(file_path, camera_id=None):
+        """Find the most recent log entry for a file, by camera_id when given"""
+        file_name = os.path.basename(file_path)
+        if camera_id:
+            return EvidenceLog.find_entry(file_name, camera_id)
+        return EvidenceLog.find_entry_by_filename(file_name)
+
+    @staticmethod
+    def quick_verify(file_path, camera_id=None):
+        """
+        Fast triage: re-hash only the header, trailer and seeded sample ranges
+        recorded at acquisition and compare them with the stored per-range digests.
+        A pass is probabilistic; run verify() for a conclusive result.
+        Returns (is_valid, message, evidence_uuid).
+        """
+        entry = ForensicVerifier._find_entry(file_path, camera_id)
+        if entry is None:
+            return False, "No matching log entry found.", None
+
+        evidence_uuid = entry.get("evidence_uuid")
+        samples = entry.get("samples")
+        if not samples:
+            return False, "No sample manifest recorded for this evidence; run a full verification.", evidence_uuid
+
+        file_name = os.path.basename(file_path)
+        file_size = os.path.getsize(file_path)
+        stored_fingerprint = entry.get("fingerprint")
+        if stored_fingerprint is not None and stored_fingerprint != ForensicHasher.fingerprint(file_name, file_size):
+            failed = samples["offsets"]
+        else:
+            expected = MerkleTree.unpack_leaves(samples["digests"])
+            current = ForensicHasher.hash_ranges(file_path, samples["offsets"], samples["range_size"])
+            failed = [offset for offset, old, new in zip(samples["offsets"], expected, current) if old != new]
+
+        checked = len(samples["offsets"])
+        if failed:
+            message = f"❌ TAMPERING DETECTED: {len(failed)} of {checked} sampled range(s) differ from acquisition."
+            result = "FAILED"
+        else:
+            message = f"✓ Quick check passed ({checked} sampled ranges match). Run a full verification for a conclusive result."
+            result = "PASSED"
+
+        if evidence_uuid:
+            EvidenceLog.add_verification_log_entry(evidence_uuid, result, message, mode="QUICK", wait=False)
+            EvidenceLog.add_access_log_entry(evidence_uuid, "System", "Quick verification performed")
+
+        return not failed, message, evidence_uuid
+
+    @staticmethod
+    def verify_chunks(file_path, camera_id=None, chunk_indexes=None):
+        """
+        Re-check individual chunks of a large file against its stored Merkle manifest.
+        Checks every chunk when chunk_indexes is None, otherwise only the given subset.
+        Returns (is_valid, message, evidence_uuid, failed_chunk_indexes).
+        """
+        entry = ForensicVerifier._find_entry(file_path, camera_id)
+        if entry is None:
+            return False, "No matching log entry found.", None, []
+
+        merkle = entry.get("merkle")
+        evidence_uuid = entry.get("evidence_uuid")
+        if not merkle:
+            return False, "No chunk manifest recorded for this evidence.", evidence_uuid, []
+
+        # The manifest must reproduce the chained hash, otherwise it was altered
+        leaves = MerkleTree.unpack_leaves(merkle["leaves"])
+        if len(leaves) != merkle["leaf_count"] or MerkleTree.root(leaves) != entry["hash"]:
+            message = "❌ TAMPERING DETECTED: Chunk manifest does not match the recorded evidence hash."
+            if evidence_uuid:
+                EvidenceLog.add_verification_log_entry(evidence_uuid, "FAILED", message, mode="CHUNK")
+            return False, message, evidence_uuid, []
+
+        if chunk_indexes is None:
+            chunk_indexes = range(len(leaves))
+        chunk_indexes = sorted(set(i for i in chunk_indexes if 0 <= i < len(leaves)))
+
+        expected_size = entry.get("file_size")
+        if expected_size is not None and os.path.getsize(file_path) != expected_size:
+            failed = chunk_indexes
+        else:
+            current = ForensicHasher.hash_chunks(file_path, merkle["chunk_size"], chunk_indexes)
+            failed = [i for i, leaf in zip(chunk_indexes, current) if leaf != leaves[i]]
+
+        if failed:
+            message = f"❌ TAMPERING DETECTED: {len(failed)} of {len(chunk_indexes)} checked chunk(s) differ from the recorded manifest."
+            result = "FAILED"
+        else:
+            message = f"✓ Chunk integrity verified ({len(chunk_indexes)} of {len(leaves)} chunks checked)."
+            result = "PASSED"
+
+        if evidence_uuid:
+            EvidenceLog.add_verification_log_entry(evidence_uuid, result, message, mode="CHUNK", wait=False)
+            EvidenceLog.add_access_log_entry(evidence_uuid, "System", "Chunk verification performed")
+
+        return not failed, message, evidence_uuid, failed
@@ -0,0 +1,157 @@
+"""
+Group Commit Writer - Batched Durable Evidence Log Writes
+Collects evidence entries and custody events submitted by any thread over a
+short window and commits them to the log storage with one append and one
+fsync per batch. Every submission gets an acknowledgement that is completed
+once its data is on stable storage.
+As the single writer it also links each entry to the head of its chain at
+commit time, so concurrent acquisitions cannot fork the chain by reading the
+same head, and serves readers snapshots that never show half a batch.
+"""
+
+import threading
+import time
+
+
+class CommitAck:
+    """Durability acknowledgement for one submitted write"""
+    
+    def __init__(self):
+        self._done = threading.Event()
+        self.error = None
+        self.entries = []
+        self.batch_size = 0
+        self.committed_at = None
+    
+    def _complete(self, batch_size, error=None):
+        self.batch_size = batch_size
+        self.error = error
+        self.committed_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._done.set()
+    
+    @property
+    def durable(self):
+        return self._done.is_set() and self.error is None
+    
+    def wait(self, timeout=None):
+        """
+        Block until the write is durable.
+        Returns False on timeout and re-raises the storage error if the commit failed.
+        """
+        if not self._done.wait(timeout):
+            return False
+        if self.error is not None:
+            raise self.error
+        return True
+
+
+class GroupCommitWriter:
+    """
+    Single background writer that turns concurrent small writes into batched commits
+    Submissions are committed in arrival order, so waiting on the last
+    acknowledgement of a sequence covers everything submitted before it.
+    """
+    
+    def __init__(self, storage, window=0.005, max_batch=1000, link_chains=True, failover=None):
+        """
+        failover(entries) is called when storage forwards to a log service that has
+        gone; it returns (storage, link_chains, entries) to retry the batch with
+        """
+        self.storage = storage
+        self.window = window
+        self.max_batch = max_batch
+        # Off when storage forwards to a writer in another process that does the linking
+        self.link_chains = link_chains
+        self.failover = failover
+        self._pending = []
+        self._condition = threading.Condition()
+        self._commit_lock = threading.Lock()
+        self._thread = None
+        self.batches_committed = 0
+        self.writes_committed = 0
+    
+    def submit(self, entries=(), events=()):
+        """Queue entries and custody events for the next group commit and return its CommitAck"""
+        ack = CommitAck()
+        ack.entries = list(entries)
+        with self._condition:
+            self._pending.append((ack.entries, list(events), ack))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="EvidenceLogGroupCommit", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return ack
+    
+    def commit_now(self, entries=(), events=()):
+        """Commit one write in the calling thread, without waiting for a batch; returns its CommitAck"""
+        ack = CommitAck()
+        ack.entries = list(entries)
+        self._commit([(ack.entries, list(events), ack)])
+        return ack
+    
+    def snapshot(self, read):
+        """Run a read of the storage between commits, so it sees each batch entirely or not at all"""
+        with self._commit_lock:
+            return read()
+    
+    def flush(self, timeout=None):
+        """Wait until everything submitted so far is durable"""
+        return self.submit().wait(timeout)
+    
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                # Give other writers a short window to join this batch
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            self._commit(batch)
+    
+    def _commit(self, batch):
+        entries = [entry for batch_entries, _, _ in batch for entry in batch_entries]
+        events = [event for _, batch_events, _ in batch for event in batch_events]
+        error = None
+        try:
+            with self._commit_lock:
+                if self.link_chains:
+                    self._link(entries)
+                if entries or events:
+                    try:
+                        self.storage.commit(entries, events)
+                    except ConnectionError:
+                        if self.failover is None:
+                            raise
+                        self.storage, self.link_chains, retry = self.failover(entries)
+                        if self.link_chains:
+                            self._link(retry)
+                        self.storage.commit(retry, events)
+        except Exception as e:
+            print(f"[EVIDENCE LOG] Group commit of {len(batch)} writes failed: {e}")
+            error = e
+        else:
+            self.batches_committed += 1
+            self.writes_committed += len(batch)
+        for _, _, ack in batch:
+            ack._complete(len(batch), error)
+    
+    def _link(self, entries):
+        """Point each entry at the current head of its chain (chain_id None is the global chain)"""
+        heads = {}
+        for entry in entries:
+            chain_id = entry.get("chain_id")
+            if chain_id not in heads:
+                heads[chain_id] = self.storage.chain_head(chain_id)
+            # The head the submitter read may be stale if another write got in first
+            entry["previous_hash"] = heads[chain_id]
+            heads[chain_id] = entry.get("hash") or ""
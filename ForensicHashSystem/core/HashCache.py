@@ -0,0 +1,205 @@
+"""
+Hash Cache - Stat-Keyed Content Hash Cache
+Remembers the last computed content hash of each evidence file, keyed by its
+filesystem metadata, so unchanged files are not re-read on every sweep.
+Changes are written back in batches, at most every hash_cache_flush_seconds
+and at exit, rather than rewriting the whole cache file on every miss.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from core.Config import Config
+
+
+class HashCache:
+    """
+    Persistent LRU cache mapping (device, inode, size, mtime_ns, ctime_ns) to a hash
+    Any metadata change produces a different key, so a stale hash is never served
+    """
+    
+    CACHE_FILE = "hash_cache.json"
+    
+    # Files written this recently can still change within the same mtime tick,
+    # so their hashes are not cached until they have settled
+    RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+    
+    _entries = None
+    _keys_by_path = {}
+    _lock = threading.RLock()
+    _flush_timer = None
+    _atexit_registered = False
+    
+    @staticmethod
+    def stat_key(st):
+        """Build the cache key from an os.stat result"""
+        return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}:{st.st_ctime_ns}"
+    
+    @classmethod
+    def _load(cls):
+        """Load the cache from disk on first use"""
+        if cls._entries is not None:
+            return
+        
+        cls._entries = OrderedDict()
+        cls._keys_by_path = {}
+        if not os.path.exists(cls.CACHE_FILE):
+            return
+        
+        try:
+            with open(cls.CACHE_FILE, "r") as f:
+                # Stored least-recently-used first; rows written before samples were cached have none
+                for key, path, hash_value, merkle, digests, *samples in json.load(f):
+                    cls._entries[key] = (path, hash_value, merkle, digests, samples[0] if samples else None)
+                    cls._keys_by_path[path] = key
+        except Exception as e:
+            print(f"Error loading hash cache: {e}")
+            cls._entries = OrderedDict()
+            cls._keys_by_path = {}
+    
+    @classmethod
+    def lookup(cls, file_path, chunk_size=0, algorithms=(), samples=False):
+        """
+        Return the cached (hash_value, merkle_manifest, digests) for a file, or None.
+        Only hashes computed with the same Merkle chunk size (0 for plain) and
+        covering every requested secondary algorithm match. samples appends the
+        quick-verify sample manifest and only matches hashes cached with one.
+        """
+        try:
+            key = cls.stat_key(os.stat(file_path))
+        except OSError:
+            return None
+        
+        with cls._lock:
+            cls._load()
+            cached = cls._entries.get(key)
+            if cached is None:
+                return None
+            
+            path, hash_value, merkle, digests, cached_samples = cached
+            cached_chunk_size = merkle["chunk_size"] if merkle else 0
+            if path != os.path.abspath(file_path) or cached_chunk_size != chunk_size:
+                return None
+            if any(name not in digests for name in algorithms):
+                return None
+            if samples and cached_samples is None:
+                return None
+            
+            cls._entries.move_to_end(key)
+            found = hash_value, merkle, {name: digests[name] for name in algorithms}
+            return (*found, cached_samples) if samples else found
+    
+    @classmethod
+    def store(cls, file_path, stat_before, hash_value, merkle=None, digests=None, samples=None, persist=True):
+        """
+        Cache a hash computed from a file whose metadata was `stat_before`,
+        with the sample manifest read in the same pass if there was one.
+        Nothing is stored if the file changed while it was being hashed or was
+        modified too recently to trust its timestamps. persist schedules a
+        batched save; callers storing many hashes at once save() themselves.
+        """
+        try:
+            stat_after = os.stat(file_path)
+        except OSError:
+            return False
+        
+        key = cls.stat_key(stat_before)
+        if cls.stat_key(stat_after) != key:
+            return False
+        if time.time_ns() - stat_after.st_mtime_ns < cls.RACY_WINDOW_NS:
+            return False
+        
+        path = os.path.abspath(file_path)
+        with cls._lock:
+            cls._load()
+            old_key = cls._keys_by_path.get(path)
+            if old_key is not None and old_key != key:
+                cls._entries.pop(old_key, None)
+            
+            digests = digests or {}
+            if old_key == key:
+                # Same content re-hashed: keep digests and samples this pass did not compute
+                _, _, _, old_digests, old_samples = cls._entries[key]
+                digests = {**old_digests, **digests}
+                samples = old_samples if samples is None else samples
+            cls._entries[key] = (path, hash_value, merkle, digests, samples)
+            cls._entries.move_to_end(key)
+            cls._keys_by_path[path] = key
+            
+            # Evict least recently used entries beyond the configured bound
+            max_entries = Config.get("hash_cache_max_entries", 50000)
+            while len(cls._entries) > max_entries:
+                _, (evicted_path, *_) = cls._entries.popitem(last=False)
+                if cls._keys_by_path.get(evicted_path) not in cls._entries:
+                    cls._keys_by_path.pop(evicted_path, None)
+            
+            if persist:
+                cls.schedule_save()
+        return True
+    
+    @classmethod
+    def invalidate(cls, file_path):
+        """Drop any cached hash for a file path"""
+        path = os.path.abspath(file_path)
+        with cls._lock:
+            cls._load()
+            key = cls._keys_by_path.pop(path, None)
+            if key is not None and cls._entries.pop(key, None) is not None:
+                cls.schedule_save()
+    
+    @classmethod
+    def schedule_save(cls):
+        """
+        Persist the cache after a short delay; changes made meanwhile are
+        written together. Losing them in a crash only costs re-hashing.
+        """
+        with cls._lock:
+            if cls._flush_timer is not None:
+                return
+            if not cls._atexit_registered:
+                atexit.register(cls.flush)
+                cls._atexit_registered = True
+            cls._flush_timer = threading.Timer(Config.get("hash_cache_flush_seconds", 5.0), cls.flush)
+            cls._flush_timer.daemon = True
+            cls._flush_timer.start()
+    
+    @classmethod
+    def flush(cls):
+        """Write out changes waiting for a scheduled save, if any"""
+        with cls._lock:
+            if cls._flush_timer is not None:
+                cls.save()
+    
+    @classmethod
+    def save(cls):
+        """Persist the cache atomically so a crash never leaves a torn file"""
+        with cls._lock:
+            if cls._flush_timer is not None:
+                cls._flush_timer.cancel()
+                cls._flush_timer = None
+            if cls._entries is None:
+                return
+            
+            rows = [[key, *value] for key, value in cls._entries.items()]
+            temp_file = cls.CACHE_FILE + ".tmp"
+            try:
+                with open(temp_file, "w") as f:
+                    json.dump(rows, f)
+                os.replace(temp_file, cls.CACHE_FILE)
+            except Exception as e:
+                print(f"Error saving hash cache: {e}")
+    
+    @classmethod
+    def clear(cls):
+        """Remove every cached hash"""
+        with cls._lock:
+            if cls._flush_timer is not None:
+                cls._flush_timer.cancel()
+                cls._flush_timer = None
+            cls._entries = OrderedDict()
+            cls._keys_by_path = {}
+            if os.path.exists(cls.CACHE_FILE):
+                os.remove(cls.CACHE_FILE)
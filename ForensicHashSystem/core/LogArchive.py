@@ -0,0 +1,147 @@
+"""
+Log Archive - Compressed Sealed Segment Files
+Cold sealed segments of the evidence log can be archived into a file holding
+the segment's JSONL lines in independently compressed blocks (zlib, or lzma
+where Python was built with it). A block index at the end of the file lets a
+reader decompress only the blocks it needs. The decompressed blocks are the
+original segment file byte for byte, so the SHA-256 and Merkle root recorded
+when the segment was sealed still verify against the archive.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import zlib
+from bisect import bisect_right
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+
+class ArchiveFile:
+    """
+    Block-compressed archive of JSONL records
+    Layout: MAGIC, the compressed blocks, a JSON block index, then the index
+    offset and MAGIC again so readers find the index from the end of the file
+    """
+    
+    MAGIC = b"CCTVARC1"
+    SUFFIX = ".arc"
+    TRAILER = struct.Struct("<Q8s")
+    CODECS = {"zlib": (lambda data: zlib.compress(data, 9), zlib.decompress)}
+    if lzma is not None:
+        CODECS["lzma"] = (lzma.compress, lzma.decompress)
+    
+    def __init__(self, path):
+        self.path = path
+        self._index = None
+    
+    @classmethod
+    def write(cls, path, source_path, codec="lzma", block_entries=256):
+        """Archive the JSONL file at source_path into path (replaced atomically); returns the block index"""
+        if codec not in cls.CODECS:
+            raise ValueError(f"Unsupported archive codec: {codec} (available: {', '.join(cls.CODECS)})")
+        compress, _ = cls.CODECS[codec]
+        # Each block is [first position, entry count, byte offset, compressed length]
+        index = {"codec": codec, "entry_count": 0, "blocks": []}
+        temp_path = path + ".tmp"
+        with open(source_path, "rb") as source, open(temp_path, "wb") as f:
+            f.write(cls.MAGIC)
+            lines, count = [], 0
+            for line in source:
+                lines.append(line)
+                if line.strip():
+                    count += 1
+                if count == block_entries:
+                    cls._write_block(f, index, compress, lines, count)
+                    lines, count = [], 0
+            if lines:
+                cls._write_block(f, index, compress, lines, count)
+            offset = f.tell()
+            f.write(json.dumps(index, separators=(",", ":")).encode("utf-8"))
+            f.write(cls.TRAILER.pack(offset, cls.MAGIC))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        return index
+    
+    @staticmethod
+    def _write_block(f, index, compress, lines, count):
+        data = compress(b"".join(lines))
+        index["blocks"].append([index["entry_count"], count, f.tell(), len(data)])
+        index["entry_count"] += count
+        f.write(data)
+    
+    def index(self):
+        """Block index read from the end of the file; archives never change once written"""
+        if self._index is None:
+            with open(self.path, "rb") as f:
+                end = f.seek(0, os.SEEK_END)
+                f.seek(end - self.TRAILER.size)
+                offset, magic = self.TRAILER.unpack(f.read(self.TRAILER.size))
+                if magic != self.MAGIC:
+                    raise ValueError(f"{self.path}: not an evidence log archive")
+                f.seek(offset)
+                self._index = json.loads(f.read(end - self.TRAILER.size - offset))
+        return self._index
+    
+    def count(self):
+        return self.index()["entry_count"] if os.path.exists(self.path) else 0
+    
+    def _read_blocks(self, numbers):
+        """Decompressed contents of the given blocks, in the order asked for"""
+        index = self.index()
+        _, decompress = self.CODECS[index["codec"]]
+        with open(self.path, "rb") as f:
+            for number in numbers:
+                _, _, offset, length = index["blocks"][number]
+                f.seek(offset)
+                yield decompress(f.read(length))
+    
+    @staticmethod
+    def _decode(data):
+        return [json.loads(line) for line in data.split(b"\n") if line.strip()]
+    
+    def _block_of(self, position):
+        return bisect_right([block[0] for block in self.index()["blocks"]], position) - 1
+    
+    def iter_records(self, start=0):
+        """Stream records from position start onwards, decompressing one block at a time"""
+        if not os.path.exists(self.path) or start >= self.count():
+            return
+        first = self._block_of(start)
+        skip = start - self.index()["blocks"][first][0]
+        for data in self._read_blocks(range(first, len(self.index()["blocks"]))):
+            records = self._decode(data)
+            yield from records[skip:]
+            skip = 0
+    
+    def iter_records_reversed(self):
+        if not os.path.exists(self.path):
+            return
+        for data in self._read_blocks(range(len(self.index()["blocks"]) - 1, -1, -1)):
+            yield from reversed(self._decode(data))
+    
+    def record(self, position):
+        """A single record, read by decompressing only the block that holds it"""
+        if not 0 <= position < self.count():
+            raise IndexError(f"archive record out of range: {position}")
+        first = self._block_of(position)
+        data = next(self._read_blocks([first]))
+        return self._decode(data)[position - self.index()["blocks"][first][0]]
+    
+    def digest(self):
+        """SHA-256 of the archived segment file as it was before compression"""
+        sha256 = hashlib.sha256()
+        for data in self._read_blocks(range(len(self.index()["blocks"]))):
+            sha256.update(data)
+        return sha256.hexdigest()
+    
+    @staticmethod
+    def read_range(path, start, end):
+        """Parse the records of blocks [start, end); a chain_ranges reader for process pools"""
+        archive = ArchiveFile(path)
+        return [record for data in archive._read_blocks(range(start, end)) for record in archive._decode(data)]
@@ -0,0 +1,143 @@
+"""
+Evidence Log Service - Cross-Process Single Writer
+With the "socket" log service, the first process to open the evidence log
+serves it on a local Unix socket and is the only process that writes to the
+log files. Other processes forward their batched writes to it and receive the
+committed entries, linked into their chains, once they are durable.
+If the serving process exits, the first client to claim the socket again
+takes over serving; the others reconnect to it.
+The socket lives in a directory only the owning user can enter, and is
+itself readable and writable by that user only.
+Readers in any process read the files directly.
+"""
+
+import json
+import os
+import socket
+import threading
+
+
+class LogService:
+    """
+    Accepts evidence log writes from other processes and commits them through this process
+    """
+    
+    def __init__(self, socket_path, submit):
+        """submit(entries, events) commits one write and returns a durable CommitAck"""
+        self.socket_path = socket_path
+        self.submit = submit
+        self._server = None
+    
+    @staticmethod
+    def available():
+        return hasattr(socket, "AF_UNIX")
+    
+    @staticmethod
+    def prepare_directory(socket_path):
+        """Create the socket's directory private to this user, refusing one that anyone else controls"""
+        directory = os.path.dirname(os.path.abspath(socket_path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        st = os.stat(directory)
+        if st.st_uid != os.getuid():
+            raise PermissionError(f"Evidence log service directory {directory} is owned by another user")
+        if st.st_mode & 0o077:
+            os.chmod(directory, 0o700)
+    
+    def bind(self):
+        """Claim the socket path; connections queue until start() begins serving them"""
+        self.prepare_directory(self.socket_path)
+        if os.path.exists(self.socket_path):
+            # Left behind by a writer that did not shut down cleanly
+            os.remove(self.socket_path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._server.listen()
+    
+    def start(self):
+        threading.Thread(target=self._serve, name="EvidenceLogService", daemon=True).start()
+        print(f"[EVIDENCE LOG] Serving evidence log writes on {self.socket_path}")
+    
+    def stop(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+    
+    def _serve(self):
+        server = self._server
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+    
+    def _handle(self, connection):
+        """Commit each request line from one client and answer with the committed entries"""
+        with connection, connection.makefile("rwb") as stream:
+            for line in stream:
+                request = json.loads(line)
+                try:
+                    ack = self.submit(request["entries"], [tuple(event) for event in request["events"]])
+                    ack.wait()
+                    reply = {"ok": True, "entries": ack.entries}
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                stream.write(json.dumps(reply).encode("utf-8") + b"\n")
+                stream.flush()
+
+
+class LogServiceClient:
+    """
+    Storage stand-in for GroupCommitWriter that forwards each commit to the log service
+    """
+    
+    def __init__(self, connection, socket_path):
+        self.socket_path = socket_path
+        self._connection = connection
+        self._stream = connection.makefile("rwb")
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def connect(cls, socket_path):
+        """Return a client for the service listening on socket_path, or None if no process is serving"""
+        if not os.path.exists(socket_path):
+            return None
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(socket_path)
+        except OSError:
+            connection.close()
+            return None
+        return cls(connection, socket_path)
+    
+    def close(self):
+        for closable in (self._stream, self._connection):
+            try:
+                closable.close()
+            except OSError:
+                pass
+    
+    def commit(self, entries, events):
+        """
+        Send one batch and wait until the service has made it durable.
+        Raises ConnectionError if the service has gone; the batch may or may not have been committed.
+        """
+        with self._lock:
+            request = {"entries": entries, "events": [list(event) for event in events]}
+            try:
+                self._stream.write(json.dumps(request).encode("utf-8") + b"\n")
+                self._stream.flush()
+                line = self._stream.readline()
+            except OSError as e:
+                raise ConnectionError(f"Evidence log service at {self.socket_path} is unreachable: {e}") from e
+        if not line:
+            raise ConnectionError(f"Evidence log service at {self.socket_path} closed the connection")
+        reply = json.loads(line)
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        # The service may have relinked entries to newer chain heads
+        for entry, committed in zip(entries, reply["entries"]):
+            entry.update(committed)
@@ -0,0 +1,879 @@
+"""
+Evidence Log Storage - Storage Engines for the Evidence Log
+Provides the on-disk formats behind EvidenceLog: the original pretty-printed
+JSON array and an append-only line-delimited JSON log, both served from an
+in-process indexed model that is only re-parsed when the file changes.
+Custody events (access, verification, location) are kept in an append-only
+side log per evidence item instead of inside the chained entries.
+"""
+
+import json
+import os
+import threading
+from bisect import bisect_left, insort
+from core.EvidenceEntry import EvidenceEntry
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class LogStorage:
+    """
+    Base storage engine
+    Lookups are implemented as scans over iter_entries(); engines with indexes override them
+    """
+    
+    # Whether import_log replaces entries and custody events in one transaction
+    ATOMIC_IMPORT = False
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def exists(self):
+        return os.path.exists(self.path)
+    
+    def load(self):
+        """Return every entry in chain order"""
+        raise NotImplementedError
+    
+    def iter_entries(self, reverse=False):
+        """
+        Yield every entry in chain order, or newest first with reverse=True.
+        Engines that can read incrementally override this to stream instead of loading.
+        """
+        log = self.load()
+        return reversed(log) if reverse else iter(log)
+    
+    def append(self, entries):
+        """Append complete entries (context plus hash) in chain order"""
+        raise NotImplementedError
+    
+    def import_entries(self, entries):
+        """Replace the stored log with the given entries (used for migration)"""
+        raise NotImplementedError
+    
+    def append_custody(self, events):
+        """Append custody events, each an (evidence_uuid, kind, record) tuple"""
+        raise NotImplementedError
+    
+    def custody(self, evidence_uuid):
+        """Return {kind: [records]} for one evidence item"""
+        raise NotImplementedError
+    
+    def all_custody(self):
+        """Return {evidence_uuid: {kind: [records]}} for every evidence item"""
+        raise NotImplementedError
+    
+    def import_custody(self, events):
+        """Replace every stored custody event (used for migration)"""
+        raise NotImplementedError
+    
+    def import_log(self, entries, events):
+        """Replace the stored log and every custody event (used for migration)"""
+        self.import_entries(entries)
+        self.import_custody(events)
+    
+    def clear(self):
+        """Remove the stored log"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def entries_since(self, position):
+        """Return the entries from the given 0-based chain position onwards"""
+        return self.load()[position:]
+    
+    def chain_ranges(self, count):
+        """
+        Split the log into about `count` consecutive ranges that worker processes can read
+        on their own, as (reader, args) pairs where reader(*args) returns the entries.
+        Returns None when the format has to be parsed as a whole.
+        """
+        return None
+    
+    def segments(self):
+        """Describe the stored log as a list of segments; unsegmented engines report one"""
+        log = self.load()
+        return [{
+            "name": os.path.basename(self.path),
+            "entry_count": len(log),
+            "first_previous_hash": log[0].get("previous_hash", "") if log else "",
+            "last_hash": log[-1]["hash"] if log else "",
+            "sealed": False
+        }]
+    
+    def load_segment(self, index):
+        """Return the entries of one segment listed by segments()"""
+        if index not in (0, -1):
+            raise IndexError(f"segment index out of range: {index}")
+        return self.load()
+    
+    def compact(self):
+        """Compact sealed history; engines without segments have nothing to do"""
+        return 0
+    
+    def archive(self, keep=0, codec="lzma", block_entries=256):
+        """Compress sealed history into archives; engines without segments have nothing to do"""
+        return 0
+    
+    def commit(self, entries, events):
+        """Append entries and custody events as one group and flush them to stable storage"""
+        if entries:
+            self.append(entries)
+        if events:
+            self.append_custody(events)
+        self.sync()
+    
+    def sync(self):
+        """Flush completed writes to stable storage"""
+        for path in self.paths():
+            self.fsync_path(path)
+    
+    def paths(self):
+        """Files holding this log"""
+        return [self.path]
+    
+    @staticmethod
+    def fsync_path(path):
+        """fsync a file and, on POSIX, its directory so a newly created or replaced file survives a crash"""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            os.fsync(f.fileno())
+        if os.name == "posix":
+            directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+    
+    def last_hash(self):
+        for entry in self.iter_entries(reverse=True):
+            return entry["hash"]
+        return ""
+    
+    def chain_head(self, chain_id=None):
+        """Hash of the newest entry in a chain; chain_id None is the global chain"""
+        for entry in self.iter_entries(reverse=True):
+            if entry.get("chain_id") == chain_id:
+                return entry.get("hash", "")
+        return ""
+    
+    def chain_entries(self, chain_id):
+        """Entries of one per-camera chain, in chain order"""
+        return [entry for entry in self.iter_entries() if entry.get("chain_id") == chain_id]
+    
+    def chain_heads(self):
+        """{chain_id: {"hash", "count"}} for every per-camera chain"""
+        heads = {}
+        for entry in self.iter_entries():
+            if entry.get("chain_id") is not None:
+                head = heads.setdefault(entry["chain_id"], {"hash": "", "count": 0})
+                head["hash"] = entry.get("hash", "")
+                head["count"] += 1
+        return heads
+    
+    def query(self, camera_id=None, event_type=None, start=None, end=None):
+        """
+        Iterate over the entries matching every given filter in timestamp order, ties in chain order.
+        start is inclusive and end exclusive, compared as "%Y-%m-%d %H:%M:%S" strings.
+        """
+        matches = [entry for entry in self.iter_entries() if self.matches(entry, camera_id, event_type, start, end)]
+        return iter(sorted(matches, key=lambda entry: entry.get("timestamp") or ""))
+    
+    @staticmethod
+    def matches(entry, camera_id=None, event_type=None, start=None, end=None):
+        timestamp = entry.get("timestamp") or ""
+        return (
+            (camera_id is None or entry.get("camera_id") == camera_id)
+            and (event_type is None or entry.get("event_type") == event_type)
+            and (start is None or timestamp >= start)
+            and (end is None or timestamp < end)
+        )
+    
+    def find_entry(self, file_name, camera_id):
+        for entry in self.iter_entries(reverse=True):
+            if entry["file_name"] == file_name and entry["camera_id"] == camera_id:
+                return entry
+        return None
+    
+    def find_entry_by_filename(self, file_name):
+        for entry in self.iter_entries(reverse=True):
+            if entry["file_name"] == file_name:
+                return entry
+        return None
+    
+    def find_entry_by_uuid(self, evidence_uuid):
+        for entry in self.iter_entries():
+            if entry.get("evidence_uuid") == evidence_uuid:
+                return entry
+        return None
+    
+    def find_original_entry(self, file_name):
+        for entry in self.iter_entries():
+            if entry.get("file_name") == file_name and entry.get("event_type") == "CREATE":
+                return entry
+        return None
+
+
+class FileLock:
+    """Exclusive inter-process lock held on a companion .lock file of path"""
+    
+    def __init__(self, path):
+        self.path = path + ".lock"
+        self._file = None
+    
+    def __enter__(self):
+        self._file = open(self.path, "a+b")
+        if os.name == "nt":
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+    
+    def __exit__(self, *exc):
+        try:
+            if os.name == "nt":
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class CachedFile:
+    """
+    Keeps a parsed model of a file in memory
+    The file is only re-parsed when its inode, size or mtime changes underneath us;
+    writes made through this object update the cached model directly.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._cached = None
+        self._cached_signature = None
+        self._lock = threading.RLock()
+    
+    def _build_model(self):
+        """Parse the file into the in-memory model"""
+        raise NotImplementedError
+    
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+    
+    def _is_fresh(self):
+        return self._cached is not None and self._cached_signature == self._signature()
+    
+    def _invalidate(self):
+        with self._lock:
+            self._cached = None
+    
+    def _model(self):
+        """Return the cached model, re-parsing the file only if it changed"""
+        with self._lock:
+            signature = self._signature()
+            if self._cached is None or signature != self._cached_signature:
+                self._cached = self._build_model()
+                self._cached_signature = signature
+            return self._cached
+    
+    def _write_through(self, write, update_model):
+        """
+        Perform a write and apply the same change to the cached model.
+        The model is dropped instead if the file changed behind our back or the write failed.
+        """
+        with self._lock:
+            fresh = self._is_fresh()
+            try:
+                write()
+            except Exception:
+                self._cached = None
+                raise
+            if fresh:
+                update_model(self._cached)
+                self._cached_signature = self._signature()
+            else:
+                self._cached = None
+
+
+class JsonLinesFile:
+    """
+    Append-only file of compact JSON records, one per line
+    A torn final line left by a crash is ignored on read and truncated on the next append
+    """
+    
+    READ_BLOCK_SIZE = 64 * 1024
+    
+    def __init__(self, path):
+        self.path = path
+    
+    @staticmethod
+    def encode(record):
+        return json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+    
+    def iter_records(self, end=None):
+        """Stream parsed records line by line, or only those of the first `end` bytes"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            pending_error = None
+            position = 0
+            for line_number, line in enumerate(f, 1):
+                if end is not None and position >= end:
+                    break
+                position += len(line)
+                if pending_error:
+                    raise pending_error
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    # Only the last line may be incomplete; anything earlier is corruption
+                    pending_error = ValueError(f"{self.path}:{line_number}: corrupt log record ({e})")
+            if pending_error:
+                print(f"[EVIDENCE LOG] Ignoring incomplete final record in {self.path}")
+    
+    def iter_records_reversed(self, end=None):
+        """Stream parsed records from the end of the file, or from byte `end`, backwards"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            if end is not None:
+                position = min(position, end)
+            remainder = b""
+            first = True
+            while position > 0:
+                read_size = min(self.READ_BLOCK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                block = f.read(read_size) + remainder
+                lines = block.split(b"\n")
+                # The first piece may be the tail of a line that starts in an earlier block
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    record = self._decode_line(line, first)
+                    first = False
+                    if record is not None:
+                        yield record
+            record = self._decode_line(remainder, first)
+            if record is not None:
+                yield record
+    
+    def _decode_line(self, line, is_last):
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            if is_last:
+                return None
+            raise ValueError(f"{self.path}: corrupt log record")
+    
+    @staticmethod
+    def read_range(path, start, end):
+        """Parse the records whose lines start within bytes [start, end) of the file"""
+        records = []
+        with open(path, "rb") as f:
+            if start > 0:
+                # Skip the rest of a line that began before this range
+                f.seek(start - 1)
+                f.readline()
+            while f.tell() < end:
+                line = f.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Only the last line may be incomplete; anything earlier is corruption
+                    if f.readline():
+                        raise ValueError(f"{path}: corrupt log record")
+        return records
+    
+    def append_records(self, records):
+        if not records:
+            return
+        data = "".join(self.encode(record) + "\n" for record in records).encode("utf-8")
+        with open(self.path, "ab+") as f:
+            self._truncate_torn_tail(f)
+            f.write(data)
+    
+    def _truncate_torn_tail(self, f):
+        """Drop an incomplete final record left by a crash so appends start on a fresh line"""
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        
+        position = end
+        while position > 0:
+            read_size = min(self.READ_BLOCK_SIZE, position)
+            position -= read_size
+            f.seek(position)
+            newline = f.read(read_size).rfind(b"\n")
+            if newline != -1:
+                f.truncate(position + newline + 1)
+                return
+        f.truncate(0)
+    
+    def find(self, needle, start=0):
+        """Whether the raw bytes of the file from `start` on contain `needle`"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            tail = b""
+            while True:
+                block = f.read(self.READ_BLOCK_SIZE)
+                if not block:
+                    return False
+                if needle in tail + block:
+                    return True
+                # Keep enough of the block to catch a needle split across reads
+                tail = block[-(len(needle) - 1):] if len(needle) > 1 else b""
+    
+    def replace_records(self, records):
+        """Atomically replace the whole file with the given records"""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(self.encode(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+
+class CustodyLog(CachedFile):
+    """
+    Append-only side log of custody events, indexed per evidence UUID
+    Each event is written once; readers merge them into the item's entries
+    """
+    
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = JsonLinesFile(path)
+    
+    def _build_model(self):
+        events = {}
+        for record in self.file.iter_records():
+            self._add(events, record["evidence_uuid"], record["kind"], record["record"])
+        return events
+    
+    @staticmethod
+    def _add(events, evidence_uuid, kind, record):
+        events.setdefault(evidence_uuid, {}).setdefault(kind, []).append(record)
+    
+    @staticmethod
+    def _encode(evidence_uuid, kind, record):
+        return {"evidence_uuid": evidence_uuid, "kind": kind, "record": record}
+    
+    def append(self, events):
+        events = list(events)
+        
+        def update_model(model):
+            for event in events:
+                self._add(model, *event)
+        
+        self._write_through(
+            lambda: self.file.append_records([self._encode(*event) for event in events]),
+            update_model
+        )
+    
+    def events_for(self, evidence_uuid):
+        with self._lock:
+            return {kind: list(records) for kind, records in self._model().get(evidence_uuid, {}).items()}
+    
+    def all_events(self):
+        with self._lock:
+            return {
+                evidence_uuid: {kind: list(records) for kind, records in kinds.items()}
+                for evidence_uuid, kinds in self._model().items()
+            }
+    
+    def replace(self, events):
+        with self._lock:
+            self.file.replace_records([self._encode(*event) for event in events])
+            self._cached = None
+    
+    def clear(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._cached = None
+
+
+class TimeIndex:
+    """
+    (timestamp, position) keys kept sorted, over the whole log and per camera
+    """
+    
+    def __init__(self):
+        self.keys = []
+        self.by_camera = {}
+    
+    def add(self, position, entry):
+        key = (entry.get("timestamp") or "", position)
+        for keys in (self.keys, self.by_camera.setdefault(entry.get("camera_id"), [])):
+            # Entries nearly always arrive in time order, making this an append
+            if keys and keys[-1] > key:
+                insort(keys, key)
+            else:
+                keys.append(key)
+    
+    def positions(self, camera_id=None, start=None, end=None):
+        """Positions with start <= timestamp < end, in timestamp order"""
+        keys = self.keys if camera_id is None else self.by_camera.get(camera_id, [])
+        low = bisect_left(keys, (start,)) if start is not None else 0
+        high = bisect_left(keys, (end,)) if end is not None else len(keys)
+        return [position for _, position in keys[low:high]]
+
+
+class LogIndex:
+    """
+    Parsed in-memory model of the evidence log with hash-map indexes
+    Entries are held as compact EvidenceEntry objects; index values are references into `entries`
+    """
+    
+    def __init__(self, entries=()):
+        self.entries = []
+        self.first_by_uuid = {}
+        self.latest_by_file = {}
+        self.latest_by_file_camera = {}
+        self.original_by_file = {}
+        self.latest_by_chain = {}
+        self.by_chain = {}
+        self.by_time = TimeIndex()
+        for entry in entries:
+            self.add(entry)
+    
+    def add(self, entry):
+        entry = EvidenceEntry.from_dict(entry)
+        self.by_time.add(len(self.entries), entry)
+        self.entries.append(entry)
+        file_name = entry.get("file_name")
+        chain_id = entry.get("chain_id")
+        self.latest_by_chain[chain_id] = entry
+        if chain_id is not None:
+            self.by_chain.setdefault(chain_id, []).append(entry)
+        if entry.get("evidence_uuid") is not None:
+            # Keyed by the compact UUID the entry holds rather than a new string per entry
+            self.first_by_uuid.setdefault(entry.stored("evidence_uuid"), entry)
+        self.latest_by_file[file_name] = entry
+        self.latest_by_file_camera[(file_name, entry.get("camera_id"))] = entry
+        if entry.get("event_type") == "CREATE":
+            self.original_by_file.setdefault(file_name, entry)
+    
+    def entry_by_uuid(self, evidence_uuid):
+        """First entry recorded for an evidence UUID"""
+        return self.first_by_uuid.get(EvidenceEntry.compact("evidence_uuid", evidence_uuid))
+    
+    @property
+    def last_hash(self):
+        return self.entries[-1]["hash"] if self.entries else ""
+
+
+class CachedFileStorage(CachedFile, LogStorage):
+    """
+    File-backed storage served from a cached LogIndex
+    Custody events live in a CustodyLog next to the evidence log
+    """
+    
+    # Everything ChainVerifier.check_links and broken_link look at
+    CHAIN_FIELDS = ("hash", "previous_hash", "chain_id", "event_type", "timestamp", "evidence_uuid", "file_name")
+    CHAIN_RANGE_MIN_ENTRIES = 1024
+    
+    def __init__(self, path, custody_path):
+        super().__init__(path)
+        self.custody_log = CustodyLog(custody_path)
+    
+    def _read(self):
+        """Parse every entry from disk, in chain order"""
+        raise NotImplementedError
+    
+    def _build_model(self):
+        return LogIndex(self._read())
+    
+    @staticmethod
+    def _copy_entry(entry):
+        """Copy an entry's containers so callers cannot mutate the cached model"""
+        if entry is None:
+            return None
+        return {
+            key: list(value) if isinstance(value, list) else dict(value) if isinstance(value, dict) else value
+            for key, value in entry.items()
+        }
+    
+    def clear(self):
+        with self._lock:
+            LogStorage.clear(self)
+            self._cached = None
+            self.custody_log.clear()
+    
+    def load(self):
+        with self._lock:
+            return [self._copy_entry(entry) for entry in self._model().entries]
+    
+    def iter_entries(self, reverse=False):
+        """Entries present when iteration starts, each copied only when it is reached"""
+        with self._lock:
+            entries = self._model().entries
+            count = len(entries)
+        positions = range(count - 1, -1, -1) if reverse else range(count)
+        for position in positions:
+            yield self._copy_entry(entries[position])
+    
+    def entries_since(self, position):
+        with self._lock:
+            return [self._copy_entry(entry) for entry in self._model().entries[position:]]
+    
+    def chain_ranges(self, count):
+        """
+        Slices of the parsed model, cut down to the fields the chain check reads,
+        so the pickles shipped to the workers stay small
+        """
+        with self._lock:
+            links = [
+                {key: entry[key] for key in self.CHAIN_FIELDS if key in entry}
+                for entry in self._model().entries
+            ]
+        step = max(-(-len(links) // count), self.CHAIN_RANGE_MIN_ENTRIES)
+        return [(CachedFileStorage.given_entries, (links[start:start + step],)) for start in range(0, len(links), step)]
+    
+    @staticmethod
+    def given_entries(entries):
+        """chain_ranges reader for ranges that travel with their entries"""
+        return entries
+    
+    def last_hash(self):
+        with self._lock:
+            return self._model().last_hash
+    
+    def chain_head(self, chain_id=None):
+        with self._lock:
+            entry = self._model().latest_by_chain.get(chain_id)
+            return entry.get("hash", "") if entry else ""
+    
+    def chain_entries(self, chain_id):
+        with self._lock:
+            return [self._copy_entry(entry) for entry in self._model().by_chain.get(chain_id, [])]
+    
+    def chain_heads(self):
+        with self._lock:
+            return {
+                chain_id: {"hash": entries[-1].get("hash", ""), "count": len(entries)}
+                for chain_id, entries in self._model().by_chain.items()
+            }
+    
+    def find_entry(self, file_name, camera_id):
+        with self._lock:
+            return self._copy_entry(self._model().latest_by_file_camera.get((file_name, camera_id)))
+    
+    def find_entry_by_filename(self, file_name):
+        with self._lock:
+            return self._copy_entry(self._model().latest_by_file.get(file_name))
+    
+    def find_entry_by_uuid(self, evidence_uuid):
+        with self._lock:
+            return self._copy_entry(self._model().entry_by_uuid(evidence_uuid))
+    
+    def find_original_entry(self, file_name):
+        with self._lock:
+            return self._copy_entry(self._model().original_by_file.get(file_name))
+    
+    def query(self, camera_id=None, event_type=None, start=None, end=None):
+        with self._lock:
+            model = self._model()
+            entries = [model.entries[position] for position in model.by_time.positions(camera_id, start, end)]
+        return (
+            self._copy_entry(entry) for entry in entries
+            if event_type is None or entry.get("event_type") == event_type
+        )
+    
+    def append_custody(self, events):
+        self.custody_log.append(events)
+    
+    def custody(self, evidence_uuid):
+        return self.custody_log.events_for(evidence_uuid)
+    
+    def all_custody(self):
+        return self.custody_log.all_events()
+    
+    def import_custody(self, events):
+        self.custody_log.replace(events)
+    
+    def paths(self):
+        return [self.path, self.custody_log.path]
+
+
+class JsonArrayStorage(CachedFileStorage):
+    """
+    Original format: the whole log is one indented JSON array
+    Every write rewrites the full file
+    """
+    
+    def _read(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r") as f:
+            return json.load(f)
+    
+    def _write(self, log):
+        # Written beside the log and renamed over it so a crash never leaves a half-written array
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(log, f, indent=4, default=EvidenceEntry.to_dict)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+    
+    def append(self, entries):
+        entries = [self._copy_entry(entry) for entry in entries]
+        with self._lock:
+            log = self._model().entries + entries
+            self._write_through(lambda: self._write(log), lambda index: [index.add(entry) for entry in entries])
+    
+    def import_entries(self, entries):
+        with self._lock:
+            self._write(list(entries))
+            self._cached = None
+
+
+class JsonLinesStorage(CachedFileStorage):
+    """
+    Append-only format: one compact JSON object per line
+    Entries are appended in O(1) and the file is streamed back line by line
+    """
+    
+    # Logs written before custody events moved to the side log carry
+    # in-place updates as records keyed by this field
+    UPDATE_KEY = "_update"
+    
+    def __init__(self, path, custody_path):
+        super().__init__(path, custody_path)
+        self.file = JsonLinesFile(path)
+        # (inode, bytes scanned, found) for the legacy update record scan
+        self._update_scan = None
+    
+    @staticmethod
+    def _apply_update(entry, record):
+        for field, value in record.get("append", {}).items():
+            entry.setdefault(field, []).append(value)
+        entry.update(record.get("set", {}))
+    
+    def _read(self):
+        log = []
+        first_by_uuid = {}
+        for record in self.file.iter_records():
+            evidence_uuid = record.get(self.UPDATE_KEY)
+            if evidence_uuid is None:
+                log.append(record)
+                if record.get("evidence_uuid") is not None:
+                    first_by_uuid.setdefault(record["evidence_uuid"], record)
+                continue
+            entry = first_by_uuid.get(evidence_uuid)
+            if entry is not None:
+                self._apply_update(entry, record)
+        return log
+    
+    def append(self, entries):
+        entries = [self._copy_entry(entry) for entry in entries]
+        self._write_through(
+            lambda: self.file.append_records(entries),
+            lambda index: [index.add(entry) for entry in entries]
+        )
+    
+    def _has_updates(self):
+        """
+        Whether the file holds legacy update records. Appends never add any, so
+        only bytes appended since the last scan are searched until the file is replaced
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        scanned, found = 0, False
+        if self._update_scan is not None:
+            inode, size, was_found = self._update_scan
+            if inode == st.st_ino and size <= st.st_size:
+                scanned, found = size, was_found
+        if not found:
+            # Keys inside string values have escaped quotes, so only record keys match
+            found = self.file.find(json.dumps(self.UPDATE_KEY).encode(), scanned)
+        self._update_scan = (st.st_ino, st.st_size, found)
+        return found
+    
+    def iter_entries(self, reverse=False):
+        """
+        Served from the cached model when it is up to date; otherwise streamed from
+        the file a record at a time instead of parsing the whole log first. Logs
+        still holding legacy update records go through the model, which applies them.
+        """
+        with self._lock:
+            if self._is_fresh() or self._has_updates():
+                return CachedFileStorage.iter_entries(self, reverse)
+            # Entries appended after iteration starts are left out, as with the model
+            end = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        records = self.file.iter_records_reversed(end) if reverse else self.file.iter_records(end)
+        return (record for record in records if self.UPDATE_KEY not in record)
+    
+    def last_hash(self):
+        with self._lock:
+            if self._is_fresh():
+                return self._cached.last_hash
+        # Only the tail of the file is read; no need to re-parse the whole log
+        for record in self.file.iter_records_reversed():
+            if self.UPDATE_KEY not in record:
+                return record.get("hash", "")
+        return ""
+    
+    def chain_head(self, chain_id=None):
+        with self._lock:
+            # Camera chains can end far from the tail, so only the global chain is read backwards
+            if chain_id is not None or self._is_fresh():
+                return CachedFileStorage.chain_head(self, chain_id)
+        for record in self.file.iter_records_reversed():
+            if self.UPDATE_KEY not in record and record.get("chain_id") is None:
+                return record.get("hash", "")
+        return ""
+    
+    def import_entries(self, entries):
+        with self._lock:
+            self.file.replace_records(entries)
+            self._cached = None
+            self._update_scan = None
+    
+    def chain_ranges(self, count):
+        """Byte ranges of the file; each worker parses its own share of the lines"""
+        if not os.path.exists(self.path):
+            return []
+        size = os.path.getsize(self.path)
+        step = max(-(-size // count), JsonLinesFile.READ_BLOCK_SIZE)
+        return [
+            (JsonLinesStorage.read_entries, (self.path, start, min(start + step, size)))
+            for start in range(0, size, step)
+        ]
+    
+    @staticmethod
+    def read_entries(path, start, end):
+        """Chained entries in a byte range, without legacy update records"""
+        return [
+            record for record in JsonLinesFile.read_range(path, start, end)
+            if JsonLinesStorage.UPDATE_KEY not in record
+        ]
@@ -0,0 +1,96 @@
+"""
+Merkle Tree - Chunked Integrity Manifests
+Builds SHA-256 Merkle roots over fixed-size chunks of large evidence files,
+so chunks can be hashed in parallel and re-checked individually, and over
+evidence log entries, so single entries can be proven with inclusion proofs.
+"""
+
+import hashlib
+import json
+
+
+class MerkleTree:
+    """
+    SHA-256 Merkle tree helpers
+    Leaves and interior nodes use distinct prefixes so a leaf can never be
+    passed off as a node; an odd node at the end of a level is promoted as-is.
+    """
+    
+    LEAF_PREFIX = b"\x00"
+    NODE_PREFIX = b"\x01"
+    DIGEST_HEX_LENGTH = 64
+    
+    @classmethod
+    def leaf_hasher(cls):
+        """Return a hashlib object primed for hashing one leaf"""
+        return hashlib.sha256(cls.LEAF_PREFIX)
+    
+    @classmethod
+    def hash_node(cls, left, right):
+        """Hash two hex child digests into their parent digest"""
+        return hashlib.sha256(cls.NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+    
+    @classmethod
+    def root(cls, leaves):
+        """Compute the Merkle root of a list of hex leaf digests"""
+        if not leaves:
+            return cls.leaf_hasher().hexdigest()
+        
+        level = list(leaves)
+        while len(level) > 1:
+            next_level = []
+            for i in range(0, len(level) - 1, 2):
+                next_level.append(cls.hash_node(level[i], level[i + 1]))
+            if len(level) % 2:
+                next_level.append(level[-1])
+            level = next_level
+        return level[0]
+    
+    @classmethod
+    def entry_leaf(cls, entry):
+        """Leaf digest of an evidence log entry, over its canonical JSON encoding"""
+        encoded = json.dumps(entry, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        leaf = cls.leaf_hasher()
+        leaf.update(encoded.encode("utf-8"))
+        return leaf.hexdigest()
+    
+    @classmethod
+    def proof(cls, leaves, index):
+        """
+        Inclusion proof for leaves[index]: the sibling digests from the leaf up to
+        the root, as [side, digest] pairs where side is the sibling's position.
+        Levels where the node is promoted without a sibling add no step.
+        """
+        proof = []
+        level = list(leaves)
+        while len(level) > 1:
+            sibling = index ^ 1
+            if sibling < len(level):
+                proof.append(["left" if sibling < index else "right", level[sibling]])
+            next_level = []
+            for i in range(0, len(level) - 1, 2):
+                next_level.append(cls.hash_node(level[i], level[i + 1]))
+            if len(level) % 2:
+                next_level.append(level[-1])
+            level = next_level
+            index //= 2
+        return proof
+    
+    @classmethod
+    def verify_proof(cls, leaf, proof, root):
+        """Check that a leaf digest and its inclusion proof reproduce the root"""
+        digest = leaf
+        for side, sibling in proof:
+            digest = cls.hash_node(sibling, digest) if side == "left" else cls.hash_node(digest, sibling)
+        return digest == root
+    
+    @classmethod
+    def pack_leaves(cls, leaves):
+        """Pack hex leaf digests into one compact string for the evidence log"""
+        return "".join(leaves)
+    
+    @classmethod
+    def unpack_leaves(cls, packed):
+        """Split a packed leaf string back into hex leaf digests"""
+        size = cls.DIGEST_HEX_LENGTH
+        return [packed[i:i + size] for i in range(0, len(packed), size)]
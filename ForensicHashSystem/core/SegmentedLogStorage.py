@@ -0,0 +1,636 @@
+"""
+Segmented Evidence Log Storage
+Optional EvidenceLog storage engine that splits the chain into JSONL segments.
+The active segment rotates at an entry or size limit; sealed segments are
+immutable, recorded in a manifest with their entry count, chain hashes and
+Merkle root, and only parsed when a read actually needs them. Old sealed
+segments can be archived into block-compressed files that are read in place.
+"""
+
+import base64
+import hashlib
+import heapq
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from core.LogArchive import ArchiveFile
+from core.LogStorage import CachedFile, CustodyLog, JsonLinesFile, LogIndex, LogStorage
+from core.MerkleTree import MerkleTree
+
+
+class LogSegment(CachedFile):
+    """One segment file, JSONL or archived, served from a cached LogIndex"""
+    
+    def __init__(self, path):
+        archive_path = path + ArchiveFile.SUFFIX
+        if not os.path.exists(path) and os.path.exists(archive_path):
+            super().__init__(archive_path)
+            self.file = ArchiveFile(archive_path)
+        else:
+            super().__init__(path)
+            self.file = JsonLinesFile(path)
+    
+    @property
+    def archived(self):
+        return isinstance(self.file, ArchiveFile)
+    
+    def stale(self):
+        """True once the JSONL file this segment was opened on has been archived, possibly by another process"""
+        return not self.archived and not os.path.exists(self.path) and os.path.exists(self.path + ArchiveFile.SUFFIX)
+    
+    def _build_model(self):
+        return LogIndex(self.file.iter_records())
+    
+    def index(self):
+        return self._model()
+    
+    def append(self, entries):
+        self._write_through(
+            lambda: self.file.append_records(entries),
+            lambda index: [index.add(entry) for entry in entries]
+        )
+    
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+    
+    def chain_range(self):
+        """(reader, args) that parses the whole segment in a worker process"""
+        if self.archived:
+            return ArchiveFile.read_range, (self.path, 0, len(self.file.index()["blocks"]))
+        return JsonLinesFile.read_range, (self.path, 0, self.size())
+    
+    def digest(self):
+        """SHA-256 of the segment file, recorded when it is sealed; archives hash their original contents"""
+        if self.archived:
+            return self.file.digest()
+        sha256 = hashlib.sha256()
+        with open(self.path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(block)
+        return sha256.hexdigest()
+
+
+class KeyFilter:
+    """
+    Bloom filter over the file names and evidence UUIDs of a sealed segment,
+    stored in its manifest record so lookups of keys it does not hold skip the
+    segment unopened. 10 bits per key give about 1% false positives.
+    """
+    
+    BITS_PER_KEY = 10
+    HASH_COUNT = 7
+    
+    def __init__(self, size, bits):
+        self.size = size
+        self.bits = bits
+    
+    @staticmethod
+    def digest(key):
+        """Hash a key once; the same digest is tested against every segment's filter"""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+    
+    def _positions(self, digest):
+        first, step = digest
+        return ((first + i * step) % self.size for i in range(self.HASH_COUNT))
+    
+    @classmethod
+    def build(cls, keys):
+        keys = set(keys)
+        size = max(64, len(keys) * cls.BITS_PER_KEY)
+        key_filter = cls(size, bytearray(-(-size // 8)))
+        for key in keys:
+            for position in key_filter._positions(cls.digest(key)):
+                key_filter.bits[position >> 3] |= 1 << (position & 7)
+        return key_filter
+    
+    def may_contain(self, digest):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+    
+    def to_record(self):
+        return {"size": self.size, "bits": base64.b64encode(bytes(self.bits)).decode("ascii")}
+    
+    @classmethod
+    def from_record(cls, record):
+        return cls(record["size"], base64.b64decode(record["bits"]))
+    
+    @staticmethod
+    def name_key(file_name):
+        return f"name:{file_name}"
+    
+    @staticmethod
+    def uuid_key(evidence_uuid):
+        return f"uuid:{evidence_uuid}"
+    
+    @classmethod
+    def for_entries(cls, entries):
+        return cls.build(
+            key
+            for entry in entries
+            for key in (cls.name_key(entry.get("file_name")), cls.uuid_key(entry.get("evidence_uuid")))
+        )
+
+
+class SegmentManifest(CachedFile):
+    """
+    manifest.json listing the sealed segments in chain order and the active segment
+    Rewritten atomically; re-read only when another process changes it
+    """
+    
+    def _build_model(self):
+        if not os.path.exists(self.path):
+            return {"segments": [], "next_segment": 1}
+        with open(self.path, "r") as f:
+            return json.load(f)
+    
+    def read(self):
+        with self._lock:
+            return self._model()
+    
+    def write(self, manifest):
+        def write():
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(manifest, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        
+        with self._lock:
+            write()
+            self._cached = manifest
+            self._cached_signature = self._signature()
+
+
+class SegmentedStorage(LogStorage):
+    """
+    Evidence log split into rotating JSONL segments under one directory
+    Appends and last_hash only touch the active segment; lookups search the
+    active segment first and open sealed segments on demand, only those whose
+    key filter may hold the file name or UUID. At most max_open_segments
+    sealed segments stay parsed, least recently used first out.
+    """
+    
+    MANIFEST_FILE = "manifest.json"
+    
+    def __init__(self, path, custody_path, max_entries=10000, max_bytes=64 * 1024 * 1024, max_open_segments=8):
+        super().__init__(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_open_segments = max_open_segments
+        self.manifest = SegmentManifest(os.path.join(path, self.MANIFEST_FILE))
+        self.custody_log = CustodyLog(custody_path)
+        self._segments = OrderedDict()
+        # Decoded key filters of sealed segments, by segment name
+        self._filters = {}
+        self._lock = threading.RLock()
+    
+    @staticmethod
+    def segment_name(number):
+        return f"segment-{number:06d}.jsonl"
+    
+    def _segment(self, name):
+        segment = self._segments.get(name)
+        if segment is None or segment.stale():
+            segment = self._segments[name] = LogSegment(os.path.join(self.path, name))
+        self._segments.move_to_end(name)
+        # The active segment is used on every write and never evicted
+        active = self._active_name()
+        evictable = [cached for cached in self._segments if cached != active]
+        for evicted in evictable[:max(len(evictable) - self.max_open_segments, 0)]:
+            del self._segments[evicted]
+        return segment
+    
+    def _active_name(self):
+        return self.segment_name(self.manifest.read()["next_segment"])
+    
+    def _active(self):
+        return self._segment(self._active_name())
+    
+    def _sealed(self):
+        return self.manifest.read()["segments"]
+    
+    def _may_hold(self, record, digest):
+        if "keys" not in record:
+            # Sealed before key filters were recorded
+            return True
+        key_filter = self._filters.get(record["name"])
+        if key_filter is None:
+            key_filter = self._filters[record["name"]] = KeyFilter.from_record(record["keys"])
+        return key_filter.may_contain(digest)
+    
+    def _candidates(self, key, newest_first):
+        """The active segment and the sealed segments whose key filter may hold the key, opened as reached"""
+        digest = KeyFilter.digest(key)
+        sealed = [record for record in self._sealed() if self._may_hold(record, digest)]
+        if newest_first:
+            yield self._active()
+            for record in reversed(sealed):
+                yield self._segment(record["name"])
+        else:
+            for record in sealed:
+                yield self._segment(record["name"])
+            yield self._active()
+    
+    def _oldest_first(self):
+        for record in self._sealed():
+            yield self._segment(record["name"])
+        yield self._active()
+    
+    def exists(self):
+        return os.path.exists(self.manifest.path)
+    
+    def segments(self):
+        """Sealed segment records plus a summary of the active segment, in chain order"""
+        with self._lock:
+            active = self._active().index()
+            sealed = self._sealed()
+            return [
+                {**{key: value for key, value in record.items() if key != "keys"}, "sealed": True} for record in sealed
+            ] + [{
+                "name": self._active_name(),
+                "entry_count": len(active.entries),
+                "first_previous_hash": active.entries[0].get("previous_hash", "") if active.entries else "",
+                "last_hash": active.last_hash or (sealed[-1]["last_hash"] if sealed else ""),
+                "sealed": False
+            }]
+    
+    def load_segment(self, index):
+        with self._lock:
+            names = [record["name"] for record in self._sealed()] + [self._active_name()]
+            return [dict(entry) for entry in self._segment(names[index]).index().entries]
+    
+    def load(self):
+        with self._lock:
+            return [dict(entry) for segment in self._oldest_first() for entry in segment.index().entries]
+    
+    def iter_entries(self, reverse=False):
+        """Sealed segments are streamed from their files without being cached"""
+        with self._lock:
+            sealed = [self._segment(record["name"]).file for record in self._sealed()]
+            active = list(self._active().index().entries)
+        if reverse:
+            yield from (dict(entry) for entry in reversed(active))
+            for segment in reversed(sealed):
+                yield from segment.iter_records_reversed()
+        else:
+            for segment in sealed:
+                yield from segment.iter_records()
+            yield from (dict(entry) for entry in active)
+    
+    def entries_since(self, position):
+        """Entries from a chain position onwards; sealed segments before it are skipped unopened"""
+        with self._lock:
+            entries = []
+            start = 0
+            for record in self._sealed():
+                end = start + record["entry_count"]
+                if end > position:
+                    segment = self._segment(record["name"])
+                    if segment.archived:
+                        # Only the blocks from the position on are decompressed, and nothing is cached
+                        entries.extend(segment.file.iter_records(max(position - start, 0)))
+                    else:
+                        entries.extend(dict(entry) for entry in segment.index().entries[max(position - start, 0):])
+                start = end
+            active = self._active().index().entries
+            entries.extend(dict(entry) for entry in active[max(position - start, 0):])
+            return entries
+    
+    def chain_ranges(self, count):
+        """One range per segment file"""
+        with self._lock:
+            segments = [self._segment(record["name"]) for record in self._sealed()] + [self._active()]
+            return [segment.chain_range() for segment in segments if os.path.exists(segment.path)]
+    
+    def append(self, entries):
+        entries = [dict(entry) for entry in entries]
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            if not self.exists():
+                self.manifest.write(self.manifest.read())
+            active = self._active()
+            active.append(entries)
+            if len(active.index().entries) >= self.max_entries or active.size() >= self.max_bytes:
+                self._seal(active)
+    
+    def _seal(self, active):
+        """Record the active segment in the manifest and start a new one"""
+        index = active.index()
+        manifest = self.manifest.read()
+        record = {
+            "name": os.path.basename(active.path),
+            "entry_count": len(index.entries),
+            "first_previous_hash": index.entries[0].get("previous_hash", ""),
+            "last_hash": index.last_hash,
+            "first_timestamp": index.entries[0].get("timestamp", ""),
+            "last_timestamp": index.entries[-1].get("timestamp", ""),
+            "bytes": active.size(),
+            "sha256": active.digest(),
+            "chains": self._chain_summary(index),
+            **self._query_summary(index),
+            "keys": KeyFilter.for_entries(index.entries).to_record(),
+            "merkle_root": self.merkle_root(index.entries),
+            "sealed_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self.fsync_path(active.path)
+        self.manifest.write({
+            **manifest,
+            "segments": manifest["segments"] + [record],
+            "next_segment": manifest["next_segment"] + 1
+        })
+        print(f"[EVIDENCE LOG] Sealed {record['name']} ({record['entry_count']} entries)")
+    
+    @staticmethod
+    def merkle_root(entries):
+        return MerkleTree.root([MerkleTree.entry_leaf(dict(entry)) for entry in entries])
+    
+    @staticmethod
+    def _chain_summary(index):
+        """Last hash and entry count of each chain in a segment; the global chain is keyed by an empty string"""
+        chains = {
+            chain_id: {"hash": entries[-1].get("hash", ""), "count": len(entries)}
+            for chain_id, entries in index.by_chain.items()
+        }
+        if None in index.latest_by_chain:
+            chains[""] = {
+                "hash": index.latest_by_chain[None].get("hash", ""),
+                "count": len(index.entries) - sum(chain["count"] for chain in chains.values())
+            }
+        return chains
+    
+    def import_entries(self, entries):
+        entries = list(entries)
+        with self._lock:
+            self._remove_segments()
+            for start in range(0, len(entries), self.max_entries):
+                self.append(entries[start:start + self.max_entries])
+            if not entries:
+                self.append([])
+    
+    def _remove_segments(self):
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                if name.startswith("segment-") or name.startswith(self.MANIFEST_FILE):
+                    os.remove(os.path.join(self.path, name))
+        self._segments.clear()
+        self._filters.clear()
+        self.manifest._invalidate()
+    
+    def clear(self):
+        with self._lock:
+            self._remove_segments()
+            self.custody_log.clear()
+    
+    def paths(self):
+        return [self.manifest.path, self._active().path, self.custody_log.path]
+    
+    def last_hash(self):
+        with self._lock:
+            active = self._active().index()
+            if active.entries:
+                return active.last_hash
+            sealed = self._sealed()
+            return sealed[-1]["last_hash"] if sealed else ""
+    
+    def _find(self, key, newest_first, lookup):
+        with self._lock:
+            for segment in self._candidates(key, newest_first):
+                entry = lookup(segment.index())
+                if entry is not None:
+                    return dict(entry)
+            return None
+    
+    def chain_head(self, chain_id=None):
+        """Answered from the active segment or, failing that, the manifest, without opening sealed segments"""
+        with self._lock:
+            entry = self._active().index().latest_by_chain.get(chain_id)
+            if entry is not None:
+                return entry.get("hash", "")
+            key = "" if chain_id is None else chain_id
+            for record in reversed(self._sealed()):
+                if "chains" not in record:
+                    entry = self._segment(record["name"]).index().latest_by_chain.get(chain_id)
+                    if entry is not None:
+                        return entry.get("hash", "")
+                elif key in record["chains"]:
+                    return record["chains"][key]["hash"]
+            return ""
+    
+    def chain_entries(self, chain_id):
+        """Only sealed segments that contain the chain are opened"""
+        with self._lock:
+            entries = []
+            for record in self._sealed():
+                if "chains" not in record or chain_id in record["chains"]:
+                    entries.extend(dict(entry) for entry in self._segment(record["name"]).index().by_chain.get(chain_id, []))
+            entries.extend(dict(entry) for entry in self._active().index().by_chain.get(chain_id, []))
+            return entries
+    
+    def chain_heads(self):
+        with self._lock:
+            summaries = [
+                record["chains"] if "chains" in record else self._chain_summary(self._segment(record["name"]).index())
+                for record in self._sealed()
+            ]
+            summaries.append(self._chain_summary(self._active().index()))
+            heads = {}
+            for chains in summaries:
+                for chain_id, chain in chains.items():
+                    if chain_id:
+                        head = heads.setdefault(chain_id, {"hash": "", "count": 0})
+                        head["hash"] = chain["hash"]
+                        head["count"] += chain["count"]
+            return heads
+    
+    @staticmethod
+    def _query_summary(index):
+        """Time span and cameras of a segment, so queries can skip it without opening it"""
+        keys = index.by_time.keys
+        return {
+            "min_timestamp": keys[0][0] if keys else "",
+            "max_timestamp": keys[-1][0] if keys else "",
+            "cameras": sorted(camera_id for camera_id in index.by_time.by_camera if camera_id is not None)
+        }
+    
+    @staticmethod
+    def _may_match(record, camera_id, start, end):
+        if "min_timestamp" not in record:
+            return True
+        return (
+            (camera_id is None or camera_id in record["cameras"])
+            and (start is None or record["max_timestamp"] >= start)
+            and (end is None or record["min_timestamp"] < end)
+        )
+    
+    def query(self, camera_id=None, event_type=None, start=None, end=None):
+        """Each matching segment is searched through its own time index and the results merged"""
+        with self._lock:
+            runs = []
+            base = 0
+            segments = [(record, self._segment(record["name"])) for record in self._sealed()]
+            for record, segment in segments + [(None, self._active())]:
+                if record is None or self._may_match(record, camera_id, start, end):
+                    index = segment.index()
+                    runs.append([
+                        ((index.entries[position].get("timestamp") or "", base + position), index.entries[position])
+                        for position in index.by_time.positions(camera_id, start, end)
+                    ])
+                base += record["entry_count"] if record is not None else 0
+        return (
+            dict(entry) for _, entry in heapq.merge(*runs, key=lambda item: item[0])
+            if event_type is None or entry.get("event_type") == event_type
+        )
+    
+    def find_entry(self, file_name, camera_id):
+        return self._find(
+            KeyFilter.name_key(file_name), True, lambda index: index.latest_by_file_camera.get((file_name, camera_id))
+        )
+    
+    def find_entry_by_filename(self, file_name):
+        return self._find(KeyFilter.name_key(file_name), True, lambda index: index.latest_by_file.get(file_name))
+    
+    def find_entry_by_uuid(self, evidence_uuid):
+        return self._find(KeyFilter.uuid_key(evidence_uuid), False, lambda index: index.entry_by_uuid(evidence_uuid))
+    
+    def find_original_entry(self, file_name):
+        return self._find(KeyFilter.name_key(file_name), False, lambda index: index.original_by_file.get(file_name))
+    
+    def compact(self):
+        """
+        Merge runs of small sealed segments into segments of up to max_entries,
+        rewriting them in canonical form. Each segment is checked against its
+        manifest record first, and a segment that does not match is left alone.
+        Returns how many sealed segments were eliminated.
+        """
+        with self._lock:
+            manifest = self.manifest.read()
+            sealed = manifest["segments"]
+            merged, group, removed = [], [], []
+            
+            def close_group():
+                if len(group) > 1:
+                    merged.append(self._merge(group))
+                    removed.extend(record["name"] for record in group)
+                else:
+                    merged.extend(group)
+                group.clear()
+            
+            for record in sealed:
+                if "archived" in record:
+                    # Archived history stays compressed
+                    close_group()
+                    merged.append(record)
+                    continue
+                if not self._matches_manifest(record):
+                    print(f"[EVIDENCE LOG] {record['name']} does not match the manifest; not compacting it")
+                    close_group()
+                    merged.append(record)
+                    continue
+                if sum(r["entry_count"] for r in group) + record["entry_count"] > self.max_entries:
+                    close_group()
+                group.append(record)
+            close_group()
+            
+            if not removed:
+                return 0
+            self.manifest.write({**manifest, "segments": merged})
+            for name in removed:
+                os.remove(os.path.join(self.path, name))
+                self._segments.pop(name, None)
+                self._filters.pop(name, None)
+            return len(sealed) - len(merged)
+    
+    def archive(self, keep=0, codec="lzma", block_entries=256):
+        """
+        Compress sealed segments into block-indexed archives, leaving the newest
+        `keep` sealed segments as JSONL. Each segment is checked against its
+        manifest record first, and a segment that does not match is left alone.
+        Returns how many segments were archived.
+        """
+        with self._lock:
+            manifest = self.manifest.read()
+            sealed = manifest["segments"]
+            records, archived = [], []
+            for number, record in enumerate(sealed):
+                if number >= len(sealed) - keep or "archived" in record:
+                    records.append(record)
+                    continue
+                if not self._matches_manifest(record):
+                    print(f"[EVIDENCE LOG] {record['name']} does not match the manifest; not archiving it")
+                    records.append(record)
+                    continue
+                segment = self._segment(record["name"])
+                archive_path = segment.path + ArchiveFile.SUFFIX
+                index = ArchiveFile.write(archive_path, segment.path, codec, block_entries)
+                if ArchiveFile(archive_path).digest() != record["sha256"]:
+                    os.remove(archive_path)
+                    raise ValueError(f"Archive of {record['name']} does not reproduce the sealed segment")
+                self.fsync_path(archive_path)
+                records.append({**record, "archived": {
+                    "file": os.path.basename(archive_path),
+                    "codec": codec,
+                    "bytes": os.path.getsize(archive_path),
+                    "blocks": len(index["blocks"]),
+                    "archived_at": time.strftime("%Y-%m-%d %H:%M:%S")
+                }})
+                archived.append(segment.path)
+            
+            if not archived:
+                return 0
+            self.manifest.write({**manifest, "segments": records})
+            # The JSONL files are only removed once the manifest points at the archives
+            for path in archived:
+                os.remove(path)
+                self._segments.pop(os.path.basename(path), None)
+            print(f"[EVIDENCE LOG] Archived {len(archived)} sealed segment(s)")
+            return len(archived)
+    
+    def _matches_manifest(self, record):
+        segment = self._segment(record["name"])
+        return os.path.exists(segment.path) and segment.digest() == record["sha256"]
+    
+    def _merge(self, group):
+        """Write a group of consecutive sealed segments as one new sealed segment"""
+        entries = [dict(entry) for record in group for entry in self._segment(record["name"]).index().entries]
+        # Merged segments are named after the range of segment numbers they cover
+        first = group[0]["name"][len("segment-"):-len(".jsonl")].split("-")[0]
+        last = group[-1]["name"][len("segment-"):-len(".jsonl")].split("-")[-1]
+        name = f"segment-{first}-{last}.jsonl"
+        segment = LogSegment(os.path.join(self.path, name))
+        segment.file.replace_records(entries)
+        self._segments[name] = segment
+        return {
+            **group[0],
+            "name": name,
+            "entry_count": len(entries),
+            "last_hash": group[-1]["last_hash"],
+            "last_timestamp": group[-1]["last_timestamp"],
+            "bytes": segment.size(),
+            "sha256": segment.digest(),
+            "chains": self._chain_summary(segment.index()),
+            **self._query_summary(segment.index()),
+            "keys": KeyFilter.for_entries(entries).to_record(),
+            "merkle_root": self.merkle_root(entries),
+            # Proofs exported before compaction still refer to the roots of every segment
+            # merged into this one, including those of earlier compactions; the lists align
+            "compacted_from": [name for record in group for name in [*record.get("compacted_from", []), record["name"]]],
+            "compacted_roots": [
+                root for record in group for root in [*record.get("compacted_roots", []), record.get("merkle_root")]
+            ],
+            "compacted_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+    
+    def append_custody(self, events):
+        self.custody_log.append(events)
+    
+    def custody(self, evidence_uuid):
+        return self.custody_log.events_for(evidence_uuid)
+    
+    def all_custody(self):
+        return self.custody_log.all_events()
+    
+    def import_custody(self, events):
+        self.custody_log.replace(events)
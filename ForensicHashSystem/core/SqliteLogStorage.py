@@ -0,0 +1,262 @@
+"""
+SQLite Evidence Log Storage
+Optional EvidenceLog storage engine on the stdlib sqlite3 module, running in
+WAL mode with indexes so lookups do not scan the whole log.
+"""
+
+import json
+import sqlite3
+import threading
+from core.LogStorage import LogStorage
+
+
+class SqliteStorage(LogStorage):
+    """
+    Evidence log stored in an indexed SQLite table
+    Each row keeps the full entry as JSON next to the indexed columns;
+    custody events live in their own table keyed by evidence UUID
+    """
+    
+    INDEXED_FIELDS = ("evidence_uuid", "file_name", "camera_id", "event_type", "timestamp", "chain_id")
+    ATOMIC_IMPORT = True
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            position INTEGER PRIMARY KEY AUTOINCREMENT,
+            evidence_uuid TEXT,
+            file_name TEXT,
+            camera_id TEXT,
+            event_type TEXT,
+            timestamp TEXT,
+            chain_id TEXT,
+            hash TEXT,
+            previous_hash TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_uuid ON entries (evidence_uuid, position);
+        CREATE INDEX IF NOT EXISTS idx_entries_file ON entries (file_name, camera_id, position);
+        CREATE INDEX IF NOT EXISTS idx_entries_camera ON entries (camera_id, position);
+        CREATE INDEX IF NOT EXISTS idx_entries_camera_time ON entries (camera_id, timestamp, position);
+        CREATE INDEX IF NOT EXISTS idx_entries_event ON entries (event_type, position);
+        CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries (timestamp, position);
+        CREATE INDEX IF NOT EXISTS idx_entries_chain ON entries (chain_id, position);
+        CREATE TABLE IF NOT EXISTS custody (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            evidence_uuid TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_custody_uuid ON custody (evidence_uuid, id);
+    """
+    
+    def __init__(self, path):
+        super().__init__(path)
+        # sqlite3 connections must not be shared between threads
+        self._local = threading.local()
+    
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            # Databases created before per-camera chains lack the chain_id column
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(entries)")}
+            if columns and "chain_id" not in columns:
+                with connection:
+                    connection.execute("ALTER TABLE entries ADD COLUMN chain_id TEXT")
+                    connection.execute("UPDATE entries SET chain_id = json_extract(data, '$.chain_id')")
+            connection.executescript(self.SCHEMA)
+            self._local.connection = connection
+        return connection
+    
+    def exists(self):
+        return self._connection().execute("SELECT 1 FROM entries LIMIT 1").fetchone() is not None
+    
+    @staticmethod
+    def _encode(value):
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    
+    @staticmethod
+    def _row(entry):
+        return (
+            *(entry.get(field) for field in SqliteStorage.INDEXED_FIELDS),
+            entry.get("hash"),
+            entry.get("previous_hash"),
+            SqliteStorage._encode(entry)
+        )
+    
+    def _fetch_one(self, sql, parameters):
+        row = self._connection().execute(sql, parameters).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def load(self):
+        rows = self._connection().execute("SELECT data FROM entries ORDER BY position")
+        return [json.loads(data) for (data,) in rows]
+    
+    def iter_entries(self, reverse=False):
+        rows = self._connection().execute(f"SELECT data FROM entries ORDER BY position {'DESC' if reverse else 'ASC'}")
+        return (json.loads(data) for (data,) in rows)
+    
+    def entries_since(self, position):
+        rows = self._connection().execute(
+            "SELECT data FROM entries ORDER BY position LIMIT -1 OFFSET ?", (position,)
+        )
+        return [json.loads(data) for (data,) in rows]
+    
+    def chain_ranges(self, count):
+        """Position ranges, each read by the worker over its own connection"""
+        total = self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        step = max(-(-total // count), 1)
+        return [(SqliteStorage.read_rows, (self.path, offset, step)) for offset in range(0, total, step)]
+    
+    @staticmethod
+    def read_rows(path, offset, limit):
+        connection = sqlite3.connect(path, timeout=30)
+        try:
+            rows = connection.execute("SELECT data FROM entries ORDER BY position LIMIT ? OFFSET ?", (limit, offset))
+            return [json.loads(data) for (data,) in rows]
+        finally:
+            connection.close()
+    
+    def append(self, entries):
+        connection = self._connection()
+        with connection:
+            self._insert_entries(connection, entries)
+    
+    def _insert_entries(self, connection, entries):
+        connection.executemany(
+            "INSERT INTO entries (evidence_uuid, file_name, camera_id, event_type, timestamp, chain_id, "
+            "hash, previous_hash, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [self._row(entry) for entry in entries]
+        )
+    
+    def import_entries(self, entries):
+        """Replace the stored log with the given entries (used for migration), in one transaction"""
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM entries")
+            self._insert_entries(connection, entries)
+    
+    def append_custody(self, events):
+        connection = self._connection()
+        with connection:
+            self._insert_custody(connection, events)
+    
+    def _insert_custody(self, connection, events):
+        connection.executemany(
+            "INSERT INTO custody (evidence_uuid, kind, data) VALUES (?, ?, ?)",
+            [(evidence_uuid, kind, self._encode(record)) for evidence_uuid, kind, record in events]
+        )
+    
+    def commit(self, entries, events):
+        """Write entries and custody events in one transaction that is fsynced on commit"""
+        connection = self._connection()
+        # synchronous=FULL makes this connection's commits durable; other writers keep NORMAL
+        connection.execute("PRAGMA synchronous=FULL")
+        with connection:
+            self._insert_entries(connection, entries)
+            self._insert_custody(connection, events)
+    
+    def sync(self):
+        """Commits made through commit() are already durable"""
+    
+    def custody(self, evidence_uuid):
+        events = {}
+        rows = self._connection().execute(
+            "SELECT kind, data FROM custody WHERE evidence_uuid = ? ORDER BY id", (evidence_uuid,)
+        )
+        for kind, data in rows:
+            events.setdefault(kind, []).append(json.loads(data))
+        return events
+    
+    def all_custody(self):
+        events = {}
+        for evidence_uuid, kind, data in self._connection().execute("SELECT evidence_uuid, kind, data FROM custody ORDER BY id"):
+            events.setdefault(evidence_uuid, {}).setdefault(kind, []).append(json.loads(data))
+        return events
+    
+    def import_custody(self, events):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM custody")
+            self._insert_custody(connection, events)
+    
+    def import_log(self, entries, events):
+        """Replace entries and custody events in one transaction"""
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM entries")
+            connection.execute("DELETE FROM custody")
+            self._insert_entries(connection, entries)
+            self._insert_custody(connection, events)
+    
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM entries")
+            connection.execute("DELETE FROM custody")
+    
+    def last_hash(self):
+        row = self._connection().execute("SELECT hash FROM entries ORDER BY position DESC LIMIT 1").fetchone()
+        return (row[0] or "") if row else ""
+    
+    def chain_head(self, chain_id=None):
+        row = self._connection().execute(
+            "SELECT hash FROM entries WHERE chain_id IS ? ORDER BY position DESC LIMIT 1", (chain_id,)
+        ).fetchone()
+        return (row[0] or "") if row else ""
+    
+    def chain_entries(self, chain_id):
+        rows = self._connection().execute(
+            "SELECT data FROM entries WHERE chain_id = ? ORDER BY position", (chain_id,)
+        )
+        return [json.loads(data) for (data,) in rows]
+    
+    def chain_heads(self):
+        rows = self._connection().execute(
+            "SELECT chains.chain_id, chains.count, entries.hash FROM ("
+            "SELECT chain_id, COUNT(*) AS count, MAX(position) AS last FROM entries "
+            "WHERE chain_id IS NOT NULL GROUP BY chain_id"
+            ") AS chains JOIN entries ON entries.position = chains.last"
+        )
+        return {chain_id: {"hash": hash_value or "", "count": count} for chain_id, count, hash_value in rows}
+    
+    def find_entry(self, file_name, camera_id):
+        return self._fetch_one(
+            "SELECT data FROM entries WHERE file_name = ? AND camera_id = ? ORDER BY position DESC LIMIT 1",
+            (file_name, camera_id)
+        )
+    
+    def find_entry_by_filename(self, file_name):
+        return self._fetch_one(
+            "SELECT data FROM entries WHERE file_name = ? ORDER BY position DESC LIMIT 1",
+            (file_name,)
+        )
+    
+    def find_entry_by_uuid(self, evidence_uuid):
+        return self._fetch_one(
+            "SELECT data FROM entries WHERE evidence_uuid = ? ORDER BY position LIMIT 1",
+            (evidence_uuid,)
+        )
+    
+    def find_original_entry(self, file_name):
+        return self._fetch_one(
+            "SELECT data FROM entries WHERE file_name = ? AND event_type = 'CREATE' ORDER BY position LIMIT 1",
+            (file_name,)
+        )
+    
+    def query(self, camera_id=None, event_type=None, start=None, end=None):
+        conditions, parameters = [], []
+        for condition, value in (
+            ("camera_id = ?", camera_id),
+            ("event_type = ?", event_type),
+            ("timestamp >= ?", start),
+            ("timestamp < ?", end)
+        ):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = self._connection().execute(f"SELECT data FROM entries {where}ORDER BY timestamp, position", parameters)
+        return (json.loads(data) for (data,) in rows)
@@ -0,0 +1,101 @@
+"""
+Shared fixtures: every test runs in its own working directory, because the
+evidence log, configuration and caches all live in files relative to it.
+"""
+
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.AlertSystem import AlertSystem
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+from core.ForensicHasher import ForensicHasher
+from core.HashCache import HashCache
+
+LOG_FORMATS = ["json", "jsonl", "sqlite", "segmented", "binary"]
+
+
+def reset_state():
+    """Forget everything the core classes cache between calls"""
+    for writer in EvidenceLog._writers.values():
+        writer.flush()
+    for allocator in EvidenceLog._camera_ids.values():
+        # While the test's directory is still current; otherwise atexit releases into the wrong one
+        allocator.release()
+    if EvidenceLog._service is not None:
+        EvidenceLog._service.stop()
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    EvidenceLog._camera_ids = {}
+    EvidenceLog._service = None
+    EvidenceLog._unanchored = 0
+    Config._cached = None
+    with HashCache._lock:
+        if HashCache._flush_timer is not None:
+            HashCache._flush_timer.cancel()
+            HashCache._flush_timer = None
+        HashCache._entries = None
+        HashCache._keys_by_path = {}
+    AlertSystem._alerts = []
+
+
+@pytest.fixture(autouse=True)
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    reset_state()
+    yield tmp_path
+    reset_state()
+
+
+@pytest.fixture(params=LOG_FORMATS)
+def log_format(request):
+    """Run a test once per evidence log storage engine"""
+    Config.set("evidence_log_format", request.param)
+    if request.param == "segmented":
+        # Small segments so a handful of entries spans several of them
+        Config.set("segment_max_entries", 3)
+    return request.param
+
+
+def write_file(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    # Outside the hash cache's racy window, so hashes of it are cached
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 * 1000 * 1000 * 1000))
+    return os.path.abspath(path)
+
+
+def acquire(path, camera_id=None):
+    """Hash a file and commit its evidence entry, the way the acquisition UI does"""
+    hash_value, context, camera_id = ForensicHasher.generate_hash(path, camera_id)
+    EvidenceLog.save_entry(context, hash_value)
+    return hash_value, context, camera_id
+
+
+def make_context(i, camera_id="CAM-1001", event_type="CREATE", timestamp=None):
+    return {
+        "evidence_uuid": EvidenceLog.generate_evidence_uuid(),
+        "file_name": f"clip{i:03d}.mp4",
+        "file_size": 1000 + i,
+        "camera_id": camera_id,
+        "event_type": event_type,
+        "timestamp": timestamp or f"2026-01-01 00:{i // 60 % 60:02d}:{i % 60:02d}",
+        "previous_hash": "",
+        "fingerprint": hashlib.sha256(f"clip{i:03d}.mp4".encode()).hexdigest(),
+        "original_location": f"/evidence/clip{i:03d}.mp4",
+        "current_location": f"/evidence/clip{i:03d}.mp4",
+        "chain_id": EvidenceLog.chain_id(camera_id)
+    }
+
+
+def save(count, start=0, **kwargs):
+    """Commit `count` entries through the single writer; returns their hashes"""
+    pairs = [(make_context(i, **kwargs), hashlib.sha256(f"content {i}".encode()).hexdigest()) for i in range(start, start + count)]
+    EvidenceLog.save_entries(pairs)
+    return [hash_value for _, hash_value in pairs]
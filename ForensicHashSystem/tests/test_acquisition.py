@@ -0,0 +1,55 @@
+import hashlib
+import os
+
+from conftest import write_file
+from core.EvidenceLog import EvidenceLog
+from core.ForensicHasher import ForensicHasher
+
+
+def make_directory(tmp_path, count=6):
+    directory = tmp_path / "incoming"
+    directory.mkdir()
+    contents = {}
+    for i in range(count):
+        data = os.urandom(1000 + i)
+        write_file(directory / f"clip{i:02d}.mp4", data)
+        contents[f"clip{i:02d}.mp4"] = data
+    # Not evidence: filtered out by extension
+    write_file(directory / "notes.txt", b"ignore me")
+    return str(directory), contents
+
+
+def test_acquire_batch_hashes_directory_in_name_order(tmp_path):
+    directory, contents = make_directory(tmp_path)
+    results, stats = ForensicHasher.acquire_batch(directory, workers=2)
+    assert stats["files"] == len(contents)
+    assert stats["bytes"] == sum(len(data) for data in contents.values())
+    assert [context["file_name"] for _, context, _ in results] == sorted(contents)
+    for hash_value, context, _ in results:
+        assert hash_value == hashlib.sha256(contents[context["file_name"]]).hexdigest()
+
+
+def test_acquire_batch_chains_entries_in_order(tmp_path):
+    directory, _ = make_directory(tmp_path)
+    results, _ = ForensicHasher.acquire_batch(directory, workers=3)
+    entries = EvidenceLog.load_log()
+    assert [entry["hash"] for entry in entries] == [hash_value for hash_value, _, _ in results]
+    valid, message, _ = EvidenceLog.verify_hash_chain(full=True)
+    assert valid, message
+    assert all(len(entry["access_log"]) == 1 for entry in entries)
+
+
+def test_acquire_batch_records_modify_for_known_files(tmp_path):
+    directory, _ = make_directory(tmp_path, count=2)
+    ForensicHasher.acquire_batch(directory, workers=1)
+    write_file(os.path.join(directory, "clip00.mp4"), b"changed")
+    results, _ = ForensicHasher.acquire_batch([os.path.join(directory, "clip00.mp4")], workers=1)
+    (_, context, camera_id), = results
+    assert context["event_type"] == "MODIFY"
+    assert camera_id == EvidenceLog.find_original_entry("clip00.mp4")["camera_id"]
+
+
+def test_acquire_batch_of_nothing():
+    results, stats = ForensicHasher.acquire_batch([])
+    assert results == []
+    assert stats["files"] == 0
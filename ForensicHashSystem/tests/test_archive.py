@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+import verify_evidence_proof
+from conftest import save
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+from core.LogArchive import ArchiveFile
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "segment.jsonl"
+    records = [{"n": n, "file_name": f"clip{n:03d}.mp4"} for n in range(25)]
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return str(path), records
+
+
+@pytest.mark.parametrize("codec", sorted(ArchiveFile.CODECS))
+def test_archive_reads_back_the_segment(source, codec):
+    path, records = source
+    index = ArchiveFile.write(path + ArchiveFile.SUFFIX, path, codec=codec, block_entries=10)
+    assert [block[:2] for block in index["blocks"]] == [[0, 10], [10, 10], [20, 5]]
+    archive = ArchiveFile(path + ArchiveFile.SUFFIX)
+    assert archive.count() == 25
+    assert list(archive.iter_records()) == records
+    assert list(archive.iter_records(start=13)) == records[13:]
+    assert list(archive.iter_records_reversed()) == records[::-1]
+    with open(path, "rb") as f:
+        assert archive.digest() == hashlib.sha256(f.read()).hexdigest()
+    assert os.path.getsize(path + ArchiveFile.SUFFIX) < os.path.getsize(path)
+
+
+def test_single_record_decompresses_one_block(source, monkeypatch):
+    path, records = source
+    ArchiveFile.write(path + ArchiveFile.SUFFIX, path, codec="zlib", block_entries=10)
+    archive = ArchiveFile(path + ArchiveFile.SUFFIX)
+    read = []
+    read_blocks = archive._read_blocks
+    monkeypatch.setattr(archive, "_read_blocks", lambda numbers: read.extend(numbers) or read_blocks(numbers))
+    assert archive.record(17) == records[17]
+    assert read == [1]
+    with pytest.raises(IndexError):
+        archive.record(25)
+
+
+def test_unknown_codec_is_refused(source):
+    path, _ = source
+    with pytest.raises(ValueError):
+        ArchiveFile.write(path + ArchiveFile.SUFFIX, path, codec="snappy")
+    assert not os.path.exists(path + ArchiveFile.SUFFIX)
+
+
+@pytest.fixture
+def archived_log():
+    Config.set("evidence_log_format", "segmented")
+    Config.set("segment_max_entries", 3)
+    Config.set("archive_codec", "zlib")
+    Config.set("archive_block_entries", 2)
+    hashes = [hash_value for i in range(10) for hash_value in save(1, start=i)]
+    before = EvidenceLog.load_log()
+    assert EvidenceLog.archive_log(keep=1) == 2
+    return hashes, before
+
+
+def test_archived_history_reads_transparently(archived_log):
+    hashes, before = archived_log
+    names = sorted(os.listdir(EvidenceLog.SEGMENT_DIR))
+    assert "segment-000001.jsonl" not in names
+    assert "segment-000001.jsonl" + ArchiveFile.SUFFIX in names
+    assert "segment-000003.jsonl" in names
+    assert [segment.get("archived", {}).get("codec") for segment in EvidenceLog.list_segments()] == ["zlib", "zlib", None, None]
+
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    assert EvidenceLog.load_log() == before
+    assert list(EvidenceLog.iter_entries(reverse=True)) == before[::-1]
+    assert EvidenceLog.find_entry_by_filename("clip001.mp4")["hash"] == hashes[1]
+    assert [entry["file_name"] for entry in EvidenceLog.query(end="2026-01-01 00:00:02")] == ["clip000.mp4", "clip001.mp4"]
+
+
+def test_archived_history_verifies(archived_log):
+    for parallel in (False, True):
+        valid, message, _ = EvidenceLog.verify_hash_chain(full=True, parallel=parallel, workers=2)
+        assert valid, message
+    EvidenceLog.export_evidence_proof("export.json")
+    with open("export.json", encoding="utf-8") as f:
+        assert verify_evidence_proof.verify_export(json.load(f))[0]
+    # Archived segments stay as they are when the log is compacted
+    Config.set("segment_max_entries", 9)
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    assert EvidenceLog.compact_log() == 0
+
+
+def test_segments_that_do_not_match_the_manifest_are_not_archived():
+    Config.set("evidence_log_format", "segmented")
+    Config.set("segment_max_entries", 3)
+    for i in range(7):
+        save(1, start=i)
+    with open(os.path.join(EvidenceLog.SEGMENT_DIR, "segment-000001.jsonl"), "a") as f:
+        f.write(json.dumps({"file_name": "inserted.mp4"}) + "\n")
+    assert EvidenceLog.archive_log(keep=0) == 1
+    names = os.listdir(EvidenceLog.SEGMENT_DIR)
+    assert "segment-000001.jsonl" in names
+    assert "segment-000002.jsonl" + ArchiveFile.SUFFIX in names
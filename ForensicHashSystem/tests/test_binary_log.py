@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+from conftest import make_context, save
+from core.BinaryLogStorage import BinaryStorage
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+
+
+@pytest.fixture
+def binary():
+    Config.set("evidence_log_format", "binary")
+
+
+def open_storage():
+    return BinaryStorage(EvidenceLog.BINARY_LOG_FILE, EvidenceLog.CUSTODY_LOG_FILE)
+
+
+@pytest.mark.parametrize("entry", [
+    {
+        "evidence_uuid": "0b7f6d52-3c1e-4f7a-9a55-2d9c1f0e8b11", "file_name": "clip001.mp4", "file_size": 1001,
+        "camera_id": "CAM-1001", "event_type": "CREATE", "timestamp": "2026-01-01 00:00:01",
+        "chain_id": None, "hash": "ab" * 32, "previous_hash": ""
+    },
+    # Values outside the fixed layout go to the JSON trailer unchanged
+    {"hash": "AB" * 32, "previous_hash": "not a digest", "file_size": True, "file_name": "caméra 1.mp4"},
+    {"hash": None, "file_size": 2 ** 70, "digests": {"md5": "0" * 32}, "merkle": {"leaf_count": 3}},
+    {}
+])
+def test_records_round_trip_exactly(entry):
+    record = BinaryStorage.encode(entry)
+    decoded, end = BinaryStorage.decode(record, 0)
+    assert decoded == entry
+    assert end == len(record)
+
+
+def test_records_are_smaller_than_the_json_log(binary):
+    save(50)
+    # The same entries in the JSON array layout of the original log
+    EvidenceLog.export_log_json("evidence_log_export.json")
+    assert os.path.getsize(EvidenceLog.BINARY_LOG_FILE) * 2 < os.path.getsize("evidence_log_export.json")
+
+
+def test_records_are_read_by_position(binary):
+    hashes = save(20)
+    storage = open_storage()
+    assert storage.count() == 20
+    assert storage.record(7)["hash"] == hashes[7]
+    assert storage.record(-1)["hash"] == hashes[-1]
+    with pytest.raises(IndexError):
+        storage.record(20)
+    assert [entry["hash"] for entry in storage.iter_entries(reverse=True)] == hashes[::-1]
+
+
+def test_torn_tail_is_ignored_and_overwritten(binary):
+    hashes = save(3)
+    record = BinaryStorage.encode({**make_context(3), "hash": "c" * 64})
+    with open(EvidenceLog.BINARY_LOG_FILE, "ab") as f:
+        f.write(record[:len(record) // 2])
+    storage = open_storage()
+    assert [entry["hash"] for entry in storage.load()] == hashes
+    storage.append([{**make_context(4), "hash": "d" * 64}])
+    assert [entry["hash"] for entry in open_storage().load()] == [*hashes, "d" * 64]
+
+
+def test_records_beyond_the_offset_index_are_found(binary):
+    hashes = save(5)
+    # The writer died after writing records but before extending the index
+    with open(EvidenceLog.BINARY_LOG_FILE + ".idx", "r+b") as f:
+        f.truncate(8 + 2 * BinaryStorage.OFFSET.size)
+    storage = open_storage()
+    assert [entry["hash"] for entry in storage.load()] == hashes
+    storage.append([{**make_context(5), "hash": "e" * 64}])
+    assert open_storage().record(5)["hash"] == "e" * 64
+    assert os.path.getsize(EvidenceLog.BINARY_LOG_FILE + ".idx") == 8 + 6 * BinaryStorage.OFFSET.size
+
+
+def test_offset_index_of_a_replaced_log_is_ignored(binary):
+    save(5)
+    with open(EvidenceLog.BINARY_LOG_FILE + ".idx", "rb") as f:
+        stale_index = f.read()
+    open_storage().import_entries([{**make_context(9), "hash": "f" * 64}])
+    with open(EvidenceLog.BINARY_LOG_FILE + ".idx", "wb") as f:
+        f.write(stale_index)
+    assert [entry["hash"] for entry in open_storage().load()] == ["f" * 64]
+
+
+def test_json_export_matches_the_log(binary):
+    save(4)
+    assert EvidenceLog.export_log_json("export.json") == 4
+    with open("export.json") as f:
+        assert json.load(f) == EvidenceLog.load_log()
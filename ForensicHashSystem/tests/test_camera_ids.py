@@ -0,0 +1,103 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from core.CameraIdAllocator import CameraIdAllocator
+from core.EvidenceLog import EvidenceLog
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ALLOCATE = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from core.CameraIdAllocator import CameraIdAllocator
+allocator = CameraIdAllocator("camera_counter.json", block_size=4)
+print(" ".join(str(allocator.allocate()) for _ in range(int(sys.argv[2]))))
+allocator.release()
+"""
+
+
+def read_counter():
+    with open(EvidenceLog.CAMERA_COUNTER_FILE) as f:
+        return json.load(f)["counter"]
+
+
+def test_ids_are_sequential_and_reserved_in_blocks():
+    allocator = CameraIdAllocator(EvidenceLog.CAMERA_COUNTER_FILE, block_size=4)
+    assert [allocator.allocate() for _ in range(5)] == [1001, 1002, 1003, 1004, 1005]
+    # The counter records the end of the second block, not every allocation
+    assert read_counter() == 1008
+
+
+def test_release_returns_the_unused_block():
+    allocator = CameraIdAllocator(EvidenceLog.CAMERA_COUNTER_FILE, block_size=4)
+    allocator.allocate()
+    allocator.release()
+    assert read_counter() == 1001
+    assert CameraIdAllocator(EvidenceLog.CAMERA_COUNTER_FILE).allocate() == 1002
+
+
+def test_release_keeps_blocks_reserved_after_it():
+    first = CameraIdAllocator(EvidenceLog.CAMERA_COUNTER_FILE, block_size=4)
+    second = CameraIdAllocator(EvidenceLog.CAMERA_COUNTER_FILE, block_size=4)
+    assert first.allocate() == 1001
+    assert second.allocate() == 1005
+    # Giving back 1002-1004 would let the next block overlap the second allocator's
+    first.release()
+    assert read_counter() == 1008
+
+
+def test_threads_never_share_an_id():
+    numbers = []
+    lock = threading.Lock()
+
+    def allocate():
+        for _ in range(50):
+            camera_id = EvidenceLog.generate_camera_id()
+            with lock:
+                numbers.append(camera_id)
+
+    threads = [threading.Thread(target=allocate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(numbers)) == 400
+    assert len(EvidenceLog._camera_ids) == 1
+
+
+def test_processes_never_share_an_id(workspace):
+    processes = [
+        subprocess.Popen([sys.executable, "-c", ALLOCATE, ROOT, "25"], cwd=workspace, stdout=subprocess.PIPE, text=True)
+        for _ in range(4)
+    ]
+    numbers = []
+    for process in processes:
+        output, _ = process.communicate(timeout=60)
+        assert process.returncode == 0
+        numbers.extend(int(number) for number in output.split())
+    assert len(numbers) == len(set(numbers)) == 100
+
+
+def test_reset_restarts_numbering():
+    assert EvidenceLog.generate_camera_id() == "CAM-1001"
+    assert EvidenceLog.generate_camera_id() == "CAM-1002"
+    EvidenceLog.reset_camera_ids()
+    with open(EvidenceLog.CAMERA_COUNTER_FILE) as f:
+        assert json.load(f) == {"counter": 1000, "generation": 1}
+    assert EvidenceLog.generate_camera_id() == "CAM-1001"
+
+
+def test_reset_invalidates_blocks_held_elsewhere():
+    first = CameraIdAllocator(EvidenceLog.CAMERA_COUNTER_FILE, block_size=4)
+    second = CameraIdAllocator(EvidenceLog.CAMERA_COUNTER_FILE, block_size=4)
+    assert first.allocate() == 1001
+    assert second.allocate() == 1005
+    first.reset()
+    # The second allocator's block is from before the reset; carrying on from
+    # 1006 would collide with blocks reserved in the new numbering
+    numbers = [second.allocate() for _ in range(3)] + [first.allocate() for _ in range(8)]
+    assert len(set(numbers)) == len(numbers)
+    assert numbers[:3] == [1001, 1002, 1003]
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+
+import pytest
+
+from conftest import make_context, save
+from core.AnchorChain import AnchorChain
+from core.ChainVerifier import ChainVerifier
+from core.Config import Config
+from core.LogStorage import CachedFileStorage
+from core.EvidenceLog import EvidenceLog
+from core.ForensicReportGenerator import ForensicReportGenerator
+
+
+def append_unlinked(i, previous_hash="f" * 64):
+    """Write an entry whose previous_hash does not match the head, bypassing the linking writer"""
+    EvidenceLog.flush()
+    EvidenceLog.storage().append([{**make_context(i), "previous_hash": previous_hash, "hash": f"{i:064x}"}])
+
+
+def test_incremental_verification_reads_only_new_entries(monkeypatch):
+    Config.set("evidence_log_format", "jsonl")
+    save(5)
+    assert EvidenceLog.verify_hash_chain()[0]
+    with open(ChainVerifier.CHECKPOINT_FILE) as f:
+        checkpoint = json.load(f)
+    assert checkpoint["position"] == 5
+    assert checkpoint["last_hash"] == EvidenceLog.get_last_hash()
+
+    save(2, start=5)
+    storage = EvidenceLog.storage()
+    reads = []
+    entries_since = storage.entries_since
+    monkeypatch.setattr(storage, "entries_since", lambda position: reads.append(position) or entries_since(position))
+    valid, message, _ = EvidenceLog.verify_hash_chain()
+    assert valid, message
+    # The checkpointed entry is re-read to confirm it is still in place, then only the new links
+    assert reads == [4]
+    assert "7 entries" in message
+
+
+def test_broken_links_are_reported_with_their_position():
+    Config.set("evidence_log_format", "jsonl")
+    save(3)
+    assert EvidenceLog.verify_hash_chain()[0]
+    append_unlinked(3)
+    save(2, start=4)
+    valid, message, broken_links = EvidenceLog.verify_hash_chain()
+    assert not valid
+    assert "entry 4" in message
+    assert [link["position"] for link in broken_links] == [4]
+    assert broken_links[0]["expected_previous_hash"] == EvidenceLog.load_log()[2]["hash"]
+    # The break stays on record for later incremental runs
+    assert not EvidenceLog.verify_hash_chain()[0]
+    assert EvidenceLog.verify_hash_chain(full=True)[2] == broken_links
+
+
+def test_replaced_log_is_verified_from_the_start():
+    Config.set("evidence_log_format", "jsonl")
+    save(4)
+    assert EvidenceLog.verify_hash_chain()[0]
+    # Rewritten behind the checkpoint's back
+    os.remove(EvidenceLog.JSONL_LOG_FILE)
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    append_unlinked(10)
+    save(5, start=11)
+    valid, _, broken_links = EvidenceLog.verify_hash_chain()
+    assert not valid
+    assert [link["position"] for link in broken_links] == [1]
+
+
+def test_chain_statistics(log_format):
+    save(3)
+    save(2, start=3, event_type="MODIFY")
+    statistics = EvidenceLog.get_chain_statistics()
+    assert statistics["total_entries"] == 5
+    assert statistics["create_events"] == 3
+    assert statistics["modify_events"] == 2
+    assert statistics["first_entry"] == "2026-01-01 00:00:00"
+    assert statistics["last_entry"] == "2026-01-01 00:00:04"
+    assert statistics["chain_valid"]
+    assert EvidenceLog.get_chain_statistics()["total_entries"] == 5
+
+
+def test_empty_log_is_valid():
+    assert EvidenceLog.verify_hash_chain() == (True, "Evidence log is empty", [])
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_parallel_verification_matches_serial(log_format, workers):
+    save(5)
+    append_unlinked(5)
+    save(4, start=6)
+    append_unlinked(10, previous_hash="")
+    save(2, start=11)
+    # Both breaks open a new segment, so with the segmented engine they fall on range boundaries
+    serial = EvidenceLog.verify_hash_chain(full=True)
+    parallel = EvidenceLog.verify_hash_chain(full=True, parallel=True, workers=workers)
+    assert not parallel[0]
+    assert [link["position"] for link in parallel[2]] == [6, 11]
+    assert parallel == serial
+    # The parallel pass leaves the same checkpoint for incremental runs to continue from
+    save(1, start=13)
+    assert EvidenceLog.get_chain_statistics()["total_entries"] == 14
+
+
+def test_parallel_verification_of_an_intact_log(log_format):
+    save(12)
+    assert EvidenceLog.verify_hash_chain(full=True, parallel=True, workers=2) == EvidenceLog.verify_hash_chain(full=True)
+
+
+def test_json_engine_verifies_in_parallel_and_reports_the_mode(monkeypatch):
+    Config.set("evidence_log_format", "json")
+    # Ranges of two entries, so the break falls on a range boundary
+    monkeypatch.setattr(CachedFileStorage, "CHAIN_RANGE_MIN_ENTRIES", 2)
+    save(5)
+    append_unlinked(5)
+    save(4, start=6)
+    serial = EvidenceLog.verify_hash_chain(full=True)
+    assert EvidenceLog.get_chain_statistics()["verified_by"] == "serial"
+    parallel = EvidenceLog.verify_hash_chain(full=True, parallel=True, workers=2)
+    assert parallel == serial
+    assert [link["position"] for link in parallel[2]] == [6]
+    assert EvidenceLog.get_chain_statistics()["verified_by"] == "parallel (2 workers, 5 ranges)"
+    # Incremental updates keep the record of the last full walk
+    save(1, start=10)
+    assert EvidenceLog.get_chain_statistics()["verified_by"] == "parallel (2 workers, 5 ranges)"
+
+    assert ForensicReportGenerator.generate_chain_verification_report("chain.txt")[0]
+    with open("chain.txt", encoding="utf-8") as f:
+        assert "Verification Mode: parallel (" in f.read()
+
+
+@pytest.fixture
+def per_camera():
+    Config.set("chain_mode", "per_camera")
+    Config.set("anchor_interval", 4)
+
+
+def test_each_camera_has_its_own_chain(log_format, per_camera):
+    for start in range(0, 6, 2):
+        save(1, start=start, camera_id="CAM-1001")
+        save(1, start=start + 1, camera_id="CAM-1002")
+    for camera_id in ("CAM-1001", "CAM-1002"):
+        entries = EvidenceLog.storage().chain_entries(camera_id)
+        assert [entry["previous_hash"] for entry in entries] == ["", *[entry["hash"] for entry in entries[:-1]]]
+        assert EvidenceLog.get_last_hash(camera_id) == entries[-1]["hash"]
+        assert EvidenceLog.verify_camera_chain(camera_id) == (True, f"{camera_id} chain intact (3 entries verified)", [])
+    valid, message, _ = EvidenceLog.verify_hash_chain(full=True)
+    assert valid, message
+
+
+def test_camera_heads_are_anchored_at_intervals(per_camera):
+    save(3, camera_id="CAM-1001")
+    assert AnchorChain.anchors() == []
+    save(1, start=3, camera_id="CAM-1002")
+    anchor, = AnchorChain.anchors()
+    assert anchor["heads"] == EvidenceLog.storage().chain_heads()
+    assert anchor["heads"]["CAM-1001"]["count"] == 3
+    # Nothing moved, so nothing new to anchor
+    assert EvidenceLog.anchor_chains() is None
+    save(1, start=4, camera_id="CAM-1002")
+    assert EvidenceLog.anchor_chains()["previous_hash"] == anchor["hash"]
+    assert EvidenceLog.verify_anchor_chain() == (True, "Anchor chain intact (2 anchors)", [])
+
+
+def test_concurrent_writers_anchor_every_interval_once(per_camera, monkeypatch):
+    anchored = []
+    anchor_chains = EvidenceLog._anchor_chains
+    monkeypatch.setattr(EvidenceLog, "_anchor_chains", classmethod(lambda cls: anchored.append(1) or anchor_chains()))
+    barrier = threading.Barrier(6)
+
+    def write(worker):
+        barrier.wait()
+        for i in range(7):
+            save(1, start=worker * 7 + i, camera_id=f"CAM-100{worker}")
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Every entry counted once: 42 entries are ten full intervals of 4 and two left over
+    assert len(anchored) == 10
+    assert EvidenceLog._unanchored == 2
+
+
+def test_rewritten_camera_history_fails_its_anchor(per_camera):
+    Config.set("evidence_log_format", "jsonl")
+    save(3, camera_id="CAM-1001")
+    save(2, start=3, camera_id="CAM-1002")
+    EvidenceLog.anchor_chains()
+
+    # The anchored head of one camera is replaced: its links still check out
+    entries = EvidenceLog.storage().load()
+    entries[2]["hash"] = "e" * 64
+    EvidenceLog.storage().import_entries(entries)
+    assert EvidenceLog.verify_hash_chain(full=True)[0]
+
+    valid, message, _ = EvidenceLog.verify_camera_chain("CAM-1001")
+    assert not valid
+    assert message == "CAM-1001: Anchor chain check failed: 1 problem(s)"
+    assert EvidenceLog.verify_camera_chain("CAM-1002")[0]
+    valid, _, problems = EvidenceLog.verify_anchor_chain()
+    assert not valid
+    assert [problem["chain_id"] for problem in problems] == ["CAM-1001"]
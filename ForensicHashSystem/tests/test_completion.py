@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+
+from core.AcquisitionPipeline import CompletionDetector
+
+
+class Completions:
+    """on_complete target recording each path with the file size it had when handed on"""
+
+    def __init__(self):
+        self.calls = []
+        self.event = threading.Event()
+
+    def __call__(self, path):
+        self.calls.append((path, os.path.getsize(path) if os.path.exists(path) else None))
+        self.event.set()
+
+    def wait(self, timeout=5):
+        assert self.event.wait(timeout)
+        self.event.clear()
+
+
+def write_slowly(path, chunks, delay):
+    with open(path, "ab") as f:
+        for _ in range(chunks):
+            f.write(b"x" * 1024)
+            f.flush()
+            time.sleep(delay)
+
+
+def test_file_still_being_written_is_not_handed_on(tmp_path):
+    path = str(tmp_path / "clip.mp4")
+    open(path, "wb").close()
+    completions = Completions()
+    detector = CompletionDetector(completions, settle=0.3, initial_interval=0.02, max_interval=0.05, close_events=False)
+    detector.watch(path)
+    write_slowly(path, chunks=12, delay=0.05)
+    completions.wait()
+    detector.stop()
+    # Handed on once, with everything the writer wrote
+    assert completions.calls == [(path, 12 * 1024)]
+    assert detector.stats()["completed_stable"] == 1
+
+
+def test_close_event_completes_the_file(tmp_path):
+    path = str(tmp_path / "clip.mp4")
+    with open(path, "wb") as f:
+        f.write(b"frame")
+    completions = Completions()
+    detector = CompletionDetector(completions, initial_interval=0.02, close_timeout=60)
+    detector.watch(path)
+    # Unchanged, but not closed yet: polling keeps waiting for the close
+    time.sleep(0.2)
+    assert completions.calls == []
+    detector.closed(path)
+    assert completions.calls == [(path, 5)]
+    # A second close of the same file is not a second completion
+    detector.closed(path)
+    detector.stop()
+    assert len(completions.calls) == 1
+    assert detector.stats()["completed_on_close"] == 1
+
+
+def test_polling_fallback_then_late_close(tmp_path):
+    path = str(tmp_path / "clip.mp4")
+    with open(path, "wb") as f:
+        f.write(b"frame")
+    completions = Completions()
+    detector = CompletionDetector(completions, initial_interval=0.02, max_interval=0.05, close_timeout=0.1)
+    detector.watch(path)
+    completions.wait()
+    assert detector.stats()["completed_stable"] == 1
+
+    # The writer had only paused: the close after more writes hands the file on again
+    with open(path, "ab") as f:
+        f.write(b"more frames")
+    detector.closed(path)
+    assert completions.calls == [(path, 5), (path, 16)]
+    assert detector.stats()["reacquired_on_close"] == 1
+    # Closed without changes since: nothing new to acquire
+    detector.watch(path)
+    completions.wait()
+    detector.closed(path)
+    detector.stop()
+    assert len(completions.calls) == 3
+
+
+def test_stop_returns_files_still_being_written(tmp_path):
+    paths = [str(tmp_path / f"clip{i}.mp4") for i in range(2)]
+    for path in paths:
+        open(path, "wb").close()
+    completions = Completions()
+    detector = CompletionDetector(completions, initial_interval=0.02, close_timeout=60)
+    for path in paths:
+        detector.watch(path)
+    assert not detector.watch(paths[0])
+    assert detector.stop() == sorted(paths)
+    assert completions.calls == []
+    assert detector.stats()["watching"] == 0
+
+
+def test_vanished_files_are_dropped(tmp_path):
+    path = str(tmp_path / "clip.mp4")
+    open(path, "wb").close()
+    completions = Completions()
+    detector = CompletionDetector(completions, settle=0.1, initial_interval=0.02, close_events=False)
+    detector.watch(path)
+    os.remove(path)
+    deadline = time.monotonic() + 5
+    while detector.stats()["vanished"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    detector.stop()
+    assert detector.stats()["vanished"] == 1
+    assert completions.calls == []
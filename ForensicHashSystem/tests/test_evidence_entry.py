@@ -0,0 +1,102 @@
+import json
+import tracemalloc
+
+import pytest
+
+from core.EvidenceEntry import EvidenceEntry
+
+ENTRY = {
+    "evidence_uuid": "0b7f6d52-3c1e-4f7a-9a55-2d9c1f0e8b11",
+    "file_name": "clip001.mp4",
+    "file_size": 1048576,
+    "camera_id": "CAM-1001",
+    "event_type": "CREATE",
+    "timestamp": "2026-01-01 02:15:30",
+    "previous_hash": "",
+    "hash": "ab" * 32,
+    "fingerprint": "cd" * 32,
+    "original_location": "/evidence/clip001.mp4",
+    "current_location": "/evidence/clip001.mp4",
+    "digests": {"md5": "ef" * 16}
+}
+
+
+def test_entry_round_trips_in_compact_form():
+    entry = EvidenceEntry(ENTRY)
+    assert entry.to_dict() == ENTRY
+    assert list(entry) == list(ENTRY)
+    assert dict(entry) == ENTRY
+    assert entry.stored("hash") == bytes.fromhex(ENTRY["hash"])
+    assert len(entry.stored("evidence_uuid")) == 16
+    assert isinstance(entry.stored("timestamp"), int)
+    # An unmoved file keeps a single copy of its path
+    assert entry.stored("current_location") is entry.stored("original_location")
+    assert EvidenceEntry.from_dict(entry) is entry
+
+
+@pytest.mark.parametrize("changes", [
+    {"hash": "AB" * 32},
+    {"hash": "ab" * 31},
+    {"previous_hash": None},
+    {"fingerprint": "zz" * 32},
+    {"timestamp": "2026-01-01 02:15:30.250000"},
+    {"timestamp": "2026-01-01T02:15:30"},
+    {"timestamp": "2026-01-01 02:15:30+02:00"},
+    {"timestamp": "N/A"},
+    {"evidence_uuid": "0B7F6D52-3C1E-4F7A-9A55-2D9C1F0E8B11"},
+    {"evidence_uuid": "legacy-id"},
+    {"file_size": None},
+    {"camera_id": 1001},
+    {"current_location": "/archive/clip001.mp4"},
+    {"merkle": {"leaf_count": 2, "leaves": "00" * 64}, "chain_id": "CAM-1001"},
+    {"merkle": {"leaves": "AB" * 64}, "samples": {"digests": "ab" * 63 + "a", "seed": "0" * 32}},
+    {"samples": {"digests": "ab " * 32, "offsets": [0, 4096]}, "digests": {"md5": "", "sha1": "zz" * 20}}
+])
+def test_unusual_values_round_trip_exactly(changes):
+    original = {**ENTRY, **changes}
+    entry = EvidenceEntry(original)
+    assert entry.to_dict() == original
+    assert list(entry) == list(original)
+    assert {key: type(value) for key, value in entry.items()} == {key: type(value) for key, value in original.items()}
+
+
+def test_nested_hex_is_held_as_bytes():
+    leaves = "".join(f"{i:064x}" for i in range(16))
+    original = {**ENTRY, "merkle": {"leaf_count": 16, "chunk_size": 4096, "leaves": leaves}, "samples": {"seed": 7, "digests": leaves}}
+    entry = EvidenceEntry(original)
+    assert entry.stored("merkle")["leaves"] == bytes.fromhex(leaves)
+    assert entry.stored("samples")["digests"] == bytes.fromhex(leaves)
+    assert entry.stored("digests")["md5"] == bytes.fromhex(ENTRY["digests"]["md5"])
+    assert entry["merkle"] == original["merkle"]
+    assert entry.to_dict() == original
+    assert json.loads(json.dumps(entry.to_dict())) == original
+
+
+def test_entries_are_read_only():
+    entry = EvidenceEntry(ENTRY)
+    with pytest.raises(TypeError):
+        entry["hash"] = "0" * 64
+    with pytest.raises(AttributeError):
+        entry.notes = "not a field"
+    with pytest.raises(KeyError):
+        entry["missing"]
+    assert entry.get("missing") is None
+
+
+def test_entries_take_far_less_memory_than_dicts():
+    lines = [
+        json.dumps({**ENTRY, "evidence_uuid": f"{i:08x}-3c1e-4f7a-9a55-2d9c1f0e8b11", "hash": f"{i:064x}", "file_name": f"clip{i}.mp4"})
+        for i in range(2000)
+    ]
+
+    def allocated(build):
+        tracemalloc.start()
+        try:
+            entries = build()
+            return tracemalloc.get_traced_memory()[0], entries
+        finally:
+            tracemalloc.stop()
+
+    as_dicts, _ = allocated(lambda: [json.loads(line) for line in lines])
+    as_entries, _ = allocated(lambda: [EvidenceEntry(json.loads(line)) for line in lines])
+    assert as_entries * 2 < as_dicts
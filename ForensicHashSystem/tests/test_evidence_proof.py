@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+import verify_evidence_proof
+from conftest import save
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+from core.EvidenceProof import EvidenceProof
+from core.LogStorage import JsonLinesFile
+
+
+@pytest.fixture
+def segmented():
+    Config.set("evidence_log_format", "segmented")
+    Config.set("segment_max_entries", 2)
+
+
+def save_cameras(count):
+    """One commit per entry, alternating between two cameras"""
+    for i in range(count):
+        save(1, start=i, camera_id=f"CAM-100{i % 2 + 1}")
+
+
+def export(path="export.json", **kwargs):
+    EvidenceLog.export_evidence_proof(path, **kwargs)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_exported_entries_verify_against_segment_roots(log_format):
+    save_cameras(7)
+    proof = export(camera_id="CAM-1002")
+    assert [item["entry"]["file_name"] for item in proof["entries"]] == ["clip001.mp4", "clip003.mp4", "clip005.mp4"]
+    valid, messages = verify_evidence_proof.verify_export(proof)
+    assert valid, messages
+    # Sealed segments are checked against the roots recorded when they were sealed
+    sealed = {segment["name"]: segment["merkle_root"] for segment in EvidenceLog.list_segments() if segment.get("sealed")}
+    for segment in proof["segments"]:
+        if segment["sealed"]:
+            assert segment["merkle_root"] == sealed[segment["name"]]
+
+
+def test_active_segment_roots_are_published(segmented):
+    save_cameras(3)
+    proof = export()
+    active = proof["segments"][-1]
+    assert not active["sealed"]
+    published = list(JsonLinesFile(EvidenceProof.ROOTS_FILE).iter_records())
+    assert [(record["segment"], record["merkle_root"]) for record in published] == [(active["name"], active["merkle_root"])]
+    # Exporting the same state again does not publish it twice
+    export()
+    assert len(list(JsonLinesFile(EvidenceProof.ROOTS_FILE).iter_records())) == 1
+
+
+def test_command_line_rejects_altered_entries_and_untrusted_roots(segmented, capsys):
+    save_cameras(5)
+    uuid = EvidenceLog.find_entry_by_filename("clip002.mp4")["evidence_uuid"]
+    proof = export(evidence_uuids=[uuid])
+    root = proof["segments"][0]["merkle_root"]
+    assert verify_evidence_proof.main(["export.json", root]) == 0
+    assert "ALL VALID" in capsys.readouterr().out
+    assert verify_evidence_proof.main(["export.json", "0" * 64]) == 1
+    assert "not one of the trusted roots" in capsys.readouterr().out
+
+    proof["entries"][0]["entry"]["file_size"] += 1
+    with open("altered.json", "w", encoding="utf-8") as f:
+        json.dump(proof, f)
+    assert verify_evidence_proof.main(["altered.json"]) == 1
+    assert "inclusion proof does not match" in capsys.readouterr().out
+
+
+def test_exports_from_before_compaction_keep_verifying(segmented):
+    save_cameras(9)
+    before = export()
+    roots = {segment["merkle_root"] for segment in before["segments"] if segment["sealed"]}
+
+    # Compacted twice: the second merge includes a segment merged by the first
+    Config.set("segment_max_entries", 4)
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    assert EvidenceLog.compact_log() == 2
+    Config.set("segment_max_entries", 8)
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    assert EvidenceLog.compact_log() == 1
+
+    merged = EvidenceLog.list_segments()[0]
+    assert merged["compacted_from"] == [
+        "segment-000001.jsonl", "segment-000002.jsonl", "segment-000001-000002.jsonl",
+        "segment-000003.jsonl", "segment-000004.jsonl", "segment-000003-000004.jsonl"
+    ]
+    assert len(merged["compacted_roots"]) == len(merged["compacted_from"])
+    # The roots the earlier export relies on are all still on record
+    assert roots <= set(merged["compacted_roots"])
+    published = {record["merkle_root"] for record in JsonLinesFile(EvidenceProof.ROOTS_FILE).iter_records()}
+    trusted = set(merged["compacted_roots"]) | published
+    valid, messages = verify_evidence_proof.verify_export(before, trusted)
+    assert valid, messages
+    assert verify_evidence_proof.verify_export(export("after.json"))[0]
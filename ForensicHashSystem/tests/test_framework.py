@@ -0,0 +1,62 @@
+import hashlib
+import os
+
+from conftest import acquire, write_file
+from core.EvidenceLog import EvidenceLog
+from core.ForensicHasher import ForensicHasher
+from core.ForensicVerifier import ForensicVerifier
+
+
+def test_hash_file_streams_in_chunks(tmp_path):
+    data = os.urandom(100 * 1024 + 7)
+    path = write_file(tmp_path / "clip.mp4", data)
+    expected = hashlib.sha256(data).hexdigest()
+    assert ForensicHasher.hash_file(path) == expected
+    # Chunk boundaries must not change the digest
+    assert ForensicHasher.hash_file(path, chunk_size=4096) == expected
+    assert ForensicHasher.hash_file(path, chunk_size=1) == expected
+
+
+def test_empty_file_hash(tmp_path):
+    path = write_file(tmp_path / "empty.mp4", b"")
+    assert ForensicHasher.hash_file(path) == hashlib.sha256(b"").hexdigest()
+
+
+def test_generate_hash_records_content_hash_and_fingerprint(tmp_path):
+    data = b"frame data" * 1000
+    path = write_file(tmp_path / "clip.mp4", data)
+    hash_value, context, camera_id = ForensicHasher.generate_hash(path)
+    assert hash_value == hashlib.sha256(data).hexdigest()
+    assert context["event_type"] == "CREATE"
+    assert context["camera_id"] == camera_id
+    assert context["fingerprint"] == ForensicHasher.fingerprint("clip.mp4", len(data))
+
+
+def test_verify_passes_for_unmodified_file(tmp_path):
+    path = write_file(tmp_path / "clip.mp4", b"original content")
+    acquire(path)
+    is_valid, message, evidence_uuid = ForensicVerifier.verify(path)
+    assert is_valid, message
+    assert evidence_uuid == EvidenceLog.find_entry_by_filename("clip.mp4")["evidence_uuid"]
+
+
+def test_verify_detects_same_size_content_change(tmp_path):
+    path = write_file(tmp_path / "clip.mp4", b"original content")
+    acquire(path)
+    # Same name and size, so only the content hash can tell
+    write_file(path, b"Original content")
+    is_valid, message, _ = ForensicVerifier.verify(path)
+    assert not is_valid
+    assert "TAMPERING" in message
+
+
+def test_modify_entry_reuses_camera_and_uuid(tmp_path):
+    path = write_file(tmp_path / "clip.mp4", b"first version")
+    _, first, camera_id = acquire(path)
+    write_file(path, b"second version, longer")
+    _, second, second_camera = acquire(path)
+    assert second["event_type"] == "MODIFY"
+    assert second_camera == camera_id
+    assert second["evidence_uuid"] == first["evidence_uuid"]
+    is_valid, _, _ = ForensicVerifier.verify(path)
+    assert is_valid
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+from core.GroupCommit import GroupCommitWriter
+from core.LogStorage import JsonLinesStorage
+
+
+def make_entry(i, previous_hash=""):
+    return {
+        "evidence_uuid": EvidenceLog.generate_evidence_uuid(),
+        "file_name": f"clip{i:03d}.mp4",
+        "camera_id": "CAM-1001",
+        "event_type": "CREATE",
+        "timestamp": "2026-01-01 00:00:00",
+        "previous_hash": previous_hash,
+        "hash": hashlib.sha256(f"content {i}".encode()).hexdigest()
+    }
+
+
+def test_concurrent_writers_relink_stale_heads(log_format):
+    Config.set("group_commit_window_ms", 20)
+    # Every writer read the same (empty) head before submitting
+    stale = EvidenceLog.get_last_hash()
+    barrier = threading.Barrier(8)
+
+    def acquire(worker):
+        barrier.wait()
+        for i in range(5):
+            entry = make_entry(worker * 5 + i, previous_hash=stale)
+            context = {key: value for key, value in entry.items() if key != "hash"}
+            EvidenceLog.save_entry(context, entry["hash"])
+
+    threads = [threading.Thread(target=acquire, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    entries = EvidenceLog.load_log()
+    assert len(entries) == 40
+    assert [entry["previous_hash"] for entry in entries] == ["", *[entry["hash"] for entry in entries[:-1]]]
+    writer = EvidenceLog.writer()
+    assert writer.writes_committed == 40
+    assert writer.batches_committed < 40
+    valid, message, _ = EvidenceLog.verify_hash_chain(full=True)
+    assert valid, message
+
+
+def test_acknowledgement_means_durable(tmp_path):
+    storage = JsonLinesStorage(str(tmp_path / "log.jsonl"), str(tmp_path / "custody.jsonl"))
+    writer = GroupCommitWriter(storage, window=0.05)
+    acks = [writer.submit([make_entry(i)]) for i in range(10)]
+    assert acks[-1].wait(5)
+    assert all(ack.durable for ack in acks)
+    # Submitted within one window, so committed together
+    assert writer.batches_committed == 1
+    assert acks[0].batch_size == 10
+    # A second process reading the file sees every acknowledged entry
+    other = JsonLinesStorage(str(tmp_path / "log.jsonl"), str(tmp_path / "custody.jsonl"))
+    assert [entry["file_name"] for entry in other.load()] == [f"clip{i:03d}.mp4" for i in range(10)]
+
+
+def test_failed_commit_is_reported_to_every_waiter(tmp_path):
+    storage = JsonLinesStorage(str(tmp_path / "log.jsonl"), str(tmp_path / "custody.jsonl"))
+
+    def fail(entries, events):
+        raise OSError("disk full")
+
+    storage.commit = fail
+    writer = GroupCommitWriter(storage, window=0.05)
+    acks = [writer.submit([make_entry(i)]) for i in range(3)]
+    for ack in acks:
+        try:
+            ack.wait(5)
+        except OSError as e:
+            assert "disk full" in str(e)
+        else:
+            raise AssertionError("commit failure was not raised")
+        assert not ack.durable
+
+
+def test_without_group_commit_each_write_commits_alone():
+    Config.set("group_commit_enabled", False)
+    ack = EvidenceLog.save_entry({k: v for k, v in make_entry(1).items() if k != "hash"}, "a" * 64, wait=False)
+    assert ack.durable
+    assert ack.batch_size == 1
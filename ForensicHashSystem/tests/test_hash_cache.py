@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import time
+
+import pytest
+
+from conftest import acquire, write_file
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+from core.ForensicHasher import ForensicHasher
+from core.ForensicVerifier import ForensicVerifier
+from core.HashCache import HashCache
+
+
+def test_unchanged_file_is_served_from_cache(tmp_path, monkeypatch):
+    path = write_file(tmp_path / "clip.mp4", b"cached content")
+    first = ForensicHasher.compute_hash(path)
+    monkeypatch.setattr(ForensicHasher, "hash_file_digests", lambda *args, **kwargs: pytest.fail("cached file re-read"))
+    assert ForensicHasher.compute_hash(path) == first
+
+
+def test_content_change_invalidates(tmp_path):
+    path = write_file(tmp_path / "clip.mp4", b"version one")
+    ForensicHasher.compute_hash(path)
+    write_file(path, b"version two!")
+    hash_value, _, _ = ForensicHasher.compute_hash(path)
+    assert hash_value == hashlib.sha256(b"version two!").hexdigest()
+
+
+def test_recently_modified_files_are_not_cached(tmp_path):
+    path = str(tmp_path / "fresh.mp4")
+    with open(path, "wb") as f:
+        f.write(b"just written")
+    ForensicHasher.compute_hash(path)
+    assert HashCache.lookup(path) is None
+
+
+def test_invalidate_and_secondary_algorithms(tmp_path):
+    path = write_file(tmp_path / "clip.mp4", b"content")
+    ForensicHasher.compute_hash(path, algorithms=[])
+    assert HashCache.lookup(path) is not None
+    # A cached hash lacking a requested digest does not match
+    assert HashCache.lookup(path, algorithms=["md5"]) is None
+    HashCache.invalidate(path)
+    assert HashCache.lookup(path) is None
+
+
+def test_cache_writes_are_batched(tmp_path):
+    Config.set("hash_cache_flush_seconds", 0.2)
+    paths = [write_file(tmp_path / f"clip{i}.mp4", os.urandom(64)) for i in range(5)]
+    for path in paths:
+        ForensicHasher.compute_hash(path)
+    assert not os.path.exists(HashCache.CACHE_FILE)
+    deadline = time.monotonic() + 5
+    while not os.path.exists(HashCache.CACHE_FILE) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    with open(HashCache.CACHE_FILE) as f:
+        assert len(json.load(f)) == len(paths)
+
+
+def test_flush_writes_pending_changes(tmp_path):
+    Config.set("hash_cache_flush_seconds", 60)
+    path = write_file(tmp_path / "clip.mp4", b"content")
+    ForensicHasher.compute_hash(path)
+    HashCache.flush()
+    HashCache._entries = None
+    assert HashCache.lookup(path) is not None
+
+
+def test_verification_rehashes_when_metadata_is_restored(tmp_path, monkeypatch):
+    # Where st_ctime is the creation time (Windows), restoring the mtime
+    # restores every field of the cache key
+    monkeypatch.setattr(
+        HashCache, "stat_key", staticmethod(lambda st: f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}")
+    )
+    path = write_file(tmp_path / "clip.mp4", b"original content")
+    acquire(path)
+    assert HashCache.lookup(path) is not None
+
+    stat = os.stat(path)
+    with open(path, "r+b") as f:
+        f.write(b"O")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    # A bulk sweep trusts the cache, and says so in the log
+    is_valid, _, evidence_uuid = ForensicVerifier.verify(path, force=False)
+    assert is_valid
+    # An explicit verification re-reads the content
+    is_valid, message, _ = ForensicVerifier.verify(path)
+    assert not is_valid
+    assert "TAMPERING" in message
+
+    log = EvidenceLog.find_entry_by_uuid(evidence_uuid)["hash_verification_log"]
+    assert [(record["result"], record["mode"]) for record in log] == [("PASSED", "CACHED"), ("FAILED", "FULL")]
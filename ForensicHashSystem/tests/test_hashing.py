@@ -0,0 +1,197 @@
+import csv
+import hashlib
+import os
+
+import pytest
+
+from conftest import acquire, write_file
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+from core.ForensicHasher import ForensicHasher
+from core.ForensicReportGenerator import ForensicReportGenerator
+from core.ForensicVerifier import ForensicVerifier
+from core.MerkleTree import MerkleTree
+
+CHUNK = 1024
+
+
+@pytest.fixture
+def merkle_config():
+    Config.set("merkle_threshold", 4 * CHUNK)
+    Config.set("merkle_chunk_size", CHUNK)
+
+
+def chunk_leaves(data):
+    leaves = []
+    for offset in range(0, max(len(data), 1), CHUNK):
+        leaf = MerkleTree.leaf_hasher()
+        leaf.update(data[offset:offset + CHUNK])
+        leaves.append(leaf.hexdigest())
+    return leaves
+
+
+def test_merkle_manifest_and_root(tmp_path, merkle_config):
+    data = os.urandom(10 * CHUNK + 100)
+    path = write_file(tmp_path / "large.mp4", data)
+    merkle, root, digests = ForensicHasher.hash_file_merkle(path, CHUNK, workers=4)
+    leaves = chunk_leaves(data)
+    assert merkle["leaf_count"] == 11
+    assert MerkleTree.unpack_leaves(merkle["leaves"]) == leaves
+    assert root == MerkleTree.root(leaves)
+    assert digests == {}
+
+
+def test_merkle_leaves_unchanged_by_whole_file_digests(tmp_path):
+    data = os.urandom(7 * CHUNK)
+    path = write_file(tmp_path / "large.mp4", data)
+    plain = ForensicHasher.hash_file_merkle(path, CHUNK, workers=3)
+    merkle, root, digests = ForensicHasher.hash_file_merkle(path, CHUNK, workers=3, algorithms=["sha256", "md5"])
+    assert (merkle, root) == plain[:2]
+    assert digests == {"sha256": hashlib.sha256(data).hexdigest(), "md5": hashlib.md5(data).hexdigest()}
+
+
+def test_large_files_record_their_root_only(tmp_path, merkle_config, monkeypatch):
+    data = os.urandom(6 * CHUNK)
+    path = write_file(tmp_path / "large.mp4", data)
+    small = write_file(tmp_path / "small.mp4", b"tiny")
+    # The chunk workers are the only read of the file
+    with monkeypatch.context() as patch:
+        patch.setattr(ForensicHasher, "hash_file_digests", lambda *args, **kwargs: pytest.fail("file read twice"))
+        acquire(path)
+    acquire(small)
+
+    entry = EvidenceLog.find_entry_by_filename("large.mp4")
+    assert entry["hash"] == MerkleTree.root(chunk_leaves(data))
+    assert "digests" not in entry
+    assert ForensicHasher.file_sha256(entry) is None
+    assert ForensicHasher.hash_label(entry) == "Merkle Root (SHA-256)"
+
+    entry = EvidenceLog.find_entry_by_filename("small.mp4")
+    assert "merkle" not in entry
+    assert ForensicHasher.file_sha256(entry) == entry["hash"] == hashlib.sha256(b"tiny").hexdigest()
+    assert ForensicHasher.hash_label(entry) == "SHA-256 Hash"
+
+
+def test_whole_file_sha256_of_large_files_is_opt_in(tmp_path, merkle_config):
+    Config.set("merkle_whole_file_sha256", True)
+    data = os.urandom(6 * CHUNK)
+    path = write_file(tmp_path / "large.mp4", data)
+    acquire(path)
+    entry = EvidenceLog.find_entry_by_filename("large.mp4")
+    assert entry["hash"] == MerkleTree.root(chunk_leaves(data))
+    assert ForensicHasher.file_sha256(entry) == hashlib.sha256(data).hexdigest()
+    # Verification checks the root alone
+    assert ForensicHasher.compute_hash(path, CHUNK, force=True, algorithms=[])[2] == {}
+    assert ForensicVerifier.verify(path)[0]
+
+
+def test_reports_label_merkle_roots(tmp_path, merkle_config):
+    Config.set("merkle_whole_file_sha256", True)
+    data = os.urandom(5 * CHUNK)
+    acquire(write_file(tmp_path / "large.mp4", data))
+    entry = EvidenceLog.find_entry_by_filename("large.mp4")
+
+    ok, message = ForensicReportGenerator.generate_csv_report("report.csv")
+    assert ok, message
+    with open("report.csv", newline="", encoding="utf-8") as f:
+        row, = csv.DictReader(f)
+    assert row["SHA-256 Hash"] == hashlib.sha256(data).hexdigest()
+    assert row["Merkle Root"] == entry["hash"]
+
+    ok, message = ForensicReportGenerator.generate_text_report("report.txt")
+    assert ok, message
+    with open("report.txt", encoding="utf-8") as f:
+        report = f.read()
+    assert f"SHA-256 Hash: {hashlib.sha256(data).hexdigest()}" in report
+    assert f"Merkle Root (SHA-256): {entry['hash']}" in report
+
+
+def test_verify_chunks_pinpoints_tampered_chunk(tmp_path, merkle_config):
+    data = bytearray(os.urandom(8 * CHUNK))
+    path = write_file(tmp_path / "large.mp4", bytes(data))
+    acquire(path)
+    assert ForensicVerifier.verify(path)[0]
+
+    data[3 * CHUNK + 5] ^= 0xFF
+    write_file(path, bytes(data))
+    is_valid, _, _, failed = ForensicVerifier.verify_chunks(path)
+    assert not is_valid
+    assert failed == [3]
+    is_valid, _, _, failed = ForensicVerifier.verify_chunks(path, chunk_indexes=[0, 1, 7])
+    assert is_valid and failed == []
+    assert not ForensicVerifier.verify(path)[0]
+
+
+def test_single_pass_multi_digest(tmp_path):
+    data = os.urandom(50 * 1024)
+    path = write_file(tmp_path / "clip.mp4", data)
+    digests = ForensicHasher.hash_file_digests(path, ["sha256", "sha1", "md5"], chunk_size=4096)
+    assert digests == {
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "sha1": hashlib.sha1(data).hexdigest(),
+        "md5": hashlib.md5(data).hexdigest()
+    }
+
+
+def test_secondary_digests_are_recorded_and_reported(tmp_path):
+    Config.set("secondary_hash_algorithms", ["MD5", "sha1"])
+    data = b"evidence" * 512
+    acquire(write_file(tmp_path / "clip.mp4", data))
+    entry = EvidenceLog.find_entry_by_filename("clip.mp4")
+    assert entry["hash"] == hashlib.sha256(data).hexdigest()
+    assert entry["digests"] == {"md5": hashlib.md5(data).hexdigest(), "sha1": hashlib.sha1(data).hexdigest()}
+
+    ok, message = ForensicReportGenerator.generate_csv_report("report.csv")
+    assert ok, message
+    with open("report.csv", newline="", encoding="utf-8") as f:
+        row, = csv.DictReader(f)
+    assert row["MD5 Hash"] == hashlib.md5(data).hexdigest()
+    assert row["SHA1 Hash"] == hashlib.sha1(data).hexdigest()
+
+
+def test_sample_offsets_are_deterministic_and_cover_ends():
+    offsets = ForensicHasher.sample_offsets(10 * 1024 * 1024, seed=42, count=8, range_size=1024)
+    assert offsets == ForensicHasher.sample_offsets(10 * 1024 * 1024, seed=42, count=8, range_size=1024)
+    assert offsets[0] == 0
+    assert offsets[-1] == 10 * 1024 * 1024 - 1024
+    assert offsets == sorted(set(offsets))
+    assert ForensicHasher.sample_offsets(100, seed=1, count=8, range_size=1024) == [0]
+
+
+def test_quick_verify_checks_sampled_ranges(tmp_path):
+    Config.set("quick_verify_range_size", 512)
+    Config.set("quick_verify_samples", 4)
+    data = bytearray(os.urandom(64 * 1024))
+    path = write_file(tmp_path / "clip.mp4", bytes(data))
+    _, context, _ = acquire(path)
+    assert ForensicVerifier.quick_verify(path)[0]
+
+    # The trailer range is always sampled
+    data[-1] ^= 0xFF
+    write_file(path, bytes(data))
+    is_valid, message, evidence_uuid = ForensicVerifier.quick_verify(path)
+    assert not is_valid
+    assert "TAMPERING" in message
+    modes = [record["mode"] for record in EvidenceLog.find_entry_by_uuid(evidence_uuid)["hash_verification_log"]]
+    assert modes == ["QUICK", "QUICK"]
+
+
+@pytest.mark.parametrize("size", [0, 100, 5 * CHUNK + 300, 12 * CHUNK])
+def test_samples_are_hashed_in_the_content_pass(tmp_path, merkle_config, monkeypatch, size):
+    Config.set("quick_verify_range_size", 700)
+    Config.set("quick_verify_samples", 12)
+    path = write_file(tmp_path / "clip.mp4", os.urandom(size))
+    # Ranges straddle reads of the plain pass and chunks of the Merkle pass alike
+    with monkeypatch.context() as patch:
+        patch.setattr(ForensicHasher, "CHUNK_SIZE", 512)
+        patch.setattr(ForensicHasher, "hash_ranges", lambda *args: pytest.fail("separate sample pass"))
+        _, _, _, _, samples = ForensicHasher.acquire_hash(path, use_cache=False)
+    assert MerkleTree.unpack_leaves(samples["digests"]) == ForensicHasher.hash_ranges(path, samples["offsets"], 700)
+
+
+def test_cached_acquisitions_reuse_their_samples(tmp_path, monkeypatch):
+    path = write_file(tmp_path / "clip.mp4", b"frame" * 1000)
+    monkeypatch.setattr("core.HashCache.HashCache.RACY_WINDOW_NS", 0)
+    first = ForensicHasher.acquire_hash(path)
+    monkeypatch.setattr(ForensicHasher, "_hash_content", lambda *args: pytest.fail("cached file re-read"))
+    assert ForensicHasher.acquire_hash(path)[1:] == first[1:]
@@ -0,0 +1,103 @@
+import types
+
+import pytest
+
+from conftest import acquire, make_context, save, write_file
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+from core.ForensicReportGenerator import ForensicReportGenerator
+from core.LogStorage import LogStorage
+
+
+def save_history():
+    """Two cameras on their own chains, with files modified and names reused across cameras"""
+    Config.set("chain_mode", "per_camera")
+    save(3, camera_id="CAM-1001")
+    save(2, start=1, camera_id="CAM-1002", event_type="MODIFY")
+    save(2, start=2, camera_id="CAM-1001", event_type="MODIFY")
+    EvidenceLog.flush()
+
+
+def test_iter_entries_streams_both_ways(log_format):
+    save(7)
+    entries = EvidenceLog.load_log()
+    forward = EvidenceLog.iter_entries()
+    assert isinstance(forward, types.GeneratorType)
+    assert list(forward) == entries
+    assert list(EvidenceLog.iter_entries(reverse=True)) == entries[::-1]
+
+
+def test_jsonl_iteration_streams_the_file_when_the_model_is_stale(monkeypatch):
+    Config.set("evidence_log_format", "jsonl")
+    save(6)
+    storage = EvidenceLog.storage()
+    entries = storage.load()
+    storage._invalidate()
+    with monkeypatch.context() as patch:
+        patch.setattr(storage, "_build_model", lambda: pytest.fail("the whole log was parsed"))
+        forward = storage.iter_entries()
+        assert next(forward) == entries[0]
+        # Entries appended once iteration started are not picked up
+        save(1, start=6)
+        assert list(forward) == entries[1:]
+        assert list(storage.iter_entries(reverse=True))[1:] == entries[::-1]
+    
+    # Legacy in-place update records are applied through the model
+    storage.file.append_records([{"_update": entries[0]["evidence_uuid"], "append": {"access_log": {"action": "VIEW"}}}])
+    assert next(storage.iter_entries())["access_log"] == [{"action": "VIEW"}]
+    assert len(list(storage.iter_entries(reverse=True))) == 7
+
+
+def test_indexed_lookups_match_a_scan(log_format):
+    save_history()
+    storage = EvidenceLog.storage()
+    entries = storage.load()
+    for file_name in ("clip000.mp4", "clip002.mp4", "clip009.mp4"):
+        assert storage.find_entry_by_filename(file_name) == LogStorage.find_entry_by_filename(storage, file_name)
+        assert storage.find_original_entry(file_name) == LogStorage.find_original_entry(storage, file_name)
+        for camera_id in ("CAM-1001", "CAM-1002"):
+            assert storage.find_entry(file_name, camera_id) == LogStorage.find_entry(storage, file_name, camera_id)
+    for entry in entries:
+        assert storage.find_entry_by_uuid(entry["evidence_uuid"]) == LogStorage.find_entry_by_uuid(storage, entry["evidence_uuid"])
+    for chain_id in (None, "CAM-1001", "CAM-1002"):
+        assert storage.chain_head(chain_id) == LogStorage.chain_head(storage, chain_id)
+    assert storage.chain_entries("CAM-1002") == LogStorage.chain_entries(storage, "CAM-1002")
+    assert storage.chain_heads() == LogStorage.chain_heads(storage)
+    assert list(storage.query(camera_id="CAM-1001")) == list(LogStorage.query(storage, camera_id="CAM-1001"))
+
+
+def test_binary_lookups_follow_appends_and_replacement():
+    Config.set("evidence_log_format", "binary")
+    save(3)
+    storage = EvidenceLog.storage()
+    assert storage.find_entry_by_filename("clip004.mp4") is None
+    save(2, start=3)
+    # The position index is extended, not rebuilt, as the log grows
+    assert storage.find_entry_by_filename("clip004.mp4")["hash"] == storage.record(4)["hash"]
+    storage.import_entries([{**make_context(9), "hash": "9" * 64}])
+    assert storage.find_entry_by_filename("clip004.mp4") is None
+    assert storage.chain_head() == "9" * 64
+
+
+def test_binary_reader_keeps_its_mapping_across_appends():
+    Config.set("evidence_log_format", "binary")
+    hashes = save(4)
+    storage = EvidenceLog.storage()
+    reader = storage.iter_entries()
+    assert next(reader)["hash"] == hashes[0]
+    mapping = storage._mapping
+    save(2, start=4)
+    assert storage.count() == 6
+    # The reader finishes the log as it was when it started, from the mapping it started on
+    assert [entry["hash"] for entry in reader] == hashes[1:]
+    assert mapping.data.closed
+    assert not storage._mapping.data.closed
+
+
+def test_reports_stream_the_log(tmp_path, monkeypatch):
+    for i in range(3):
+        acquire(write_file(tmp_path / f"clip{i}.mp4", b"frame" * (i + 1)))
+    monkeypatch.setattr(EvidenceLog, "load_log", classmethod(lambda cls: pytest.fail("report loaded the whole log")))
+    for generate in (ForensicReportGenerator.generate_csv_report, ForensicReportGenerator.generate_text_report):
+        ok, message = generate(str(tmp_path / "report"))
+        assert ok, message
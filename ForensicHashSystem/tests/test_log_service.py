@@ -0,0 +1,86 @@
+import os
+import stat
+import subprocess
+import sys
+
+import pytest
+
+from conftest import make_context, save
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+from core.GroupCommit import GroupCommitWriter
+from core.LogService import LogService, LogServiceClient
+
+pytestmark = pytest.mark.skipif(not LogService.available(), reason="Unix sockets are not available")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVE = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from core.EvidenceLog import EvidenceLog
+EvidenceLog.save_entry({"file_name": "served.mp4", "camera_id": "CAM-1001", "event_type": "CREATE"}, "a" * 64)
+print("serving", flush=True)
+sys.stdin.readline()
+"""
+
+
+@pytest.fixture
+def socket_service():
+    Config.set("evidence_log_format", "jsonl")
+    Config.set("log_service", "socket")
+    return Config.get("log_service_socket")
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_socket_is_private_to_its_user(socket_service):
+    os.makedirs(os.path.dirname(socket_service), mode=0o755)
+    os.chmod(os.path.dirname(socket_service), 0o755)
+    save(1)
+    assert EvidenceLog._service is not None
+    assert mode(socket_service) == 0o600
+    # A directory others could enter is tightened before the socket is made
+    assert mode(os.path.dirname(socket_service)) == 0o700
+
+
+def test_forwarded_writes_are_relinked_by_the_service(socket_service):
+    hashes = save(2)
+    client = LogServiceClient.connect(socket_service)
+    assert client is not None
+    writer = GroupCommitWriter(client, link_chains=False)
+    # Linked to a head that is no longer current by the time the service commits it
+    entry = {**make_context(2), "hash": "b" * 64}
+    ack = writer.submit([entry])
+    assert ack.wait(10)
+    assert ack.entries[0]["previous_hash"] == hashes[-1]
+    client.close()
+    assert [entry["hash"] for entry in EvidenceLog.load_log()] == [*hashes, "b" * 64]
+
+
+def test_client_takes_over_when_the_serving_process_dies(socket_service, workspace):
+    server = subprocess.Popen(
+        [sys.executable, "-c", SERVE, ROOT], cwd=workspace, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+    try:
+        # Past the service's own log lines
+        assert "serving\n" in iter(server.stdout.readline, "")
+        hashes = save(3)
+        writer = EvidenceLog.writer()
+        assert isinstance(writer.storage, LogServiceClient)
+        assert EvidenceLog._service is None
+    finally:
+        server.kill()
+        server.wait(30)
+
+    # The socket file is left behind by the killed process; this one serves from now on
+    hashes += save(2, start=3)
+    assert EvidenceLog._service is not None
+    assert writer.link_chains
+    entries = EvidenceLog.load_log()
+    assert [entry["hash"] for entry in entries] == ["a" * 64, *hashes]
+    valid, message, _ = EvidenceLog.verify_hash_chain(full=True)
+    assert valid, message
+    assert mode(socket_service) == 0o600
@@ -0,0 +1,151 @@
+import hashlib
+import threading
+import time
+
+import pytest
+
+from conftest import write_file
+from core.AcquisitionPipeline import AcquisitionPipeline
+from core.ForensicHasher import ForensicHasher
+
+
+class Recorder:
+    """commit() target that keeps results in order, optionally holding workers at a gate"""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.hashing = threading.Event()
+        self.committed = []
+        self._lock = threading.Lock()
+
+    def hash_file(self, path):
+        self.hashing.set()
+        if self.gate is not None:
+            self.gate.wait(10)
+        return f"hash of {path}"
+
+    def commit(self, path, hashed):
+        with self._lock:
+            self.committed.append((path, hashed))
+
+
+def test_full_queue_defers_without_blocking_and_keeps_order():
+    gate = threading.Event()
+    recorder = Recorder(gate)
+    pipeline = AcquisitionPipeline(recorder.hash_file, recorder.commit, workers=1, queue_size=2, submit_timeout=0.05)
+    pipeline.start()
+    paths = [f"clip{i:02d}.mp4" for i in range(10)]
+    assert pipeline.submit(paths[0])
+    assert recorder.hashing.wait(10)
+    started = time.monotonic()
+    for path in paths[1:]:
+        assert pipeline.submit(path)
+    # One file in progress and two queued; only the first file deferred waited, and briefly
+    assert time.monotonic() - started < 2
+    stats = pipeline.stats()
+    assert stats["queue_depth"] == 2
+    assert stats["deferred_waiting"] == 7
+    assert stats["deferred"] == 7
+
+    gate.set()
+    pipeline.stop()
+    assert [path for path, _ in recorder.committed] == paths
+    stats = pipeline.stats()
+    assert stats["processed"] == 10
+    assert stats["deferred_waiting"] == 0
+    assert stats["latency"]["total"]["count"] == 10
+
+
+def test_files_already_queued_are_not_submitted_twice():
+    gate = threading.Event()
+    recorder = Recorder(gate)
+    pipeline = AcquisitionPipeline(recorder.hash_file, recorder.commit, workers=1, queue_size=1, submit_timeout=0)
+    pipeline.start()
+    assert pipeline.submit("a.mp4")
+    assert recorder.hashing.wait(10)
+    assert pipeline.submit("b.mp4")
+    assert pipeline.submit("c.mp4")
+    # Queued or deferred: the acquisition still to come reads the latest content
+    assert not pipeline.submit("b.mp4")
+    assert not pipeline.submit("c.mp4")
+    # Changed while being hashed: acquired again once, after the current run
+    assert pipeline.submit("a.mp4")
+    assert not pipeline.submit("a.mp4")
+    gate.set()
+    pipeline.stop()
+    assert sorted(path for path, _ in recorder.committed) == ["a.mp4", "a.mp4", "b.mp4", "c.mp4"]
+    assert pipeline.stats()["requeued"] == 1
+
+
+def test_event_threads_never_wait_for_room():
+    gate = threading.Event()
+    recorder = Recorder(gate)
+    pipeline = AcquisitionPipeline(recorder.hash_file, recorder.commit, workers=1, queue_size=1, submit_timeout=5)
+    pipeline.start()
+    assert pipeline.submit("a.mp4")
+    assert recorder.hashing.wait(10)
+    assert pipeline.submit("b.mp4")
+    started = time.monotonic()
+    assert pipeline.submit("c.mp4")
+    assert time.monotonic() - started < 1
+    assert pipeline.stats()["deferred_waiting"] == 1
+    gate.set()
+    pipeline.stop()
+
+
+def test_full_overflow_turns_files_away_and_reports_them():
+    gate = threading.Event()
+    recorder = Recorder(gate)
+    turned_away = []
+    pipeline = AcquisitionPipeline(
+        recorder.hash_file, recorder.commit, workers=1, queue_size=1, overflow_size=2, on_overflow=turned_away.append
+    )
+    pipeline.start()
+    assert pipeline.submit("a.mp4")
+    assert recorder.hashing.wait(10)
+    # One in progress, one queued, two deferred; the fifth file does not fit
+    assert all(pipeline.submit(path) for path in ("b.mp4", "c.mp4", "d.mp4"))
+    assert not pipeline.submit("e.mp4")
+    assert turned_away == ["e.mp4"]
+    stats = pipeline.stats()
+    assert (stats["deferred_waiting"], stats["dropped"]) == (2, 1)
+    gate.set()
+    pipeline.stop()
+    assert [path for path, _ in recorder.committed] == ["a.mp4", "b.mp4", "c.mp4", "d.mp4"]
+
+
+def test_skipped_and_failed_files_are_counted():
+    recorder = Recorder()
+
+    def hash_file(path):
+        if path == "broken.mp4":
+            raise OSError("unreadable")
+        return recorder.hash_file(path)
+
+    pipeline = AcquisitionPipeline(hash_file, recorder.commit, prepare=lambda path: path != "notes.txt", workers=2)
+    pipeline.start()
+    for path in ("clip.mp4", "notes.txt", "broken.mp4"):
+        pipeline.submit(path)
+    pipeline.stop()
+    stats = pipeline.stats()
+    assert (stats["processed"], stats["skipped"], stats["failed"]) == (1, 1, 1)
+    assert recorder.committed == [("clip.mp4", "hash of clip.mp4")]
+    assert stats["in_progress"] == 0
+
+
+def test_process_pool_hashes_in_worker_processes(tmp_path):
+    contents = {}
+    for i in range(4):
+        contents[write_file(tmp_path / f"clip{i}.mp4", bytes([i]) * 5000)] = hashlib.sha256(bytes([i]) * 5000).hexdigest()
+    recorder = Recorder()
+    pipeline = AcquisitionPipeline(ForensicHasher.hash_file, recorder.commit, workers=2, pool="process")
+    pipeline.start()
+    for path in contents:
+        pipeline.submit(path)
+    pipeline.stop()
+    assert dict(recorder.committed) == contents
+
+
+def test_unknown_pool_is_refused():
+    with pytest.raises(ValueError):
+        AcquisitionPipeline(str, print, pool="fiber")
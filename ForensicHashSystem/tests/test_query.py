@@ -0,0 +1,86 @@
+import os
+import types
+from datetime import datetime
+
+import pytest
+
+from conftest import make_context
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+from core.SegmentedLogStorage import LogSegment
+
+
+def timestamp(minute):
+    return f"2026-01-01 02:{minute:02d}:00"
+
+
+@pytest.fixture
+def entries(log_format):
+    """Entries of two cameras, committed one at a time and not in timestamp order"""
+    minutes = [5, 1, 9, 3, 7, 2, 8, 4, 6, 0]
+    for i, minute in enumerate(minutes):
+        camera_id = f"CAM-100{i % 2 + 1}"
+        context = make_context(i, camera_id=camera_id, event_type="MODIFY" if i % 3 == 0 else "CREATE", timestamp=timestamp(minute))
+        EvidenceLog.save_entry(context, f"{i:064x}")
+    return EvidenceLog.load_log()
+
+
+def expected(entries, camera_id=None, event_type=None, start=None, end=None):
+    positions = sorted(range(len(entries)), key=lambda position: (entries[position]["timestamp"], position))
+    return [
+        entries[position]["file_name"] for position in positions
+        if (camera_id is None or entries[position]["camera_id"] == camera_id)
+        and (event_type is None or entries[position]["event_type"] == event_type)
+        and (start is None or entries[position]["timestamp"] >= start)
+        and (end is None or entries[position]["timestamp"] < end)
+    ]
+
+
+def names(results):
+    return [entry["file_name"] for entry in results]
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"camera_id": "CAM-1002"},
+    {"event_type": "MODIFY"},
+    {"start": timestamp(3), "end": timestamp(7)},
+    {"camera_id": "CAM-1001", "start": timestamp(2)},
+    {"camera_id": "CAM-1001", "event_type": "CREATE", "end": timestamp(8)},
+    {"camera_id": "CAM-9999"}
+])
+def test_query_matches_a_scan_of_the_log(entries, filters):
+    assert names(EvidenceLog.query(**filters)) == expected(entries, **filters)
+
+
+def test_limit_and_offset_page_through_results(entries):
+    everything = expected(entries)
+    assert names(EvidenceLog.query(limit=3)) == everything[:3]
+    assert names(EvidenceLog.query(limit=3, offset=3)) == everything[3:6]
+    assert names(EvidenceLog.query(offset=8)) == everything[8:]
+    assert names(EvidenceLog.query(limit=0)) == []
+
+
+def test_query_accepts_datetimes_and_merges_custody(entries):
+    first = entries[0]
+    EvidenceLog.add_access_log_entry(first["evidence_uuid"], "analyst", "Viewed")
+    results = EvidenceLog.query(start=datetime(2026, 1, 1, 2, 5), end=datetime(2026, 1, 1, 2, 6))
+    assert isinstance(results, types.GeneratorType)
+    entry, = results
+    assert entry["file_name"] == first["file_name"]
+    assert [record["action"] for record in entry["access_log"]] == ["Viewed"]
+
+
+def test_segment_query_parses_only_segments_in_range(monkeypatch):
+    Config.set("evidence_log_format", "segmented")
+    Config.set("segment_max_entries", 3)
+    for i in range(9):
+        EvidenceLog.save_entry(make_context(i, timestamp=timestamp(i)), f"{i:064x}")
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    parsed = []
+    build_model = LogSegment._build_model
+    monkeypatch.setattr(LogSegment, "_build_model", lambda self: parsed.append(os.path.basename(self.path)) or build_model(self))
+    assert names(EvidenceLog.query(start=timestamp(4), end=timestamp(5))) == ["clip004.mp4"]
+    # The manifest's time ranges rule out the first and last sealed segments
+    assert sorted(parsed) == ["segment-000002.jsonl", "segment-000004.jsonl"]
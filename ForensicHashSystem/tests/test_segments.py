@@ -0,0 +1,122 @@
+import itertools
+import json
+import os
+import uuid
+
+import pytest
+
+from conftest import save
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+from core.SegmentedLogStorage import SegmentedStorage
+
+
+@pytest.fixture
+def segmented():
+    Config.set("evidence_log_format", "segmented")
+    Config.set("segment_max_entries", 3)
+
+
+@pytest.fixture
+def fixed_uuids(monkeypatch):
+    """Deterministic evidence UUIDs, so key filter false positives do not vary between runs"""
+    numbers = itertools.count(1)
+    monkeypatch.setattr(EvidenceLog, "generate_evidence_uuid", staticmethod(lambda: str(uuid.UUID(int=next(numbers)))))
+
+
+def save_each(count):
+    """One commit per entry: a segment only rotates between commits"""
+    return [hash_value for i in range(count) for hash_value in save(1, start=i)]
+
+
+def test_segments_rotate_at_the_entry_limit(segmented):
+    hashes = save_each(8)
+    segments = EvidenceLog.list_segments()
+    assert [segment["entry_count"] for segment in segments] == [3, 3, 2]
+    assert [segment["sealed"] for segment in segments] == [True, True, False]
+    # Each segment carries on the chain where the one before ended
+    assert [segment["last_hash"] for segment in segments] == [hashes[2], hashes[5], hashes[7]]
+    assert [segment["first_previous_hash"] for segment in segments] == ["", hashes[2], hashes[5]]
+    assert segments[0]["merkle_root"] == SegmentedStorage.merkle_root(EvidenceLog.storage().load_segment(0))
+    assert [entry["hash"] for entry in EvidenceLog.load_segment(-1)] == hashes[6:]
+    valid, message, _ = EvidenceLog.verify_hash_chain(full=True)
+    assert valid, message
+
+
+def test_hot_paths_leave_sealed_segments_unopened(segmented, fixed_uuids):
+    hashes = save_each(7)
+    # A fresh process: only the manifest and the active segment are read
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    storage = EvidenceLog.storage()
+    assert EvidenceLog.get_last_hash() == hashes[-1]
+    save(1, start=7)
+    assert storage.find_entry_by_filename("clip007.mp4") is not None
+    assert set(storage._segments) == {storage._active_name()}
+    # Files and UUIDs the log has never seen are ruled out by the manifest's key filters
+    assert EvidenceLog.find_entry_by_filename("never-seen.mp4") is None
+    assert storage.find_original_entry("never-seen.mp4") is None
+    assert EvidenceLog.find_entry_by_uuid(EvidenceLog.generate_evidence_uuid()) is None
+    assert set(storage._segments) == {storage._active_name()}
+    # Older entries are still found, by opening only the sealed segment that holds them
+    assert EvidenceLog.find_entry_by_filename("clip000.mp4")["hash"] == hashes[0]
+    assert set(storage._segments) == {storage._active_name(), "segment-000001.jsonl"}
+    evidence_uuid = EvidenceLog.load_segment(1)[0]["evidence_uuid"]
+    EvidenceLog._storages = {}
+    storage = EvidenceLog.storage()
+    assert storage.find_entry_by_uuid(evidence_uuid)["hash"] == hashes[3]
+    assert set(storage._segments) == {"segment-000002.jsonl"}
+
+
+def test_parsed_sealed_segments_are_bounded(segmented):
+    Config.set("segment_max_open", 2)
+    hashes = save_each(16)
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    storage = EvidenceLog.storage()
+    for i in (0, 4, 7, 10, 13, 1):
+        assert storage.find_entry_by_filename(f"clip{i:03d}.mp4")["hash"] == hashes[i]
+    # Two sealed segments stay parsed besides the active one, the last one used
+    # among them. Which other one depends on key filter false positives for the random UUIDs
+    assert len(storage._segments) == 3
+    assert storage._active_name() in storage._segments
+    assert list(storage._segments)[-1] == "segment-000001.jsonl"
+    assert "keys" not in EvidenceLog.list_segments()[0]
+
+
+def test_compaction_merges_sealed_segments(segmented):
+    hashes = save_each(10)
+    before = EvidenceLog.load_log()
+    Config.set("segment_max_entries", 6)
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    # Three sealed segments of 3 entries: the first two fit into one
+    assert EvidenceLog.compact_log() == 1
+    segments = EvidenceLog.list_segments()
+    assert [segment["entry_count"] for segment in segments] == [6, 3, 1]
+    assert segments[0]["name"] == "segment-000001-000002.jsonl"
+    assert segments[0]["last_hash"] == hashes[5]
+    assert len(segments[0]["compacted_roots"]) == 2
+    assert EvidenceLog.load_log() == before
+    valid, message, _ = EvidenceLog.verify_hash_chain(full=True)
+    assert valid, message
+
+
+def test_compaction_skips_segments_that_do_not_match_the_manifest(segmented):
+    save_each(9)
+    path = os.path.join(EvidenceLog.SEGMENT_DIR, "segment-000001.jsonl")
+    with open(path) as f:
+        lines = f.readlines()
+    entry = json.loads(lines[1])
+    entry["file_size"] += 1
+    lines[1] = json.dumps(entry) + "\n"
+    with open(path, "w") as f:
+        f.writelines(lines)
+
+    Config.set("segment_max_entries", 9)
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    # Only the two untouched segments are merged; the altered one stays as evidence
+    assert EvidenceLog.compact_log() == 1
+    names = [segment["name"] for segment in EvidenceLog.list_segments()]
+    assert names[:2] == ["segment-000001.jsonl", "segment-000002-000003.jsonl"]
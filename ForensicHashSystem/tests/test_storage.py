@@ -0,0 +1,258 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from conftest import make_context, save
+from core.Config import Config
+from core.EvidenceLog import EvidenceLog
+from core.LogStorage import JsonArrayStorage, JsonLinesFile, JsonLinesStorage
+from core.SqliteLogStorage import SqliteStorage
+
+
+def test_jsonl_appends_without_rewriting():
+    Config.set("evidence_log_format", "jsonl")
+    save(3)
+    with open(EvidenceLog.JSONL_LOG_FILE, "rb") as f:
+        before = f.read()
+    save(2, start=3)
+    with open(EvidenceLog.JSONL_LOG_FILE, "rb") as f:
+        after = f.read()
+    assert after.startswith(before)
+    assert after.count(b"\n") == 5
+
+
+def test_jsonl_torn_tail_is_ignored_and_truncated(tmp_path):
+    log = JsonLinesFile(str(tmp_path / "log.jsonl"))
+    log.append_records([{"n": 1}, {"n": 2}])
+    with open(log.path, "ab") as f:
+        f.write(b'{"n": 3, "trunc')
+    assert list(log.iter_records()) == [{"n": 1}, {"n": 2}]
+    assert list(log.iter_records_reversed()) == [{"n": 2}, {"n": 1}]
+    log.append_records([{"n": 4}])
+    assert list(log.iter_records()) == [{"n": 1}, {"n": 2}, {"n": 4}]
+
+
+def test_legacy_json_log_migrates_to_jsonl():
+    hashes = save(4)
+    Config.set("evidence_log_format", "jsonl")
+    assert not os.path.exists(EvidenceLog.JSONL_LOG_FILE)
+    assert [entry["hash"] for entry in EvidenceLog.load_log()] == hashes
+    assert isinstance(EvidenceLog.storage(), JsonLinesStorage)
+    valid, message, _ = EvidenceLog.verify_hash_chain(full=True)
+    assert valid, message
+
+
+def test_config_is_parsed_once_until_the_file_changes(monkeypatch):
+    Config.set("merkle_threshold", 123)
+    loads = []
+    real_load = json.load
+    monkeypatch.setattr(json, "load", lambda f, **kwargs: loads.append(f.name) or real_load(f, **kwargs))
+    for _ in range(50):
+        assert Config.get("merkle_threshold") == 123
+    assert loads == []
+
+    # Edited by hand: picked up on the next lookup
+    with open(Config.CONFIG_FILE) as f:
+        config = real_load(f)
+    config["merkle_threshold"] = 456
+    with open(Config.CONFIG_FILE, "w") as f:
+        json.dump(config, f)
+    stat = os.stat(Config.CONFIG_FILE)
+    os.utime(Config.CONFIG_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000 * 1000 * 1000))
+    assert Config.get("merkle_threshold") == 456
+    assert len(loads) == 1
+
+
+def test_load_config_returns_a_private_copy():
+    config = Config.load_config()
+    config["merkle_threshold"] = -1
+    assert Config.get("merkle_threshold") != -1
+
+
+@pytest.mark.parametrize("contents", [None, "{not json"])
+def test_defaults_are_never_handed_out(monkeypatch, contents):
+    if contents is not None:
+        with open(Config.CONFIG_FILE, "w") as f:
+            f.write(contents)
+    # Unwritable, so the defaults are answered without a cached file behind them
+    monkeypatch.setattr(Config, "save_config", classmethod(lambda cls, config: False))
+    config = Config._current()
+    config["merkle_threshold"] = -1
+    config["file_extensions"].append(".txt")
+    assert Config.DEFAULT_CONFIG["merkle_threshold"] == 1024 * 1024 * 1024
+    assert ".txt" not in Config.DEFAULT_CONFIG["file_extensions"]
+    assert Config.get("merkle_threshold") == 1024 * 1024 * 1024
+
+
+def test_engines_round_trip_entries(log_format):
+    hashes = save(7)
+    entries = EvidenceLog.load_log()
+    assert [entry["hash"] for entry in entries] == hashes
+    assert [entry["previous_hash"] for entry in entries] == ["", *hashes[:-1]]
+    assert entries[0]["file_size"] == 1000
+    # Readers in a fresh process see the same log
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    assert EvidenceLog.load_log() == entries
+
+
+def test_engines_lookups(log_format):
+    first = make_context(1, camera_id="CAM-1001")
+    modified = {**first, "event_type": "MODIFY", "camera_id": "CAM-1001", "file_size": 5}
+    other_camera = {**make_context(1, camera_id="CAM-1002"), "evidence_uuid": EvidenceLog.generate_evidence_uuid()}
+    EvidenceLog.save_entries([(first, "a" * 64), (modified, "b" * 64), (other_camera, "c" * 64)])
+
+    assert EvidenceLog.find_entry_by_filename("clip001.mp4")["hash"] == "c" * 64
+    assert EvidenceLog.find_entry("clip001.mp4", "CAM-1001")["hash"] == "b" * 64
+    assert EvidenceLog.find_original_entry("clip001.mp4")["hash"] == "a" * 64
+    assert EvidenceLog.find_entry_by_uuid(first["evidence_uuid"])["hash"] == "a" * 64
+    assert EvidenceLog.find_entry_by_filename("missing.mp4") is None
+    assert EvidenceLog.find_entry_by_uuid(EvidenceLog.generate_evidence_uuid()) is None
+    assert EvidenceLog.get_last_hash() == "c" * 64
+
+
+def test_sqlite_lookups_use_indexes():
+    Config.set("evidence_log_format", "sqlite")
+    save(3)
+    assert isinstance(EvidenceLog.storage(), SqliteStorage)
+    connection = sqlite3.connect(EvidenceLog.SQLITE_LOG_FILE)
+    plan = " ".join(
+        str(row) for row in connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM entries WHERE file_name = ? ORDER BY position DESC LIMIT 1", ("x",)
+        )
+    )
+    connection.close()
+    assert "idx_entries_file" in plan
+
+
+def test_sqlite_imports_replace_all_or_nothing():
+    Config.set("evidence_log_format", "sqlite")
+    hashes = save(3)
+    storage = EvidenceLog.storage()
+    uuid = EvidenceLog.load_log()[0]["evidence_uuid"]
+    storage.append_custody([(uuid, "access_log", {"action": "Viewed"})])
+
+    def failing(records):
+        yield records[0]
+        raise OSError("interrupted")
+
+    with pytest.raises(OSError):
+        storage.import_entries(failing([{**make_context(9), "hash": "9" * 64}, None]))
+    with pytest.raises(OSError):
+        storage.import_custody(failing([(uuid, "access_log", {"action": "Copied"}), None]))
+    # The delete was rolled back with the inserts
+    assert [entry["hash"] for entry in storage.load()] == hashes
+    assert storage.custody(uuid) == {"access_log": [{"action": "Viewed"}]}
+
+
+@pytest.mark.parametrize("log_format", ["json", "jsonl"], indirect=True)
+def test_cached_model_sees_writes_from_other_processes(log_format):
+    save(2)
+    assert EvidenceLog.find_entry_by_filename("clip005.mp4") is None
+    # Another process's storage object appends behind this one's cache
+    if log_format == "json":
+        other = JsonArrayStorage(EvidenceLog.LOG_FILE, EvidenceLog.CUSTODY_LOG_FILE)
+    else:
+        other = JsonLinesStorage(EvidenceLog.JSONL_LOG_FILE, EvidenceLog.CUSTODY_LOG_FILE)
+    other.append([{**make_context(5), "hash": "d" * 64}])
+    assert EvidenceLog.find_entry_by_filename("clip005.mp4")["hash"] == "d" * 64
+    assert len(EvidenceLog.load_log()) == 3
+
+
+def test_callers_cannot_mutate_the_cached_model(log_format):
+    save(1)
+    entry = EvidenceLog.find_entry_by_filename("clip000.mp4")
+    entry["hash"] = "tampered"
+    entry["access_log"].append({"action": "injected"})
+    fresh = EvidenceLog.find_entry_by_filename("clip000.mp4")
+    assert fresh["hash"] != "tampered"
+    assert fresh["access_log"] == []
+
+
+def test_custody_events_stay_out_of_the_chain(log_format):
+    hashes = save(2)
+    evidence_uuid = EvidenceLog.find_entry_by_filename("clip000.mp4")["evidence_uuid"]
+    chained = EvidenceLog.storage().load()
+    EvidenceLog.add_access_log_entry(evidence_uuid, "analyst", "Viewed")
+    EvidenceLog.add_verification_log_entry(evidence_uuid, "PASSED", "ok", mode="QUICK")
+    EvidenceLog.update_storage_location(evidence_uuid, "/archive/clip000.mp4")
+
+    # The chained entries are untouched ...
+    assert EvidenceLog.storage().load() == chained
+    assert "access_log" not in chained[0]
+    # ... and readers see the custody history merged in
+    entry = EvidenceLog.find_entry_by_uuid(evidence_uuid)
+    assert [record["action"] for record in entry["access_log"]] == ["Viewed"]
+    assert entry["hash_verification_log"][0]["mode"] == "QUICK"
+    assert entry["current_location"] == "/archive/clip000.mp4"
+    assert entry["original_location"] == "/evidence/clip000.mp4"
+    valid, message, _ = EvidenceLog.verify_hash_chain(full=True)
+    assert valid, message
+    assert [entry["hash"] for entry in EvidenceLog.load_log()] == hashes
+
+
+def test_embedded_custody_lists_are_migrated_once():
+    create = {**make_context(1), "hash": "a" * 64, "access_log": [{"timestamp": "t1", "user": "u", "action": "Created"}]}
+    # Older versions copied the lists into every later entry of the item
+    modify = {
+        **create, "event_type": "MODIFY", "hash": "b" * 64, "previous_hash": "a" * 64,
+        "access_log": create["access_log"] + [{"timestamp": "t2", "user": "u", "action": "Modified"}],
+        "hash_verification_log": [{"timestamp": "t3", "result": "PASSED", "message": "ok"}]
+    }
+    with open(EvidenceLog.LOG_FILE, "w") as f:
+        json.dump([create, modify], f)
+
+    assert EvidenceLog.migrate_custody_logs() == 3
+    assert all("access_log" not in entry for entry in EvidenceLog.storage().load())
+    entry = EvidenceLog.find_entry_by_uuid(create["evidence_uuid"])
+    assert [record["action"] for record in entry["access_log"]] == ["Created", "Modified"]
+    assert len(entry["hash_verification_log"]) == 1
+    # Nothing left to move: a second run rewrites nothing
+    assert EvidenceLog.migrate_custody_logs() == 0
+    assert EvidenceLog.find_entry_by_uuid(create["evidence_uuid"]) == entry
+
+
+def embedded_custody_log():
+    EvidenceLog.save_entries([
+        ({**make_context(i), "access_log": [{"timestamp": f"t{i}", "user": "u", "action": "Created"}]}, f"{i:064x}")
+        for i in range(3)
+    ])
+    EvidenceLog.flush()
+
+
+def custody_view():
+    return [(entry["hash"], entry["access_log"]) for entry in EvidenceLog.load_log()]
+
+
+@pytest.mark.parametrize("log_format", ["json", "jsonl", "segmented", "binary"], indirect=True)
+def test_interrupted_custody_migration_is_completed(log_format, monkeypatch):
+    embedded_custody_log()
+    with monkeypatch.context() as patch:
+        patch.setattr(type(EvidenceLog.storage()), "import_custody", lambda self, events: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            EvidenceLog.migrate_custody_logs()
+    assert os.path.exists(EvidenceLog.CUSTODY_MIGRATION_FILE)
+
+    # The next process to open the log replays the journal
+    EvidenceLog._storages = {}
+    EvidenceLog._writers = {}
+    assert all("access_log" not in entry for entry in EvidenceLog.storage().load())
+    assert not os.path.exists(EvidenceLog.CUSTODY_MIGRATION_FILE)
+    assert custody_view() == [(f"{i:064x}", [{"timestamp": f"t{i}", "user": "u", "action": "Created"}]) for i in range(3)]
+    assert EvidenceLog.migrate_custody_logs() == 0
+
+
+def test_sqlite_custody_migration_is_one_transaction(monkeypatch):
+    Config.set("evidence_log_format", "sqlite")
+    embedded_custody_log()
+    before = custody_view()
+    with monkeypatch.context() as patch:
+        patch.setattr(SqliteStorage, "_insert_custody", lambda self, connection, events: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            EvidenceLog.migrate_custody_logs()
+    assert not os.path.exists(EvidenceLog.CUSTODY_MIGRATION_FILE)
+    assert custody_view() == before
+    assert EvidenceLog.migrate_custody_logs() == 3
+    assert custody_view() == before
@@ -169,13 +169,21 @@ class ForensicUI:
             command=self.verify_file
         ).grid(row=0, column=1, padx=8)
 
+        ttk.Button(
+            action_frame,
+            text="Quick Verify",
+            width=22,
+            style="Success.TButton",
+            command=self.quick_verify_file
+        ).grid(row=0, column=2, padx=8)
+
         ttk.Button(
             action_frame,
             text="View Evidence Log",
             width=22,
             style="Danger.TButton",
             command=lambda: EvidenceLogViewer(self.root)
-        ).grid(row=1, column=0, columnspan=2, pady=6)
+        ).grid(row=1, column=0, columnspan=3, pady=6)
 
         # Result
         self.result_label = ttk.Label(
@@ -283,6 +291,27 @@ class ForensicUI:
             self.result_label.config(text=f"✖ {message}", foreground="red")
             self.status_text.set("Verification failed.")
 
+    def quick_verify_file(self):
+        if not self.file_path.get():
+            messagebox.showerror("Missing File", "Please select an evidence file.")
+            return
+
+        camera_id = self.camera_id_var.get()
+        if camera_id == "Auto-generated":
+            camera_id = None
+
+        is_valid, message, evidence_uuid = ForensicVerifier.quick_verify(
+            self.file_path.get(),
+            camera_id
+        )
+
+        if is_valid:
+            self.result_label.config(text=f"✔ {message}", foreground="green")
+            self.status_text.set("Quick verification passed.")
+        else:
+            self.result_label.config(text=f"✖ {message}", foreground="red")
+            self.status_text.set("Quick verification failed.")
+
 
 if __name__ == "__main__":
     root = tk.Tk()
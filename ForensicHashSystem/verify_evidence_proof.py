@@ -0,0 +1,78 @@
+"""
+Evidence Proof Verifier - Standalone Inclusion Proof Checker
+Checks an evidence export written by ForensicReportGenerator.generate_evidence_export
+without the rest of the system: every exported entry must hash, through its
+Merkle inclusion proof, to the root of the log segment it came from.
+
+Usage: python verify_evidence_proof.py EXPORT.json [TRUSTED_ROOT ...]
+
+Trusted roots are segment roots obtained independently of the export (for
+example from the custodian's chain verification report); when given, every
+segment the export relies on must be one of them.
+Only the standard library is used; the hashing must match core/MerkleTree.py.
+"""
+
+import hashlib
+import json
+import sys
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def entry_leaf(entry):
+    encoded = json.dumps(entry, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(LEAF_PREFIX + encoded.encode("utf-8")).hexdigest()
+
+
+def hash_node(left, right):
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def proof_root(leaf, proof):
+    digest = leaf
+    for side, sibling in proof:
+        digest = hash_node(sibling, digest) if side == "left" else hash_node(digest, sibling)
+    return digest
+
+
+def verify_export(export, trusted_roots=None):
+    """Return (valid, messages) for a loaded export"""
+    messages = []
+    roots = {segment["name"]: segment["merkle_root"] for segment in export["segments"]}
+
+    if trusted_roots:
+        for name, root in roots.items():
+            if root not in trusted_roots:
+                messages.append(f"Segment {name}: root {root} is not one of the trusted roots")
+
+    for item in export["entries"]:
+        label = f"{item['segment']} #{item['position']} ({item['entry'].get('file_name', 'N/A')})"
+        root = roots.get(item["segment"])
+        if root is None:
+            messages.append(f"{label}: segment missing from export")
+        elif proof_root(entry_leaf(item["entry"]), item["proof"]) != root:
+            messages.append(f"{label}: inclusion proof does not match the segment root")
+
+    valid = not messages
+    messages.append(
+        f"{len(export['entries'])} entries checked against {len(roots)} segment root(s): "
+        + ("ALL VALID" if valid else "VERIFICATION FAILED")
+    )
+    return valid, messages
+
+
+def main(argv):
+    if not argv:
+        print(__doc__)
+        return 2
+    with open(argv[0], "r", encoding="utf-8") as f:
+        export = json.load(f)
+    valid, messages = verify_export(export, set(argv[1:]))
+    for message in messages:
+        print(message)
+    return 0 if valid else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))